@@ -0,0 +1,87 @@
+# ros_interface_generator/batch.py
+"""
+Cross-baseline comparison of the generated manifests.
+
+In batch mode every baseline (named sdvsidl set) is generated against the
+same parsed proto catalog into its own msg/srv/doc folders. The manifests
+of consecutive baselines are then compared:
+
+    {"from": "BL4.1", "to": "BL6",
+     "added": [row...], "removed": [row...],
+     "changed": [{"ros_filename": ..., "from": [row...], "to": [row...]}],
+     "content_changed": ["Foo.msg", ...]}
+
+`content_changed` lists the interfaces present in both baselines whose
+generated file differs.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .constants import MANIFEST_DIFF_FILENAME
+
+
+def parse_baseline_spec(spec: str) -> Tuple[str, List[str]]:
+    """'NAME=PATH[,PATH...]' -> (NAME, [PATH...])."""
+    name, sep, paths = spec.partition("=")
+    if not sep or not name or not paths:
+        raise ValueError(f"Invalid baseline '{spec}', expected NAME=PATH[,PATH...]")
+    return name, [p for p in paths.split(",") if p]
+
+
+def _rows_by_filename(rows: List[dict]) -> Dict[str, List[dict]]:
+    grouped: Dict[str, List[dict]] = {}
+    for row in rows:
+        grouped.setdefault(row.get("ros_filename", ""), []).append(row)
+    return grouped
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def diff_manifests(old_name: str, old_rows: List[dict], old_msg_dir: str,
+                   new_name: str, new_rows: List[dict], new_msg_dir: str) -> dict:
+    """Rows added, removed or changed between two manifests, and the common files whose content differs."""
+    old, new = _rows_by_filename(old_rows), _rows_by_filename(new_rows)
+    added = [row for name in new if name not in old for row in new[name]]
+    removed = [row for name in old if name not in new for row in old[name]]
+    changed = [
+        {"ros_filename": name, "from": old[name], "to": new[name]}
+        for name in new if name in old and old[name] != new[name]
+    ]
+    content_changed = []
+    for name in new:
+        if name in old and name.endswith(".msg"):
+            if _file_digest(os.path.join(old_msg_dir, name)) != _file_digest(os.path.join(new_msg_dir, name)):
+                content_changed.append(name)
+    return {
+        "from": old_name,
+        "to": new_name,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "content_changed": content_changed,
+    }
+
+
+def write_manifest_diff(baselines: List[Tuple[str, str, str]], output_path: str) -> List[dict]:
+    """
+    Compare the manifests of consecutive baselines, given as (name, manifest_path, msg_dir),
+    and write the list of diffs to `output_path`.
+    """
+    loaded = []
+    for name, manifest_path, msg_dir in baselines:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            loaded.append((name, json.load(f), msg_dir))
+
+    diffs = [diff_manifests(*old, *new) for old, new in zip(loaded, loaded[1:])]
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(diffs, f, indent=2, ensure_ascii=False)
+    return diffs
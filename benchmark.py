@@ -0,0 +1,547 @@
+# ros_interface_generator/benchmark.py
+"""
+Benchmark of the generation pipeline on synthetic inputs.
+
+    python -m ros_interface_generator.benchmark --messages 100,1000,10000 --output bench.json
+
+For every size a synthetic proto catalog and sdvsidl set is written to a
+temporary folder, then each pipeline stage is run twice: once timed, once
+instrumented to count file reads and regex calls (the instrumentation would
+distort the timings). The report is JSON:
+
+    {"config": {...}, "runs": [{"messages": N, "proto_files": ..., "interfaces": ...,
+      "stages": {"catalog": {"wall_s", "file_reads", "regex_calls", "peak_rss_kb"}, ...},
+      "lookup": {"calls", "wall_s", "per_call_us"}}]}
+
+`lookup` times find_proto_file_msg2 over every message name with a cold memo,
+to check that resolution cost stays near-linear with the catalog size.
+
+    python -m ros_interface_generator.benchmark --naming [--proto_dir catalog]
+
+times the naming functions of utils on a name corpus (the message and file
+names of a catalog, or generated ones) without their LRU caches, with cold
+caches and with warm caches.
+
+    python -m ros_interface_generator.benchmark --records [--proto_dir catalog]
+
+builds the records of a catalog (fields, enum values, interfaces, manifest
+rows) both as the compact slotted/interned types of the pipeline and as the
+plain dicts/tuples they replaced, and reports allocated memory and build time.
+
+    python -m ros_interface_generator.benchmark --startup [--repeat 5]
+
+times fresh interpreters (median wall time): bare python, `main --help`,
+`main --check` on a synthetic set with a warm parse cache, and the import of
+the session; it also lists the package modules the --check path imports.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+from .proto_parser import PROTO_CATALOGS, get_proto_catalog, find_proto_file_msg2
+from .enum_table import ENUM_TABLES
+from .extractor_sdvsidl import Interface, extract_topics_from_sdvsidl_file_list, deduplicate_ros_filenames_by_topic_hint2
+from .msg_generator import MsgPlan, DIAGNOSTICS
+from .sanitizer import sanitize_ros_interfaces
+from .output_tree import OutputTree
+from .profiler import IOCounters
+from .proto_ast import FieldNode, EnumValueNode
+from .utils import ManifestRecord, parse_sdvsidl_file, compute_topic_hint2
+from .manifest import MANIFEST_FILENAME, MANIFEST_CSV_FILENAME, ManifestTable
+from . import utils
+
+TOPICS_PER_PACKAGE = 50
+TOPICS_PER_PROJECT = 20
+
+
+# ---------------------------------------------------------------- synthetic inputs
+
+def make_synthetic_inputs(root: str, messages: int, depth: int = 2, enum_density: float = 0.3,
+                          collision_rate: float = 0.1, pubsub: bool = True, seed: int = 0) -> Dict[str, str]:
+    """
+    Write a synthetic catalog (`root`/catalog) and sdvsidl set (`root`/sdvsidl).
+
+    `messages` top-level topics are spread over packages sdv.d<i>.s<j>. Every
+    topic uses a chain of `depth` nested message types, an enum field with
+    probability `enum_density`, and with probability `collision_rate` reuses
+    the name of a topic of another package. With `pubsub`, topics live in
+    <package>/pubsub/ as in the real catalog, otherwise next to the types.
+    """
+    rng = random.Random(seed)
+    catalog, sdvsidl = os.path.join(root, "catalog"), os.path.join(root, "sdvsidl")
+    packages = max(1, (messages + TOPICS_PER_PACKAGE - 1) // TOPICS_PER_PACKAGE)
+
+    topics = []     # (package, topic name)
+    for p in range(packages):
+        domain, sub = f"d{p // 10}", f"s{p % 10}"
+        package = f"sdv.{domain}.{sub}"
+        folder = os.path.join(catalog, "sdv", domain, sub)
+        count = min(TOPICS_PER_PACKAGE, messages - p * TOPICS_PER_PACKAGE)
+
+        topic_blocks, type_blocks = [], []
+        for k in range(count):
+            index = p * TOPICS_PER_PACKAGE + k
+            name = f"Topic{index}"
+            if topics and rng.random() < collision_rate:
+                name = rng.choice(topics)[1]
+            chain = [f"Type{index}L{level}" for level in range(depth)]
+
+            fields = [f"  uint32 counter = 1 [(.sdv.vsidl.v1.primitive_byte_size) = PBS_2];",
+                      f"  float value = 2;"]
+            if chain:
+                fields.append(f"  {package}.{chain[0]} payload = 3;")
+            if rng.random() < enum_density:
+                fields.append(f"  {package}.Mode{index} mode = 4;")
+                type_blocks.append(
+                    f"enum Mode{index} {{\n" +
+                    "".join(f"  MODE{index}_{state} = {value};\n" for value, state in enumerate(("UNKNOWN", "OFF", "ON", "FAILED"))) +
+                    "}\n")
+            topic_blocks.append(f"message {name} {{\n" + "\n".join(fields) + "\n}\n")
+
+            for level, type_name in enumerate(chain):
+                body = [f"  int32 level{level} = 1;", f"  repeated double samples = 2 [(.sdv.vsidl.v1.repeated_field_max_count) = 8];"]
+                if level + 1 < len(chain):
+                    body.append(f"  {package}.{chain[level + 1]} next = 3;")
+                type_blocks.append(f"message {type_name} {{\n" + "\n".join(body) + "\n}\n")
+            topics.append((package, name))
+
+        header = f'syntax = "proto3";\n\npackage {package};\n\n'
+        stem = f"sdv_{domain}_{sub}"
+        topics_dir = os.path.join(folder, "pubsub") if pubsub else folder
+        _write(os.path.join(topics_dir, f"{stem}_topics.proto"), header + "\n".join(topic_blocks))
+        _write(os.path.join(folder, "common", f"{stem}_types.proto"), header + "\n".join(type_blocks))
+
+    for project in range((len(topics) + TOPICS_PER_PROJECT - 1) // TOPICS_PER_PROJECT):
+        events = []
+        for package, name in topics[project * TOPICS_PER_PROJECT:(project + 1) * TOPICS_PER_PROJECT]:
+            events.append(
+                "  event {\n"
+                f'    event_name: "{name}Event"\n'
+                "    topic {\n"
+                f'      topic_name: "{package}.{name}"\n'
+                "    }\n"
+                "  }\n")
+        _write(os.path.join(sdvsidl, f"Project{project}.sdvsidl"), "interface {\n" + "".join(events) + "}\n")
+
+    return {"proto_dir": catalog, "sdvsidl": sdvsidl}
+
+
+def _write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+# ---------------------------------------------------------------- instrumentation
+
+class _Counters:
+    """Counts files opened for reading (profiler.IOCounters) and regex calls (profiling hook)."""
+
+    REGEX_FUNCTIONS = {"search", "match", "fullmatch", "findall", "finditer", "sub", "subn", "split"}
+
+    def __init__(self):
+        self.io = IOCounters()
+        self.regex_calls = 0
+
+    @property
+    def file_reads(self) -> int:
+        return self.io.files_read
+
+    def _profile(self, frame, event, arg):
+        if event == "c_call":
+            if isinstance(getattr(arg, "__self__", None), re.Pattern) and arg.__name__ in self.REGEX_FUNCTIONS:
+                self.regex_calls += 1
+        elif event == "call":
+            code = frame.f_code
+            if code.co_name in self.REGEX_FUNCTIONS and frame.f_globals.get("__name__") == "re":
+                self.regex_calls += 1
+
+    @contextlib.contextmanager
+    def installed(self):
+        with self.io.installed():
+            sys.setprofile(self._profile)
+            try:
+                yield self
+            finally:
+                sys.setprofile(None)
+
+
+def _peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak   # bytes on macOS, KiB elsewhere
+
+
+# ---------------------------------------------------------------- pipeline
+
+def _reset_state():
+    PROTO_CATALOGS.clear()
+    ENUM_TABLES.clear()
+    DIAGNOSTICS.reset()
+
+
+def _pipeline(inputs: Dict[str, str], output: str, jobs: int):
+    """The stages of main.run_generation, as (name, callable) pairs sharing their results."""
+    proto_dir = inputs["proto_dir"]
+    msg_dir, srv_dir, doc_dir = (os.path.join(output, group) for group in ("msg", "srv", "doc"))
+    for folder in (msg_dir, srv_dir, doc_dir):
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+    manifest_path = os.path.join(doc_dir, MANIFEST_FILENAME)
+    state = {"generated_msgs": {}, "manifest": []}
+
+    def catalog():
+        get_proto_catalog(proto_dir)
+
+    def extract():
+        files = parse_sdvsidl_file(inputs["sdvsidl"])
+        state["interfaces"] = extract_topics_from_sdvsidl_file_list(files, proto_dir, jobs=jobs)
+
+    def dedupe():
+        state["interfaces"] = deduplicate_ros_filenames_by_topic_hint2(state["interfaces"])
+
+    def plan():
+        state["plan"] = MsgPlan(proto_dir, msg_dir, state["generated_msgs"], state["manifest"])
+        for base_type, topic_hint, ros_filename, event_name in state["interfaces"]:
+            state["plan"].add_type(base_type, (topic_hint or "").split('.')[0], ros_filename, event_name, top_level=True)
+
+    def emit():
+        state["tree"] = OutputTree([msg_dir, srv_dir])
+        state["plan"].emit(state["tree"])
+
+    def sanitize():
+        state["table"] = ManifestTable.from_records(state["manifest"])
+        sanitize_ros_interfaces(msg_dir, srv_dir, None, state["tree"], state["table"].prefixed_stems())
+
+    def prefix():
+        state["table"].prefix_duplicates(msg_dir, state["tree"])
+        state["table"].remap_to_ros_convention()
+
+    def commit():
+        state["tree"].commit(jobs)
+        state["table"].write(manifest_path, os.path.join(doc_dir, MANIFEST_CSV_FILENAME))
+
+    return state, [("catalog", catalog), ("extract", extract), ("dedupe", dedupe), ("plan", plan),
+                   ("emit", emit), ("sanitize", sanitize), ("prefix", prefix), ("commit", commit)]
+
+
+def _run_stages(inputs: Dict[str, str], output: str, jobs: int, counted: bool) -> Dict[str, dict]:
+    _reset_state()
+    state, stages = _pipeline(inputs, output, jobs)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, stage in stages:
+            counters = _Counters()
+            start = time.perf_counter()
+            if counted:
+                with counters.installed():
+                    stage()
+            else:
+                stage()
+            results[name] = {
+                "wall_s": round(time.perf_counter() - start, 6),
+                "file_reads": counters.file_reads,
+                "regex_calls": counters.regex_calls,
+                "peak_rss_kb": _peak_rss_kb(),
+            }
+    results["_interfaces"] = len(state["interfaces"])
+    return results
+
+
+def _time_lookups(proto_dir: str) -> dict:
+    """find_proto_file_msg2 over every message name of the catalog, memo cleared first."""
+    catalog = get_proto_catalog(proto_dir)
+    catalog.file_resolutions.clear()
+    queries = [(name, compute_topic_hint2(f"{d.package}.{name}"), d.pubsub)
+               for name, definitions in catalog.messages.items() for d in definitions[:1]]
+    start = time.perf_counter()
+    for name, hint, top_level in queries:
+        find_proto_file_msg2(catalog, name, hint, top_level)
+    wall = time.perf_counter() - start
+    return {"calls": len(queries), "wall_s": round(wall, 6),
+            "per_call_us": round(wall / len(queries) * 1e6, 3) if queries else 0.0}
+
+
+def run_benchmark(sizes: List[int], depth: int = 2, enum_density: float = 0.3, collision_rate: float = 0.1,
+                  pubsub: bool = True, jobs: int = 1, seed: int = 0, keep: str = None) -> dict:
+    config = {"sizes": sizes, "depth": depth, "enum_density": enum_density, "collision_rate": collision_rate,
+              "pubsub": pubsub, "jobs": jobs, "seed": seed}
+    report = {"config": config, "runs": []}
+    for size in sizes:
+        root = os.path.join(keep, f"synthetic_{size}") if keep else tempfile.mkdtemp(prefix="ros_interface_bench_")
+        try:
+            inputs = make_synthetic_inputs(root, size, depth, enum_density, collision_rate, pubsub, seed)
+            timed = _run_stages(inputs, os.path.join(root, "out"), jobs, counted=False)
+            counted = _run_stages(inputs, os.path.join(root, "out"), jobs, counted=True)
+            interfaces = timed.pop("_interfaces")
+            counted.pop("_interfaces")
+            stages = {
+                name: {**timing, "file_reads": counted[name]["file_reads"], "regex_calls": counted[name]["regex_calls"]}
+                for name, timing in timed.items()
+            }
+            report["runs"].append({
+                "messages": size,
+                "proto_files": get_proto_catalog(inputs["proto_dir"]).file_count,
+                "interfaces": interfaces,
+                "wall_s": round(sum(stage["wall_s"] for stage in stages.values()), 6),
+                "stages": stages,
+                "lookup": _time_lookups(inputs["proto_dir"]),
+            })
+        finally:
+            if not keep:
+                shutil.rmtree(root, ignore_errors=True)
+    return report
+
+
+# ---------------------------------------------------------------- naming functions
+
+NAME_WORDS = ["Hmi", "ISA", "Lane", "Vehicle", "Ego", "Aeb", "Status", "Info", "Ctrl", "Target", "Object",
+              "World", "Speed", "Limit", "Signal", "ADAS", "Brake", "Steering", "Map", "Route"]
+NAME_SUFFIXES = ["", "", "", "V2", "XX", "_t", "Request", "Response", "DT", "Array"]
+
+
+def naming_corpus(proto_dir: str = None, size: int = 5000, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    Inputs of the naming functions: interface names, file hints (snake_case) and camel case names.
+    From the message and .proto file names of `proto_dir`, otherwise generated from NAME_WORDS.
+    """
+    rng = random.Random(seed)
+    if proto_dir:
+        catalog = get_proto_catalog(proto_dir)
+        names = sorted(catalog.messages)
+        hints = sorted({d.file[:-len(".proto")] for definitions in catalog.messages.values() for d in definitions})
+    else:
+        names = sorted({"".join(rng.sample(NAME_WORDS, rng.randint(1, 4))) + rng.choice(NAME_SUFFIXES)
+                        for _ in range(size)})
+        hints = sorted({"sdv_" + "_".join(w.lower() for w in rng.sample(NAME_WORDS, 3)) + "_topics"
+                        for _ in range(size // 10)})
+    # Names come back many times over a run (one per field, manifest row, conflict check)
+    calls = [rng.choice(names) for _ in range(size * 4)]
+    return {"names": names, "hints": hints, "calls": calls}
+
+
+def _time_naming(corpus: Dict[str, List[str]]) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        utils.remap_names(corpus["names"])
+        for name in corpus["calls"]:
+            utils.remap_filename_to_ros_convention(name)
+            utils.remap_fqin_to_ros_convention(name)
+            utils.to_snake_case(name)
+        for hint in corpus["hints"]:
+            utils.hint_to_acronym(hint)
+            utils.pascal_case(hint)
+    return time.perf_counter() - start
+
+
+def run_naming_benchmark(proto_dir: str = None, size: int = 5000, seed: int = 0) -> dict:
+    """Time the naming functions without LRU caches, with cold caches and with warm caches."""
+    corpus = naming_corpus(proto_dir, size, seed)
+    cached = {name: getattr(utils, name) for name in
+              ("_remap_filename", "_remap_fqin", "to_snake_case", "pascal_case", "hint_to_acronym")}
+    try:
+        for name, fn in cached.items():
+            setattr(utils, name, fn.__wrapped__)
+        uncached = _time_naming(corpus)
+    finally:
+        for name, fn in cached.items():
+            setattr(utils, name, fn)
+
+    utils.clear_naming_caches()
+    cold = _time_naming(corpus)
+    warm = _time_naming(corpus)
+    calls = len(corpus["names"]) + 3 * len(corpus["calls"]) + 2 * len(corpus["hints"])
+    return {
+        "corpus": {"names": len(corpus["names"]), "hints": len(corpus["hints"]), "calls": calls,
+                   "source": proto_dir or "generated"},
+        "uncached_s": round(uncached, 6),
+        "cold_cache_s": round(cold, 6),
+        "warm_cache_s": round(warm, 6),
+        "speedup_cold": round(uncached / cold, 2) if cold else None,
+        "speedup_warm": round(uncached / warm, 2) if warm else None,
+        "cache_info": {name: info._asdict() for name, info in utils.naming_cache_info().items()},
+    }
+
+
+# ---------------------------------------------------------------- record representations
+
+def _copy(text):
+    """A distinct copy of a string, as slicing the source text produced before interning."""
+    return (text + " ")[:-1] if isinstance(text, str) and text else text
+
+
+def _record_sources(proto_dir: str) -> Dict[str, list]:
+    """Raw values of the records of a catalog: every field and enum value, one interface and manifest row per message."""
+    catalog = get_proto_catalog(proto_dir)
+    sources = {"fields": [], "enum_values": [], "interfaces": [], "manifest": []}
+    for name, definitions in catalog.messages.items():
+        for d in definitions:
+            hint = Path(d.file).stem
+            sources["interfaces"].append((name, hint, name, None))
+            sources["manifest"].append((f"{name}.msg", name, "", hint))
+            for f in d.node.iter_fields(nested=False):
+                sources["fields"].append((f.name, f.type_name, f.number, f.label, f.options, f.oneof, f.key_type, f.offset))
+    for definitions in catalog.enums.values():
+        for d in definitions:
+            sources["enum_values"].extend((v.name, v.number, v.options) for v in d.node.values)
+    return {kind: [tuple(_copy(value) for value in row) for row in rows] for kind, rows in sources.items()}
+
+
+# kind -> (legacy dict/tuple builder, compact builder), each taking one source row
+RECORD_BUILDERS = {
+    "fields": (
+        lambda r: {"name": _copy(r[0]), "type_name": _copy(r[1]), "number": r[2], "label": _copy(r[3]),
+                   "options": dict(r[4]), "oneof": _copy(r[5]), "key_type": _copy(r[6]), "offset": r[7]},
+        lambda r: FieldNode(sys.intern(r[0]), sys.intern(r[1]), r[2], sys.intern(r[3]), dict(r[4]),
+                            sys.intern(r[5]), sys.intern(r[6]), r[7])),
+    "enum_values": (
+        lambda r: {"name": _copy(r[0]), "number": r[1], "options": dict(r[2])},
+        lambda r: EnumValueNode(sys.intern(r[0]), r[1], dict(r[2]))),
+    "interfaces": (
+        lambda r: tuple(_copy(value) for value in r),
+        lambda r: Interface.make(*r)),
+    "manifest": (
+        lambda r: {"ros_filename": _copy(r[0]), "topic_name": _copy(r[1]), "event_name": _copy(r[2]), "proto_file": _copy(r[3])},
+        lambda r: ManifestRecord.make(*r)),
+}
+
+
+def _measure_records(rows: list, build) -> dict:
+    # timed without tracemalloc, which slows allocations down
+    start = time.perf_counter()
+    records = [build(row) for row in rows]
+    wall = time.perf_counter() - start
+    del records
+    tracemalloc.start()
+    records = [build(row) for row in rows]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return {"kb": round(allocated / 1024, 1), "wall_s": round(wall, 6)}
+
+
+def run_records_benchmark(proto_dir: str = None, messages: int = 1000, seed: int = 0) -> dict:
+    """Memory and build time of the compact record types against the dicts/tuples they replaced."""
+    report = {"source": proto_dir or f"synthetic ({messages} messages)", "records": {}}
+    with tempfile.TemporaryDirectory(prefix="ros_gen_bench_") as tmp:
+        if proto_dir is None:
+            proto_dir = make_synthetic_inputs(tmp, messages, seed=seed)["proto_dir"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            sources = _record_sources(proto_dir)
+        _reset_state()
+
+    for kind, (legacy, compact) in RECORD_BUILDERS.items():
+        rows = sources[kind]
+        before, after = _measure_records(rows, legacy), _measure_records(rows, compact)
+        report["records"][kind] = {
+            "count": len(rows), "legacy": before, "compact": after,
+            "memory_ratio": round(after["kb"] / before["kb"], 3) if before["kb"] else None,
+        }
+    return report
+
+
+# ---------------------------------------------------------------- startup
+
+def _startup_commands(package: str, inputs: Dict[str, str], template: str, cache_dir: str) -> Dict[str, List[str]]:
+    check = ["-m", f"{package}.main", "--check", "--proto_dir", inputs["proto_dir"], "--sdvsidl", inputs["sdvsidl"],
+             "--template", template, "--no_filter_projects", "--cache_dir", cache_dir]
+    return {
+        "python": ["-c", "pass"],
+        "help": ["-m", f"{package}.main", "--help"],
+        "check": check,
+        "import_session": ["-c", f"import {package}.session"],
+    }
+
+
+def _time_command(argv: List[str], env: Dict[str, str], repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return {"median_s": round(statistics.median(times), 4), "min_s": round(min(times), 4)}
+
+
+def _imported_modules(argv: List[str], env: Dict[str, str], package: str) -> List[str]:
+    """Package modules imported by a command, from its -X importtime report."""
+    done = subprocess.run([sys.executable, "-X", "importtime"] + argv, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    names = {line.rsplit("|", 1)[-1].strip() for line in done.stderr.splitlines() if line.startswith("import time:")}
+    return sorted(name[len(package) + 1:] for name in names if name.startswith(package + "."))
+
+
+def run_startup_benchmark(messages: int = 100, repeat: int = 5, seed: int = 0) -> dict:
+    """Wall time of fresh interpreters on the CLI entry points, and the modules loaded by --check."""
+    package_dir = Path(__file__).resolve().parent
+    package = package_dir.name
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(package_dir.parent), os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory(prefix="ros_gen_bench_") as tmp:
+        inputs = make_synthetic_inputs(tmp, messages, seed=seed)
+        template = os.path.join(tmp, "template")
+        os.makedirs(template)
+        commands = _startup_commands(package, inputs, template, os.path.join(tmp, "cache"))
+        subprocess.run([sys.executable] + commands["check"], env=env, stdout=subprocess.DEVNULL)    # warm the cache
+        return {
+            "config": {"messages": messages, "repeat": repeat, "python": sys.version.split()[0]},
+            "startup": {name: _time_command(argv, env, repeat) for name, argv in commands.items()},
+            "check_modules": _imported_modules(commands["check"], env, package),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the generator on synthetic catalogs")
+    parser.add_argument("--messages", default="100,1000", help="Comma-separated numbers of top-level topics (default 100,1000)")
+    parser.add_argument("--depth", type=int, default=2, help="Nested message types per topic (default 2)")
+    parser.add_argument("--enum_density", "--enum-density", type=float, default=0.3, help="Share of topics with an enum field")
+    parser.add_argument("--collision_rate", "--collision-rate", type=float, default=0.1,
+                        help="Share of topics reusing the name of another package's topic")
+    parser.add_argument("--no_pubsub", "--no-pubsub", action="store_false", dest="pubsub",
+                        help="Put topics next to the types instead of in pubsub/ folders")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Workers for extraction and the file writes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", default=None, help="Keep the synthetic inputs and outputs in this folder")
+    parser.add_argument("--output", default=None, help="JSON report path (default: stdout)")
+    parser.add_argument("--naming", action="store_true", help="Micro-benchmark of the naming functions instead of the pipeline")
+    parser.add_argument("--records", action="store_true",
+                        help="Memory and build time of the record types against plain dicts/tuples instead of the pipeline")
+    parser.add_argument("--startup", action="store_true",
+                        help="Startup time of the command line (fresh interpreters) instead of the pipeline")
+    parser.add_argument("--repeat", type=int, default=5, help="With --startup: runs per command (default 5)")
+    parser.add_argument("--proto_dir", default=None, help="With --naming or --records: use this catalog instead of a generated one")
+    args = parser.parse_args()
+
+    if args.naming:
+        report = run_naming_benchmark(args.proto_dir, seed=args.seed)
+    elif args.records:
+        report = run_records_benchmark(args.proto_dir, int(args.messages.split(",")[-1]), args.seed)
+    elif args.startup:
+        report = run_startup_benchmark(int(args.messages.split(",")[-1]), args.repeat, args.seed)
+    else:
+        sizes = [int(size) for size in args.messages.split(",") if size]
+        report = run_benchmark(sizes, args.depth, args.enum_density, args.collision_rate, args.pubsub,
+                               args.jobs, args.seed, args.keep)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"Benchmark report written to {args.output}")
+    else:
+        print(text)
@@ -0,0 +1,111 @@
+# ros_interface_generator/check.py
+"""
+Input check of a generation (--check / --dry-run).
+
+Only the sdvsidl reader and the proto catalog are loaded, not the renderers,
+the sanitizer or the manifest post-processing. The input paths are
+validated, every topic is resolved against the catalog and every rpc
+against its service, and the top-level .msg/.srv files a run would write
+are printed with their ROS names. Nothing is written.
+
+Message types used by fields, and the prefixes added to duplicate names,
+are only known after rendering and are not listed (--plan_json runs the
+whole generation in memory and reports them).
+"""
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .sources import is_archive_path, split_archive_path
+from .utils import parse_sdvsidl_file, load_projects_filter, compute_topic_hint, remap_filename_to_ros_convention
+from .extractor_sdvsidl import extract_interfaces_from_sdvsidl, deduplicate_ros_filenames_by_topic_hint2
+from .proto_parser import get_proto_catalog
+from .parse_cache import ParseCache
+
+
+def _exists(path: str) -> bool:
+    return os.path.exists(split_archive_path(path)[0] if is_archive_path(path) else path)
+
+
+def check_inputs(proto_dir: str, template_path: str, sdvsidl_inputs: List[str], filter_projects: bool = True,
+                 cache_dir: Optional[str] = None) -> Tuple[List[str], List[str], List[Tuple[str, str]]]:
+    """
+    Validate the inputs of a generation.
+
+    Returns (errors, warnings, planned) where `planned` lists the
+    (group, file name) of the top-level outputs, group being "msg" or "srv".
+    """
+    errors, warnings, planned = [], [], []
+    srvs = set()
+    if not _exists(proto_dir):
+        errors.append(f"proto folder not found: {proto_dir}")
+    if not os.path.isfile(os.path.join(template_path, "Header.msg")):
+        warnings.append(f"Warning: no Header.msg in {template_path} → not copied")
+    missing = [path for path in sdvsidl_inputs if not _exists(path)]
+    errors.extend(f"sdvsidl input not found: {path}" for path in missing)
+    if errors:
+        return errors, warnings, planned
+
+    sdvsidl_files = []
+    for sdvsidl_input in sdvsidl_inputs:
+        sdvsidl_files.extend(parse_sdvsidl_file(sdvsidl_input))
+    if filter_projects:
+        projects_file = os.path.join(template_path, "project_fut.txt")
+        projects = set(load_projects_filter(projects_file)) if os.path.exists(projects_file) else set()
+        sdvsidl_files = [f for f in sdvsidl_files if Path(f).stem in projects]
+    sdvsidl_files = sorted(set(sdvsidl_files))
+    if not sdvsidl_files:
+        warnings.append("Warning: no sdvsidl file selected (check project_fut.txt or use --no_filter_projects)")
+        return errors, warnings, planned
+
+    catalog = get_proto_catalog(proto_dir, ParseCache(cache_dir) if cache_dir else None)
+    print(f"🔎 Checking {len(sdvsidl_files)} sdvsidl files against {catalog.file_count} .proto files")
+
+    interfaces = []
+    for sdvsidl_file in sdvsidl_files:
+        name = Path(sdvsidl_file).name
+        try:
+            topics, methods = extract_interfaces_from_sdvsidl(sdvsidl_file, proto_dir)
+        except (OSError, UnicodeDecodeError) as e:
+            errors.append(f"{name}: cannot be read ({e})")
+            continue
+        if not topics and not methods:
+            warnings.append(f"Warning: {name}: no topic and no rpc method")
+        for interface in topics:
+            if interface.topic_hint is None:
+                errors.append(f"{name}: message {interface.proto_message_name} not found in the proto catalog")
+            else:
+                interfaces.append(interface)
+        for service_full, method_name in methods:
+            service_name = service_full.split('.')[-1]
+            if catalog.find_service_rpc(service_name, method_name, compute_topic_hint(service_full)) is None:
+                warnings.append(f"Warning: {name}: service {method_name} could not be resolved ({service_full})")
+            else:
+                srvs.add(f"{remap_filename_to_ros_convention(method_name)[1]}.srv")
+
+    seen = set()
+    for interface in deduplicate_ros_filenames_by_topic_hint2(interfaces):
+        if interface.ros_filename not in seen:
+            seen.add(interface.ros_filename)
+            planned.append(("msg", f"{remap_filename_to_ros_convention(interface.ros_filename)[1]}.msg"))
+    planned.extend(("srv", srv) for srv in srvs)
+    planned.sort()
+    return errors, warnings, planned
+
+
+def run_check(args) -> int:
+    """Print the check of the command line inputs. Returns the exit code (1 on errors)."""
+    errors, warnings, planned = check_inputs(args.proto_dir, args.template, args.sdvsidl,
+                                             args.filter_projects, args.cache_dir)
+    outputs = {"msg": args.msg_output or "msg", "srv": args.srv_output or "srv"}
+    print("Planned outputs:")
+    for group, file_name in planned:
+        print(f"  {os.path.join(outputs[group], file_name)}")
+    for warning in warnings:
+        print(warning)
+    for error in errors:
+        print(f"❌ {error}")
+    msgs = sum(1 for group, _ in planned if group == "msg")
+    print(f"{'❌ Check failed' if errors else '✔ Check passed'}: {msgs} .msg and {len(planned) - msgs} .srv planned, "
+          f"{len(errors)} errors, {len(warnings)} warnings (field message types and duplicate prefixes not listed)")
+    return 1 if errors else 0
@@ -0,0 +1,13 @@
+# ros_interface_generator/constants.py
+"""
+File names and option choices shared by the command line and the modules behind it.
+
+main.py builds its parser from these names only, so --help and argument
+errors do not import batch, incremental, profiler or layouts.
+"""
+
+MANIFEST_DIFF_FILENAME = "baseline_manifest_diff.json"     # batch: diffs of consecutive baselines
+DEPS_FILENAME = "ros_interface_deps.json"                   # incremental: dependency graph of the outputs
+LAYOUT_REPORT_FILENAME = "layout_duplicates.json"           # layouts: --dedupe_layouts report
+DEDUPE_MODES = ("report", "merge")
+DUMP_FORMATS = ("summary", "cprofile", "speedscope", "all")  # profiler: --profile dumps
@@ -0,0 +1,134 @@
+# ros_interface_generator/diagnostics.py
+"""
+Diagnostics of a generation run.
+
+Warnings are collected in memory as structured records and written once
+to the legacy text file (one message per record, in report order),
+through the run's OutputTree; a run that stops on an error writes it
+directly when its collector is closed. With a JSONL path, every record is
+also streamed as one JSON object per line as soon as it is reported.
+
+The generators report to a DiagnosticsScope: each generation run of a
+GeneratorSession installs its own collectors there for its thread, so
+concurrent runs never mix their warnings.
+"""
+import contextlib
+import json
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+if TYPE_CHECKING:      # annotations only
+    from .output_tree import OutputTree
+
+SEVERITIES = ("info", "warning", "error")
+
+
+@dataclass
+class Diagnostic:
+    severity: str                   # "info" | "warning" | "error"
+    code: str                       # stable identifier, e.g. "message-not-found"
+    message: str                    # line of the text file
+    file: Optional[str] = None      # generated interface concerned, e.g. "Foo.msg"
+    source: Optional[str] = None    # proto location "<relative path>:<line>"
+
+
+class DiagnosticsCollector:
+    """
+    Buffer of Diagnostic records, flushed to `text_path` and streamed to `jsonl_path`.
+    With write=False the records are only kept in memory (planning runs).
+    """
+
+    def __init__(self, text_path: Optional[str] = None, jsonl_path: Optional[str] = None, write: bool = True):
+        self.write = write
+        self.records: List[Diagnostic] = []
+        self.messages: List[str] = []       # the text lines, in report order
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self._jsonl = None
+        self._flushed = 0
+
+    def report(self, severity: str, code: str, message: str,
+               file: Optional[str] = None, source: Optional[str] = None) -> Diagnostic:
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown severity: {severity}")
+        record = Diagnostic(severity, code, message, file, source)
+        self.records.append(record)
+        self.messages.append(message)
+        if self.jsonl_path:
+            if self._jsonl is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+                self._jsonl = open(self.jsonl_path, "w", encoding="utf-8")
+            self._jsonl.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+        return record
+
+    def count(self, severity: str) -> int:
+        return sum(1 for record in self.records if record.severity == severity)
+
+    def flush(self, tree: Optional["OutputTree"] = None, path: Optional[str] = None) -> bool:
+        """
+        Write the text file (`path`, by default text_path) if records were reported since
+        the last flush: into `tree` when given, else to disk. Returns True if written.
+        """
+        if self._jsonl is not None:
+            self._jsonl.flush()
+        path = path or self.text_path
+        if not self.write or not path or not self.messages or self._flushed == len(self.messages):
+            return False
+        if tree is not None:
+            tree.write(path, "\n".join(self.messages))
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as logf:
+                logf.write("\n".join(self.messages))
+        self._flushed = len(self.messages)
+        return True
+
+    def reset(self, text_path: Optional[str] = None, jsonl_path: Optional[str] = None) -> None:
+        """Close the current outputs and start an empty collection (e.g. for the next baseline)."""
+        self.close()
+        self.records.clear()
+        self.messages.clear()
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self._flushed = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+class DiagnosticsScope:
+    """
+    Stand-in for the DiagnosticsCollector of the running generation.
+
+    `use` installs a collector for the current thread (context) until the block
+    exits; outside of it a process-wide default collector is used. Attribute
+    reads and writes go to the current collector.
+    """
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_default", DiagnosticsCollector())
+        object.__setattr__(self, "_current", ContextVar(f"diagnostics_{name}", default=None))
+
+    def current(self) -> DiagnosticsCollector:
+        collector = self._current.get()
+        return self._default if collector is None else collector
+
+    @contextlib.contextmanager
+    def use(self, collector: DiagnosticsCollector) -> Iterator[DiagnosticsCollector]:
+        token = self._current.set(collector)
+        try:
+            yield collector
+        finally:
+            self._current.reset(token)
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.current(), name, value)
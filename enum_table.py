@@ -0,0 +1,158 @@
+# ros_interface_generator/enum_table.py
+"""
+Enum lookup table of a proto catalog.
+
+Built once per catalog from the parsed EnumNodes: for every enum name, the
+blocks find_enum_blocks would return, with their values, ROS integer type
+and the rendered `# Add Enum` constants. Deciding whether a field type is an
+enum and emitting its constants are then dictionary lookups.
+
+Values are read as the generators have always read them, from the leading
+decimal digits of the number as written: 0x10 reads 0 and 017 reads 17.
+"""
+import copy
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .utils import determine_ros_type_from_values, shorten_name_simple
+from .proto_parser import ProtoCatalog, get_proto_catalog
+from .proto_ast import EnumValueNode
+from .incremental import input_digest
+
+ENUM_ENTRY_RE = re.compile(r'^\s*([A-Z0-9_]+)\s*=\s*(-?\d+)', re.MULTILINE)
+CONSTANT_NAME_RE = re.compile(r'[A-Z0-9_]+')
+WRITTEN_NUMBER_RE = re.compile(r'[-+]?\d+')
+DEFAULT_MAX_LINE_LENGTH = 63
+
+
+class EnumInfo(NamedTuple):
+    """An enum block with everything the generators derive from it."""
+    name: str
+    path: str
+    rel_path: str               # .proto file relative to proto_dir, '/'-separated
+    block: str
+    digest: str                 # input_digest(block)
+    values: Tuple[int, ...]     # number of every value of the block
+    ros_type: Optional[str]     # determine_ros_type_from_values(values), None without values
+    constants: Tuple[Tuple[str, int], ...]      # (name, number) of the upper-case values, rendered
+    location: str = ""          # "<rel_path>:<line>" of the block
+
+
+def render_enum_block(enum_name: str, block: str, max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Tuple[str, Optional[str]]:
+    """
+    Render the constants of an enum block.
+
+    Returns (text, warning): `warning` is the message to log when the block
+    is empty or a constant exceeds `max_line_length`, otherwise None.
+    """
+    return render_enum_constants(enum_name, [(name, int(value)) for name, value in ENUM_ENTRY_RE.findall(block)],
+                                 max_line_length)
+
+
+def render_enum_constants(enum_name: str, entries, max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Tuple[str, Optional[str]]:
+    """render_enum_block of the (name, number) `entries` of an enum."""
+    if not entries:
+        warning = f"Warning: empty enum: {enum_name}"
+        return warning, warning
+
+    field_type = determine_ros_type_from_values([value for _, value in entries])
+    lines = [f"# Add Enum {enum_name}"]
+
+    for name, value in entries:
+        if '__' in name:
+            name = name.replace('__', '_')
+
+        short_name = shorten_name_simple(name, max_length=max_line_length)
+        line = f"{field_type} C_{short_name} = {value}"
+        if len(short_name) > max_line_length:
+            error = f"Error: generated line exceeds max length for enum : {enum_name}:\n {line}"
+            return error, error
+
+        lines.append(line)
+
+    return "\n".join(lines), None
+
+
+def written_number(value: EnumValueNode) -> int:
+    """Number of an enum value read from its leading decimal digits, as the block regexes did."""
+    return int(WRITTEN_NUMBER_RE.match(value.literal).group())
+
+
+class EnumTable:
+    """Enums of a catalog by name, with memoized renderings per max line length."""
+
+    def __init__(self, proto_dir):
+        catalog = self.catalog = get_proto_catalog(proto_dir)
+        self.by_name: Dict[str, Tuple[EnumInfo, ...]] = {}
+        self._rendered: Dict[Tuple[str, str, int], Tuple[str, Optional[str]]] = {}
+
+        for name, definitions in catalog.enums.items():
+            self.by_name[name] = self._infos(definitions)
+
+    def _infos(self, definitions) -> Tuple[EnumInfo, ...]:
+        # Same selection as find_enum_blocks: the blocks of the first file defining the name
+        path = definitions[0].path
+        rel_path = sys.intern(Path(os.path.relpath(path, self.catalog.proto_dir)).as_posix())
+        infos = []
+        for d in definitions:
+            if d.path != path:
+                continue
+            values = tuple(written_number(value) for value in d.node.values)
+            infos.append(EnumInfo(
+                name=d.name,
+                path=path,
+                rel_path=rel_path,
+                block=d.block,
+                digest=input_digest(d.block),
+                values=values,
+                ros_type=determine_ros_type_from_values(values) if values else None,
+                constants=tuple((value.name, written_number(value)) for value in d.node.values
+                                if CONSTANT_NAME_RE.fullmatch(value.name)),
+                location=d.location(),
+            ))
+            self.render(infos[-1])
+        return tuple(infos)
+
+    def refreshed(self, catalog: ProtoCatalog) -> "EnumTable":
+        """
+        Table of `catalog`, refreshed from this table's catalog (ProtoCatalog.refreshed):
+        only the enums defined by the files read again are built again.
+        """
+        table = copy.copy(self)
+        table.catalog = catalog
+        table.by_name = dict(self.by_name)
+        table._rendered = dict(self._rendered)
+        for name in catalog.refreshed_keys.get("enums", ()):
+            definitions = catalog.enums.get(name)
+            if definitions:
+                table.by_name[name] = table._infos(definitions)
+            else:
+                table.by_name.pop(name, None)
+        return table
+
+    def lookup(self, base_type: str) -> Tuple[EnumInfo, ...]:
+        """Enum blocks named `base_type`; empty when the type is not an enum."""
+        return self.by_name.get(base_type, ())
+
+    def render(self, info: EnumInfo, max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Tuple[str, Optional[str]]:
+        """render_enum_block of `info`, computed once per max line length."""
+        key = (info.name, info.block, max_line_length)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self._rendered[key] = render_enum_constants(info.name, info.constants, max_line_length)
+        return rendered
+
+
+# One table per proto_dir, built on first use and again when its catalog is rebuilt
+ENUM_TABLES: Dict[str, EnumTable] = {}
+
+
+def get_enum_table(proto_dir) -> EnumTable:
+    catalog = get_proto_catalog(proto_dir)
+    table = ENUM_TABLES.get(catalog.proto_dir)
+    if table is None or table.catalog is not catalog:
+        table = ENUM_TABLES[catalog.proto_dir] = EnumTable(catalog)
+    return table
@@ -1,124 +1,139 @@
 # ros_interface_generator/extractor_sdvsidl.py
 import re
+import sys
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Tuple, NamedTuple
 from collections import defaultdict
 from .utils import pascal_case, compute_topic_hint, compute_topic_hint2, hint_to_acronym
-from .proto_parser import find_proto_file_msg2
+from .proto_parser import find_proto_file_msg2, get_proto_catalog, PROTO_CATALOGS
+from .parse_cache import ParseCache
+from .sdvsidl_parser import read_sdvsidl_blocks
 
+SDVSIDL_CACHE_BUNDLE = "sdvsidl-interfaces"
+
+
+class Interface(NamedTuple):
+    """An interface to generate, as extracted from a .sdvsidl file (names interned)."""
+    proto_message_name: str     # ex: ApplicationAccSettingRequest
+    topic_hint: str             # .proto file of the message, ex: sdv_adas_hmi_topics
+    ros_filename: str           # ex: ApplicationAccSettingRequestFirstRowLeft
+    event_name: Optional[str]
+
+    @classmethod
+    def make(cls, proto_message_name: str, topic_hint: str, ros_filename: str, event_name: Optional[str]) -> "Interface":
+        intern = sys.intern
+        return cls(intern(proto_message_name), intern(topic_hint) if topic_hint else topic_hint,
+                   intern(ros_filename), intern(event_name) if event_name else event_name)
 
-EVENT_START_RE = re.compile(r'\bevent\b\s*{')
-EVENT_NAME_RE  = re.compile(r'event_name:\s*"([^"]+)"')
-TOPIC_NAME_RE  = re.compile(r'topic_name:\s*"([\w\.]+)(?:::(\w+))?"')
-METHOD_START_RE  = re.compile(r'\bmethod_fire_forget\b\s*{')
-METHOD_NAME_RE  = re.compile(r'method_name:\s*"([^"]+)"')
 
 def extract_rpc_methods_from_sdvsidl(filepath: str) -> List[Tuple[str, str]]:
+    """(rpc_service_name, method_vsidl_name) of every rpc_definition of a .sdvsidl file."""
     results = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    inside_block = False
-    brace_count = 0
-    current_block = []
-
-    for line in lines:
-        if 'rpc_definition' in line and '{' in line:
-            inside_block = True
-            brace_count = line.count('{') - line.count('}')
-            current_block = [line]
-            continue
-
-        if inside_block:
-            current_block.append(line)
-            brace_count += line.count('{') - line.count('}')
-            if brace_count == 0:
-                block_str = ''.join(current_block)
-                service_match = re.search(r'rpc_service_name:\s*"([^"]+)"', block_str)
-                service_name = service_match.group(1) if service_match else None
-                method_matches = re.findall(r'method_vsidl_name:\s*"([^"]+)"', block_str)
-                for method in method_matches:
-                    if service_name:
-                        results.append((service_name, method))
-                inside_block = False
-                current_block = []
+    for block in read_sdvsidl_blocks(filepath):
+        if block.kind == "rpc_definition" and block.name:
+            results.extend((block.name, method) for method in block.methods)
     return results
 
 
-def extract_topics_from_sdvsidl2(filepath: str,proto_dir) -> List[Tuple[str, str, str, Optional[str]]]:
+def extract_topics_from_sdvsidl2(filepath: str,proto_dir) -> List[Interface]:
     """
     Extract the interfaces to generate from a .sdvsidl file.
 
+    Topics of an event block carry its event_name; those of method_fire_forget
+    blocks, or outside any block, have none.
+
     Returns:
-        List of (original_message_name, topic_hint, ros_filename, event_name)
+        List of Interface(original_message_name, topic_hint, ros_filename, event_name)
     """
-    interfaces: List[Tuple[str, str, str, Optional[str]]] = []
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    return extract_interfaces_from_sdvsidl(filepath, proto_dir)[0]
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
 
-        # Start of an event block: event { ... }
-        if EVENT_START_RE.search(line):
-            brace = line.count('{') - line.count('}')
-            block_lines = [line]
-            i += 1
-            while i < len(lines) and brace > 0:
-                block_lines.append(lines[i])
-                brace += lines[i].count('{') - lines[i].count('}')
-                i += 1
+def extract_interfaces_from_sdvsidl(filepath: str, proto_dir) -> Tuple[List[Interface], List[Tuple[str, str]]]:
+    """
+    Topics (as extract_topics_from_sdvsidl2) and rpc methods (as
+    extract_rpc_methods_from_sdvsidl) of a .sdvsidl file, read in one pass.
+    """
+    interfaces: List[Interface] = []
+    methods: List[Tuple[str, str]] = []
 
-            block = ''.join(block_lines)
+    for block in read_sdvsidl_blocks(filepath):
+        if block.kind == "rpc_definition":
+            if block.name:
+                methods.extend((block.name, method) for method in block.methods)
+            continue
+        event_name = block.name if block.kind == "event" else None
+        for topic in block.topics:
+            full_topic = topic.topic_name       # ex: sdv.adas.hmi.ApplicationAccSettingRequest
+            suffix     = topic.suffix           # ex: FIRST_ROW_LEFT ou None
 
-            # Extract event_name from the block
-            event_name_match = EVENT_NAME_RE.search(block)
-            event_name = event_name_match.group(1) if event_name_match else None
+            base_type  = topic.base_type
+            topic_hint = find_proto_file_msg2(proto_dir, base_type,compute_topic_hint2(full_topic),True) #compute_topic_hint(full_topic)
+            ros_filename = f"{base_type}{pascal_case(suffix)}" if suffix else base_type
 
-            # Extract all topic_name entries inside this event block
-            for m in TOPIC_NAME_RE.finditer(block):
-                full_topic = m.group(1)        # ex: sdv.adas.hmi.ApplicationAccSettingRequest
-                suffix     = m.group(2)        # ex: FIRST_ROW_LEFT ou None
+            interfaces.append(Interface.make(base_type, topic_hint, ros_filename, event_name))
 
-                base_type  = full_topic.split('.')[-1]
-                topic_hint = find_proto_file_msg2(proto_dir, base_type,compute_topic_hint2(full_topic),True) #compute_topic_hint(full_topic)
-                ros_filename = f"{base_type}{pascal_case(suffix)}" if suffix else base_type
+    return interfaces, methods
 
-                interfaces.append((base_type, topic_hint, ros_filename, event_name))
 
-            # continue the loop without i += 1 (already advanced while reading the block)
-            continue
+def _init_extraction_worker(proto_dir, catalog):
+    """Register the parent's proto catalog in a pool worker (read-only, never rebuilt)."""
+    PROTO_CATALOGS[proto_dir] = catalog
 
-        # (fallback) If a topic_name appears outside an event block (unlikely),
-        # collect it anyway with event_name=None
-        tm = TOPIC_NAME_RE.search(line)
-        if tm:
-            full_topic = tm.group(1)
-            suffix     = tm.group(2)
-            base_type  = full_topic.split('.')[-1]
-            topic_hint = find_proto_file_msg2(proto_dir, base_type,compute_topic_hint2(full_topic),True) #compute_topic_hint(full_topic)
-            ros_filename = f"{base_type}{pascal_case(suffix)}" if suffix else base_type
-            interfaces.append((base_type, topic_hint, ros_filename, None))
 
-        i += 1
+def _extraction_context():
+    import multiprocessing
+    # fork shares the catalog copy-on-write; other platforms receive it pickled once per worker
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
 
-    return interfaces
 
+def extract_topics_from_sdvsidl_file_list(file_list,proto_dir, cache: Optional[ParseCache] = None, jobs: int = 1,
+                                          rpc_methods: Optional[Dict[str, List[Tuple[str, str]]]] = None) -> List[Interface]:
+    """
+    Extract the interfaces of every .sdvsidl file, in order.
+    The rpc methods of each file, read in the same pass, are stored in
+    `rpc_methods` ({filepath: [(service, method)]}) when it is given.
+    With a cache, files unchanged since the last run (against the same proto
+    catalog content) are not parsed again.
+    With jobs > 1 the remaining files are extracted by a process pool; results
+    are still concatenated in file_list order, so the output does not depend
+    on the number of workers.
+    """
+    catalog = get_proto_catalog(proto_dir, cache)
+    catalog_key = catalog.fingerprint if cache else ""
+    results = {}
+    pending = []
+    for filepath in file_list:
+        extracted = cache.get(SDVSIDL_CACHE_BUNDLE, filepath, key=catalog_key) if cache else None
+        if extracted is None:
+            pending.append(filepath)
+        else:
+            results[filepath] = extracted
+
+    if jobs > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor     # loads multiprocessing: only when used
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), mp_context=_extraction_context(),
+                                 initializer=_init_extraction_worker, initargs=(proto_dir, catalog)) as pool:
+            extracted = pool.map(extract_interfaces_from_sdvsidl, pending, [proto_dir] * len(pending))
+            results.update(zip(pending, extracted))
+    else:
+        for filepath in pending:
+            results[filepath] = extract_interfaces_from_sdvsidl(filepath, proto_dir)
 
-def extract_topics_from_sdvsidl_file_list(file_list,proto_dir) -> List[Tuple[str, str, str, Optional[str]]]:
     all_interfaces = []
     for filepath in file_list:
         print(f"Extracting topics from {filepath} \n")
-        
-        interfaces = extract_topics_from_sdvsidl2(filepath,proto_dir)
+        interfaces, methods = results[filepath]
+        if cache and filepath in pending:
+            cache.put(SDVSIDL_CACHE_BUNDLE, filepath, (interfaces, methods), key=catalog_key)
+        if rpc_methods is not None:
+            rpc_methods[filepath] = methods
         all_interfaces.extend(interfaces)
     return all_interfaces
         
 
 def find_versioned_matches(
-    interfaces: List[Tuple[str, str, str, Optional[str]]],
+    interfaces: List[Interface],
     same_topic: bool = True,
 ) -> List[str]:
     """
@@ -162,13 +177,13 @@ def find_versioned_matches(
     return results
 
 
-def deduplicate_ros_filenames_by_topic_hint2(interfaces: List[Tuple[str, str, str, Optional[str]]]) -> List[Tuple[str, str, str, Optional[str]]]:
+def deduplicate_ros_filenames_by_topic_hint2(interfaces: List[Interface]) -> List[Interface]:
     """
     Modify ros_filename by adding the topic_hint when the same proto_message_name
     is used with multiple different topic_hints.
 
     Args:
-        interfaces: List of tuples (proto_message_name, topic_hint, ros_filename)
+        interfaces: List of Interface(proto_message_name, topic_hint, ros_filename, event_name)
 
     Returns:
         Updated list with disambiguated ros_filename values when needed.
@@ -187,7 +202,8 @@ def deduplicate_ros_filenames_by_topic_hint2(interfaces: List[Tuple[str, str, st
     # If a ros_filename is used in multiple contexts (different topic_hints)
     # → prepend the topic_hint acronym to the ros_filename
     updated = []
-    for base_type, topic_hint, ros_filename, event in interfaces:
+    for interface in interfaces:
+        base_type, topic_hint, ros_filename, event = interface
         new_ros_filename = ros_filename
         
         if len(hint_map[ros_filename]) > 1:
@@ -198,6 +214,7 @@ def deduplicate_ros_filenames_by_topic_hint2(interfaces: List[Tuple[str, str, st
         if ros_filename in versioned_conflicts:
             new_ros_filename = f"{ros_filename}XX"
             
-        updated.append((base_type, topic_hint, new_ros_filename, event))
+        updated.append(interface if new_ros_filename == ros_filename else
+                       interface._replace(ros_filename=sys.intern(new_ros_filename)))
         
     return updated
\ No newline at end of file
@@ -0,0 +1,134 @@
+# ros_interface_generator/incremental.py
+"""
+Incremental regeneration support.
+
+In incremental mode a run generates into an empty OutputTree, without
+cleaning the output folders; only the documents whose content differs
+from the file on disk are then committed. Unchanged files keep their bytes
+and mtime (no rebuild downstream) and the outputs of the previous run that
+are no longer produced are deleted; other files of the output folders are
+left alone.
+
+Every interface is still planned on each run, because the file names and
+conflict renames depend on the whole interface set; the session renders
+again only the files whose field lines or enums changed.
+
+The dependency graph of the run is stored next to the manifest in
+`ros_interface_deps.json`:
+
+    {"version": ..., "outputs": {"msg/Foo.msg": {"sha1": ..., "inputs": {input_key: sha1}}}}
+
+An output whose inputs and content hash match the previous record is left
+alone without even being compared on disk.
+
+The parse cache module is imported on first use.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple
+
+from .constants import DEPS_FILENAME
+from .output_tree import OutputTree
+
+
+def input_digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def build_dependency_graph(rows: List[Dict[str, str]], dependency_records: List[Dict[str, str]],
+                           tree: OutputTree, roots: Dict[str, str]) -> Dict[str, dict]:
+    """
+    Map every document of `tree` under one of the `roots` ({group: folder}),
+    as "<group>/<file>", to its content hash and inputs.
+
+    `dependency_records` is aligned with the manifest `rows` (one entry appended
+    per generated message), so the final, post-processed ros_filename of each
+    row tells which file the inputs belong to.
+    """
+    inputs_by_file: Dict[str, Dict[str, str]] = {}
+    for row, inputs in zip(rows, dependency_records):
+        ros = row.get("alias_of") or row.get("ros_filename", "")     # merged layouts: inputs of the canonical file
+        group = "srv" if ros.endswith(".srv") else "msg"
+        inputs_by_file.setdefault(f"{group}/{ros}", {}).update(inputs)
+
+    graph: Dict[str, dict] = {}
+    for group, root in roots.items():
+        root = os.path.normpath(root)
+        for path in sorted(tree.files):
+            if os.path.dirname(path) != root and not path.startswith(root + os.sep):
+                continue
+            key = f"{group}/{os.path.relpath(path, root).replace(os.sep, '/')}"
+            graph[key] = {
+                "sha1": input_digest(tree.files[path]),
+                "inputs": dict(sorted(inputs_by_file.get(key, {}).items())),
+            }
+    return graph
+
+
+def load_dependency_graph(deps_path: str, any_version: bool = False) -> Dict[str, dict]:
+    """
+    Outputs recorded by the previous run, or {} if unknown or (unless
+    `any_version`) from another generator version.
+    """
+    try:
+        with open(deps_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    from .parse_cache import CACHE_VERSION
+    if not any_version and data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("outputs", {})
+
+
+def _same_on_disk(path: str, sha1: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest() == sha1
+    except OSError:
+        return False
+
+
+def commit_outputs(tree: OutputTree, roots: Dict[str, str], graph: Dict[str, dict], deps_path: str,
+                   jobs: int = 1) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Commit the documents of `tree` to disk, except the outputs of `graph` whose
+    file already has the same content, and record `graph` in `deps_path`. Only
+    the files recorded as outputs in the previous `deps_path` are deleted when
+    no longer produced.
+
+    Returns (written, unchanged, deleted) lists of "<group>/<file>" keys.
+    """
+    previous = load_dependency_graph(deps_path)
+    recorded = load_dependency_graph(deps_path, any_version=True)
+    written, unchanged, deleted = [], [], []
+
+    for key, record in graph.items():
+        group, name = key.split("/", 1)
+        path = os.path.join(roots[group], name)
+        # same inputs and content as recorded: not even compared
+        if (previous.get(key) == record and os.path.isfile(path)) or _same_on_disk(path, record["sha1"]):
+            tree.keep(path)
+            unchanged.append(key)
+        else:
+            written.append(key)
+
+    from .parse_cache import CACHE_VERSION
+    deps_text = json.dumps({"version": CACHE_VERSION, "outputs": graph}, indent=2, ensure_ascii=False)
+    tree.write(deps_path, deps_text)
+    if _same_on_disk(deps_path, input_digest(deps_text)):
+        tree.keep(deps_path)
+    tree.commit(jobs)
+
+    # Remove the previous outputs this run no longer produces
+    for key in sorted(recorded.keys() - graph.keys()):
+        group, name = key.split("/", 1)
+        if group not in roots:
+            continue
+        path = os.path.join(roots[group], name)
+        if os.path.isfile(path):
+            os.remove(path)
+            deleted.append(key)
+
+    return written, unchanged, deleted
@@ -0,0 +1,125 @@
+# ros_interface_generator/layouts.py
+"""
+Structurally identical messages (--dedupe_layouts).
+
+Many topics end up as messages of different names with the same fields.
+Every rendered .msg of the output tree is reduced to its canonical layout
+(field lines without comments or blank lines, whitespace normalized) and
+hashed; the files sharing a hash form a group whose canonical file is the
+shortest name (then the first alphabetically).
+
+- "report": the files are kept, the groups are only reported.
+- "merge": the other files of a group are not written and the fields using
+  them are retyped to the canonical file. Retyping can make more files
+  identical, so the grouping is repeated until nothing merges.
+
+In both modes each manifest row gets an `alias_of` column (the canonical
+file, or "" when the row's file is unique) and the groups are written to
+`<doc_output>/layout_duplicates.json`.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .constants import LAYOUT_REPORT_FILENAME, DEDUPE_MODES
+
+if TYPE_CHECKING:      # annotations only
+    from .output_tree import OutputTree
+
+ARRAY_SUFFIX_RE = re.compile(r'\[.*\]$')
+
+
+def canonical_layout(text: str) -> str:
+    """The field lines of a .msg, without comments and blank lines, whitespace normalized."""
+    lines = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            lines.append(" ".join(line.split()))
+    return "\n".join(lines)
+
+
+def layout_digest(text: str) -> str:
+    return hashlib.sha1(canonical_layout(text).encode("utf-8")).hexdigest()
+
+
+def _group_layouts(tree: "OutputTree", msg_dir: str) -> List[List[str]]:
+    """Stems of the .msg files sharing a layout, canonical first, for every layout used more than once."""
+    by_digest: Dict[str, List[str]] = defaultdict(list)
+    for path in tree.glob(msg_dir, "*.msg"):
+        by_digest[layout_digest(tree.read(path))].append(path.stem)
+    return [sorted(stems, key=lambda stem: (len(stem), stem)) for stems in by_digest.values() if len(stems) > 1]
+
+
+def _retype(text: str, aliases: Dict[str, str]) -> str:
+    """`text` with the field types found in `aliases` replaced by their canonical name."""
+    lines = text.splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        tokens = line.split(None, 1)
+        if len(tokens) < 2 or tokens[0].startswith("#"):
+            continue
+        base_type = ARRAY_SUFFIX_RE.sub('', tokens[0])
+        canonical = aliases.get(base_type)
+        if canonical is not None:
+            lines[i] = line.replace(base_type, canonical, 1)
+    return "".join(lines)
+
+
+def dedupe_layouts(tree: "OutputTree", msg_dir: str, srv_dir: str, merge: bool = False) -> Dict[str, str]:
+    """
+    Group the .msg files of `tree` by layout. Returns {alias stem: canonical stem};
+    with merge, the aliases are removed from the tree and their users retyped.
+    """
+    aliases: Dict[str, str] = {}
+    while True:
+        merged = {}
+        for stems in _group_layouts(tree, msg_dir):
+            merged.update((stem, stems[0]) for stem in stems[1:])
+        if not merge:
+            return merged
+        if not merged:
+            return aliases
+
+        for alias in merged:
+            tree.unlink(os.path.join(msg_dir, f"{alias}.msg"))
+        for directory, extension in ((msg_dir, "msg"), (srv_dir, "srv")):
+            for path in tree.glob(directory, f"*.{extension}"):
+                text = tree.read(path)
+                retyped = _retype(text, merged)
+                if retyped != text:
+                    tree.write(path, retyped)
+        # earlier aliases of a file merged in this round follow it to its canonical file
+        aliases = {alias: merged.get(canonical, canonical) for alias, canonical in aliases.items()}
+        aliases.update(merged)
+
+
+def layout_alias_column(ros_filenames: List[str], aliases: Dict[str, str]) -> List[str]:
+    """The `alias_of` column of the manifest rows of `ros_filenames`."""
+    column = []
+    for ros in ros_filenames:
+        stem, ext = os.path.splitext(ros or "")
+        column.append(f"{aliases[stem]}{ext}" if ext == ".msg" and stem in aliases else "")
+    return column
+
+
+def layout_report(aliases: Dict[str, str], mode: str) -> dict:
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for alias, canonical in aliases.items():
+        groups[canonical].append(f"{alias}.msg")
+    return {
+        "mode": mode,
+        "groups": [{"canonical": f"{canonical}.msg", "aliases": sorted(groups[canonical])} for canonical in sorted(groups)],
+        "aliases": len(aliases),
+    }
+
+
+def write_layout_report(aliases: Dict[str, str], mode: str, report_path: str,
+                        tree: Optional["OutputTree"] = None) -> None:
+    if tree is not None:
+        tree.write(report_path, json.dumps(layout_report(aliases, mode), indent=2, ensure_ascii=False))
+        return
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(layout_report(aliases, mode), f, indent=2, ensure_ascii=False)
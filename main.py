@@ -1,81 +1,66 @@
 # ros_interface_generator/main.py
-import os
-import shutil
-from pathlib import Path
-import argparse
-from .utils import copy_header_msg, parse_sdvsidl_file, write_manifest_json, json_to_csv, process_json_file, move_file, load_projects_filter, find_and_prefix_ros_filename_duplicates
-from .extractor_sdvsidl import deduplicate_ros_filenames_by_topic_hint2,extract_topics_from_sdvsidl_file_list
-from .msg_generator import generate_msg_type,LOG_WARNINGS
-from .srv_generator import write_srv_files,LOG_SRV_WARNINGS
-from .sanitizer import sanitize_ros_interfaces
+"""
+Command line interface: a thin wrapper around session.GeneratorSession.
 
+The parser is built from constants.py only. The session (renderers,
+sanitizer, output tree) and the batch and profiler modules are imported
+once the arguments are parsed, so --help and errors answer fast; --check
+does not import the session at all.
+"""
+import sys
+import argparse
+import contextlib
+from .constants import MANIFEST_DIFF_FILENAME, DEPS_FILENAME, DUMP_FORMATS, DEDUPE_MODES, LAYOUT_REPORT_FILENAME
 
-# Global state
-generated_msgs = dict()
-manifest_records = []
 
-# # List of allowed projects for the ABCD domains
-PROJECTS_FILTER = []
-PROJECTS_FILTER_SDVSIDL = []
+def write_profile(args, session):
+    """Write the summary (and dumps) of --profile into --doc_output."""
+    from .profiler import PROFILER
+    if session.cache:
+        PROFILER.count("parse cache hits", session.cache.hits)
+        PROFILER.count("parse cache misses", session.cache.misses)
+    written = PROFILER.write(args.doc_output, args.profile)
+    print(PROFILER.summary())
+    print(f"Profile written to {', '.join(written)}")
 
 
-def parse_and_sanitize(msg_output_dir, srv_output_dir, manifest_path: str):
-    print("Sanitizing interfaces...")
-    sanitize_ros_interfaces(msg_output_dir, srv_output_dir, manifest_path)
-    print("Sanitizing Done ! Interfaces generated in:")
-    print(f"  - Messages : {msg_output_dir}")
-    print(f"  - Services : {srv_output_dir}")
-    
-    
-def init_env(msg_output_dir: str, srv_output_dir: str, template_path: str = None):
-    
-    header_file = os.path.join(template_path, "Header.msg")
-    futurama_projects = os.path.join(template_path, "project_fut.txt")
-    os.makedirs(msg_output_dir, exist_ok=True)
-    os.makedirs(srv_output_dir, exist_ok=True)
-    
-    if header_file and os.path.exists(header_file):
-        copy_header_msg(header_file, msg_output_dir)
-        
-    if futurama_projects and os.path.exists(futurama_projects):
-        print("futurama_projects file exists")
-        PROJECTS_FILTER.extend(load_projects_filter(futurama_projects))
-    
-    
-def generate_all2(proto_dir: str, msg_output_dir: str, srv_output_dir: str, projects_list: list):
-    interfaces = extract_topics_from_sdvsidl_file_list(projects_list, proto_dir)
-    interfaces_fixed = deduplicate_ros_filenames_by_topic_hint2(interfaces)
-    
-    for base_type, topic_hint, ros_filename, event in interfaces_fixed:
-        print(f" base_type de {base_type} \t topic_hint '{topic_hint}' \t ros_filename  {ros_filename}.msg \t event_name {event}")
+def run(args, session) -> int:
+    """Run the generation selected by the command line. Returns the exit code."""
+    if args.plan_json:
+        from .planner import write_plan
+        # the generation log goes to stderr when the plan is printed
+        with contextlib.redirect_stdout(sys.stderr if args.plan_json == "-" else sys.stdout):
+            report = session.plan(args.sdvsidl, args.msg_output or "msg", args.srv_output or "srv",
+                                  args.doc_output or "doc")
+        write_plan(report, args.plan_json)
+        summary = report["summary"]
+        print(f"🗺 Plan: {summary['msg']} .msg, {summary['srv']} .srv, {summary['renamed']} renamed, "
+              f"{summary['dropped']} replaced; nothing written to the output folders", file=sys.stderr)
+        return 0
+    if args.baseline:
+        from .batch import parse_baseline_spec
+        baselines = [parse_baseline_spec(spec) for spec in args.baseline]
+        return 1 if session.generate_baselines(baselines, args.msg_output, args.srv_output, args.doc_output) else 0
+    if args.watch:
+        return session.watch(args.sdvsidl, args.msg_output, args.srv_output, args.doc_output,
+                             args.watch_interval, args.debounce)
+    session.generate(args.sdvsidl, args.msg_output, args.srv_output, args.doc_output)
+    return 0
 
-    for base_type, topic_hint, ros_filename, event_name in interfaces_fixed:
-        generate_msg_type (
-            base_type,              
-            proto_dir, 
-            msg_output_dir, 
-            generated_msgs, 
-            topic_hint.split('.')[0], 
-            ros_filename, 
-            event_name, 
-            top_level=True,
-            manifest_records=manifest_records)
-        
-    print("Generating .srv files...")
-    if 0:
-        for sdvsidl_file in projects_list:
-            write_srv_files(sdvsidl_file, proto_dir, srv_output_dir, msg_output_dir, generated_msgs, manifest_records)
 
 if __name__ == "__main__":
     
     if(1):
         parser = argparse.ArgumentParser(description="ROS2 generator from .proto and .sdvsidl")
-        parser.add_argument("--sdvsidl", required=True, nargs="+",
-                        help="Path(s) to one or more .sdvsidl folders/files")
-        parser.add_argument("--proto_dir", required=True, help="Directory containing .proto files")
-        parser.add_argument("--msg_output", required=True, help="Output directory for .msg files")
-        parser.add_argument("--srv_output", required=True, help="Output directory for .srv files")
-        parser.add_argument("--doc_output", required=True, help="Output directory for docs")
+        parser.add_argument("--sdvsidl", nargs="+",
+                        help="Path(s) to one or more .sdvsidl folders/files or .zip archives")
+        parser.add_argument("--baseline", action="append", metavar="NAME=PATH[,PATH...]",
+                        help="Batch mode: sdvsidl set of a named baseline (repeatable), generated into <output>/NAME; "
+                             f"the manifests of consecutive baselines are compared in {MANIFEST_DIFF_FILENAME}")
+        parser.add_argument("--proto_dir", required=True, help="Directory (or .zip archive) containing .proto files")
+        parser.add_argument("--msg_output", help="Output directory for .msg files")
+        parser.add_argument("--srv_output", help="Output directory for .srv files")
+        parser.add_argument("--doc_output", help="Output directory for docs")
         parser.add_argument("--template", required=True, help="Path to a Header.msg")
         parser.add_argument(
             "--no_filter_projects",
@@ -83,57 +68,65 @@ if __name__ == "__main__":
             dest="filter_projects",
             help="Disable handling of projects listed in project_fut.txt (enabled by default)"
         )
+        parser.add_argument("--cache_dir", "--cache-dir", dest="cache_dir", default=None,
+                        help="Directory of the persistent parse cache (.proto ASTs, sdvsidl topics); disabled if omitted")
+        parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes for the sdvsidl extraction (0 = one per CPU, default 1)")
+        parser.add_argument("--diagnostics_jsonl", "--diagnostics-jsonl", dest="diagnostics_jsonl", default=None,
+                        help="Also stream the generation warnings as JSON lines to this file (srv ones to <name>_srv.jsonl)")
+        parser.add_argument("--incremental", action="store_true",
+                        help=f"Only rewrite outputs whose content changed and delete stale ones (dependency graph kept in {DEPS_FILENAME})")
+        parser.add_argument("--watch", action="store_true",
+                        help="Keep running and regenerate (incrementally) whenever a .proto or .sdvsidl input changes")
+        parser.add_argument("--watch_interval", "--watch-interval", dest="watch_interval", type=float, default=0.5,
+                        help="Polling interval in seconds of --watch when inotify_simple is not installed (default 0.5)")
+        parser.add_argument("--debounce", type=float, default=0.3,
+                        help="Seconds without further change before --watch regenerates (default 0.3)")
+        parser.add_argument("--check", "--dry-run", dest="check", action="store_true",
+                        help="Only validate the inputs and print the planned .msg/.srv outputs; nothing is written "
+                             "(the output folders are then optional)")
+        parser.add_argument("--dedupe_layouts", "--dedupe-layouts", dest="dedupe_layouts", choices=DEDUPE_MODES, default=None,
+                        help="Find the messages structurally identical to another one: 'report' them, or 'merge' them into "
+                             f"one file per layout; aliases are recorded in the manifest (alias_of) and {LAYOUT_REPORT_FILENAME}")
+        parser.add_argument("--plan_json", "--plan-json", dest="plan_json", metavar="PATH", default=None,
+                        help="Run the generation in memory and write its plan (final files, rename chains, manifest, "
+                             "diagnostics) as JSON to PATH ('-': stdout); the output folders are not touched")
+        parser.add_argument("--profile", nargs="?", const="summary", default=None, choices=DUMP_FORMATS,
+                        help="Time each stage and function and count file accesses; the summary table is written to --doc_output, "
+                             "with 'cprofile', 'speedscope' or 'all' also the corresponding dumps")
 
         args = parser.parse_args()
-        
-        # Clean output folders
-        for output_dir in [args.msg_output, args.srv_output, args.doc_output]:
-            if os.path.exists(output_dir):
-                shutil.rmtree(output_dir)
-            os.makedirs(output_dir, exist_ok=True)
-        
-        # Initialize generation environment
-        init_env(args.msg_output, args.srv_output, args.template)
-        
-        # Process provided sdvsidl files
-        sdvsidl_files = []
-        for sdvsidl_input in args.sdvsidl:
-            domain = Path(sdvsidl_input).name
-            print(f"\n===============================")
-            print(f" Detected domain : {domain}")
-            print(f" Scanned folder : {sdvsidl_input}")
-            print("===============================\n")
-            
-            sdvsidl_files.extend(parse_sdvsidl_file(sdvsidl_input))
-            print(f" sdvsidl Files found ({len(sdvsidl_files)}) : {[Path(f).stem for f in sdvsidl_files]}")
+        if args.baseline and args.sdvsidl:
+            parser.error("--sdvsidl and --baseline are mutually exclusive")
+        if not args.baseline and not args.sdvsidl:
+            parser.error("one of --sdvsidl or --baseline is required")
+        if args.watch and args.baseline:
+            parser.error("--watch does not support --baseline")
+        if args.check:
+            if args.baseline or args.watch:
+                parser.error("--check only supports --sdvsidl")
+            from .check import run_check
+            sys.exit(run_check(args))
+        if args.plan_json and (args.baseline or args.watch):
+            parser.error("--plan_json only supports --sdvsidl")
+        missing = [f"--{name}" for name in ("msg_output", "srv_output", "doc_output") if not getattr(args, name)]
+        if missing and not args.plan_json:
+            parser.error(f"the following arguments are required: {', '.join(missing)}")
+        if args.profile and not args.doc_output:
+            parser.error("--profile writes its summary to --doc_output")
 
-            if not args.filter_projects:
-                print(f"\n All ABCD projects are considered (filter disabled)")
-                PROJECTS_FILTER_SDVSIDL = sdvsidl_files 
-            else:
-                for sdvsidl_file in sdvsidl_files:
-                    file_name_no_ext = Path(sdvsidl_file).stem
-    
-                    # Filter only the allowed projects
-                    if file_name_no_ext in PROJECTS_FILTER:
-                        PROJECTS_FILTER_SDVSIDL.append(sdvsidl_file)
-        
-        PROJECTS_FILTER_SDVSIDL = sorted(list(set(PROJECTS_FILTER_SDVSIDL)))
-        print(f" Files included ({len(PROJECTS_FILTER_SDVSIDL)}) : {[Path(f).stem for f in PROJECTS_FILTER_SDVSIDL]}")
-                
-        generate_all2(args.proto_dir, args.msg_output, args.srv_output, PROJECTS_FILTER_SDVSIDL)  
-        
-        # Write  manifest JSON
-        manifest_path = os.path.join(args.doc_output, "ros_interface_manifest.json")
-        write_manifest_json(manifest_records, manifest_path)
-        
-        # Final Sanitation 
-        parse_and_sanitize(args.msg_output, args.srv_output, manifest_path)
-        
-        # Post JSON  management
-        find_and_prefix_ros_filename_duplicates(manifest_path,args.msg_output,True)
-        process_json_file(manifest_path,manifest_path,manifest_path)
+        from .session import GeneratorSession
 
-        # CSV generation
-        json_to_csv(manifest_path, os.path.join(args.doc_output, "ros_interface_manifest.csv"))
-        move_file(os.path.join(args.msg_output, "generation_warnings.txt"),os.path.join(args.doc_output, "generation_warnings.txt"))
\ No newline at end of file
+        session = GeneratorSession(args.proto_dir, args.template, cache_dir=args.cache_dir, jobs=args.jobs,
+                                   filter_projects=args.filter_projects, incremental=args.incremental,
+                                   diagnostics_jsonl=args.diagnostics_jsonl, dedupe_layouts=args.dedupe_layouts)
+        if args.profile:
+            from .profiler import PROFILER
+            try:
+                with PROFILER.profiling():
+                    code = run(args, session)
+            finally:
+                write_profile(args, session)
+        else:
+            code = run(args, session)
+        sys.exit(code)
@@ -0,0 +1,166 @@
+# ros_interface_generator/manifest.py
+"""
+Post-processing of the interface manifest, in memory.
+
+The manifest rows of a run are held by column ({column: [value per row]})
+in a ManifestTable. Each step works on whole columns: the FQIN-prefixed
+names, grouping by topic, prefixing duplicates, remapping to the ROS
+conventions and the layout aliases. Remaps are computed once per distinct
+name. The JSON manifest and its CSV are written once, at the
+end of the run.
+
+The file-based helpers of utils (find_and_prefix_ros_filename_duplicates,
+process_json_file, load_prefixed_files_from_manifest) load a table from
+the manifest file and apply the same steps.
+"""
+import csv
+import io
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .utils import ManifestRecord, hint_to_acronym, remap_filename_to_ros_convention, remap_fqin_to_ros_convention
+from .output_tree import OutputTree
+
+MANIFEST_FILENAME = "ros_interface_manifest.json"
+MANIFEST_CSV_FILENAME = "ros_interface_manifest.csv"
+
+EXTENSION_RE = re.compile(r"^(.*?)(\.(msg|srv))$", flags=re.IGNORECASE)
+
+
+def _strip_ext(name: str) -> Tuple[str, str]:
+    m = EXTENSION_RE.match(name)
+    return (m.group(1), m.group(2)) if m else (name, "")
+
+
+class ManifestTable:
+    """Manifest rows stored by column; every column has one value per row."""
+
+    def __init__(self, columns: Dict[str, list]):
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records: List[ManifestRecord]) -> "ManifestTable":
+        if not records:
+            return cls({name: [] for name in ManifestRecord._fields})
+        return cls(dict(zip(ManifestRecord._fields, map(list, zip(*records)))))
+
+    @classmethod
+    def from_rows(cls, rows: List[dict]) -> "ManifestTable":
+        names = list(dict.fromkeys(name for row in rows for name in row)) or list(ManifestRecord._fields)
+        return cls({name: [row.get(name, "") for row in rows] for name in names})
+
+    @classmethod
+    def load(cls, manifest_path: str) -> "ManifestTable":
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return cls.from_rows(json.load(f))
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def column(self, name: str) -> list:
+        return self.columns.get(name) or [""] * len(self)
+
+    def rows(self) -> List[dict]:
+        names = list(self.columns)
+        return [dict(zip(names, values)) for values in zip(*self.columns.values())]
+
+    def prefixed_stems(self) -> Set[str]:
+        """Stems of the ros_filenames already prefixed in the form fqin + topic_name."""
+        fqins = {proto: hint_to_acronym(proto.replace(".", "_")) for proto in set(self.column("proto_file")) if proto}
+        prefixed = set()
+        for ros, topic, proto in zip(self.column("ros_filename"), self.column("topic_name"), self.column("proto_file")):
+            if not ros or not topic or not proto:
+                continue
+            fqin = fqins[proto]
+            expected = f"{fqin}{topic}"
+            if ros.startswith(expected) or (ros.startswith(fqin) and expected in ros):
+                prefixed.add(Path(ros).stem)  # sans extension
+        return prefixed
+
+    def prefix_duplicates(self, msg_output: str, tree: Optional[OutputTree] = None) -> List[Tuple[str, str, str]]:
+        """
+        Prefix with the FQIN acronym the ros_filename of the topics generated under several names,
+        when one of the names already is "ACRO(proto) + topic". With a tree, the .msg files are
+        renamed in it. Returns the (old ros_filename, new ros_filename, proto_file) changes.
+        """
+        ros_column, topics, protos = self.column("ros_filename"), self.column("topic_name"), self.column("proto_file")
+
+        # 1) rows of every topic
+        by_topic: Dict[str, List[int]] = defaultdict(list)
+        for i, (topic, ros) in enumerate(zip(topics, ros_column)):
+            if topic and ros:
+                by_topic[topic].append(i)
+
+        # 2) topics with several names, one of them compliant with "ACRO(proto) + topic"
+        duplicates = {
+            topic for topic, indices in by_topic.items()
+            if len({ros_column[i] for i in indices}) > 1
+               and any(_strip_ext(ros_column[i])[0] == f"{hint_to_acronym(protos[i])}{topic}" for i in indices)
+        }
+
+        # 3) prefix the rows named after the topic itself
+        changes: List[Tuple[str, str, str]] = []
+        for i, topic in enumerate(topics):
+            ros = ros_column[i]
+            if topic not in duplicates or not ros:
+                continue
+            base, ext = _strip_ext(ros)
+            if base != topic:
+                continue
+            new_ros = f"{hint_to_acronym(protos[i])}{base}{ext or '.msg'}"
+            if new_ros == ros:
+                continue
+            ros_column[i] = new_ros
+            changes.append((ros, new_ros, protos[i]))
+            if tree is not None:
+                output_msg = Path(msg_output) / ros
+                new_output_msg = Path(msg_output) / new_ros
+                if tree.exists(new_output_msg):
+                    print(f"warning: target already exists, To skip rename: {ros} -> {new_ros}")
+                if tree.exists(output_msg):
+                    tree.rename(output_msg, new_output_msg)
+                    print(f"file ros renamed from  {ros} --> {new_ros}")
+        self.columns["ros_filename"] = ros_column
+        return changes
+
+    def remap_to_ros_convention(self, prefixed: Optional[Set[str]] = None) -> None:
+        """
+        Remap every ros_filename to the ROS conventions; the FQIN-prefixed ones
+        (`prefixed`, by default those of the table) keep their acronym.
+        """
+        if prefixed is None:
+            prefixed = self.prefixed_stems()
+        remapped = {}
+        for ros in set(self.column("ros_filename")):
+            if not ros:
+                continue
+            ext = ".msg" if ros.lower().endswith(".msg") else ".srv"
+            remap = remap_fqin_to_ros_convention if Path(ros).stem in prefixed else remap_filename_to_ros_convention
+            remapped[ros] = remap(ros)[1] + ext
+        self.columns["ros_filename"] = [remapped[ros] if ros else ros for ros in self.column("ros_filename")]
+
+    def write_json(self, output_path: str, tree: Optional[OutputTree] = None) -> None:
+        if tree is not None:
+            tree.write(output_path, json.dumps(self.rows(), indent=2, ensure_ascii=False))
+            return
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(self.rows(), f, indent=2, ensure_ascii=False)
+
+    def write_csv(self, output_path: str, tree: Optional[OutputTree] = None) -> None:
+        buffer = io.StringIO(newline="")
+        writer = csv.writer(buffer)
+        writer.writerow(self.columns)
+        writer.writerows(zip(*self.columns.values()))
+        if tree is not None:
+            tree.write(output_path, buffer.getvalue())
+            return
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+
+    def write(self, json_path: str, csv_path: str, tree: Optional[OutputTree] = None) -> None:
+        """Write the manifest and its CSV, into `tree` when given."""
+        self.write_json(json_path, tree)
+        self.write_csv(csv_path, tree)
@@ -1,48 +1,52 @@
 # ros_interface_generator/msg_generator.py
 import os
-from pathlib import Path
 import re
-from typing import List, Tuple
-from .utils import is_primitive_type, compute_topic_hint2, determine_ros_type_from_values, shorten_name_simple, extract_fixed_size_from_bytes_options, extract_primitive_byte_size__from_type,resolve_type, hint_to_acronym,occupied
-from .proto_parser import find_message_block, find_enum_blocks, find_message_block_with_hint, find_proto_file_msg2
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .utils import is_primitive_type, compute_topic_hint2, shorten_name_simple, resolve_type, hint_to_acronym,occupied, ManifestRecord
+from .proto_parser import ProtoDefinition, find_message_definition, find_message_definition_with_hint, find_proto_file_msg2
+from .enum_table import EnumInfo, get_enum_table, render_enum_block
+from .incremental import input_digest
+from .output_tree import OutputTree
+from .diagnostics import DiagnosticsScope
 
 
 
-LOG_WARNINGS = []
-LOG_WARNINGS_PATH = None
+# Diagnostics of the .msg generation, written to generation_warnings.txt by the caller
+DIAGNOSTICS = DiagnosticsScope("msg")
+WARNINGS_FILENAME = "generation_warnings.txt"
 
-def log_warning(msg: str):
-    LOG_WARNINGS.append(msg)
-    if LOG_WARNINGS_PATH:
-            os.makedirs(os.path.dirname(LOG_WARNINGS_PATH), exist_ok=True)
-            with open(LOG_WARNINGS_PATH, "w", encoding="utf-8") as logf:
-                logf.write("\n".join(LOG_WARNINGS))
+def log_warning(msg: str, code: str = "generation", severity: str = "warning", file: str = None, source: str = None):
+    DIAGNOSTICS.report(severity, code, msg, file, source)
+
+
+def flush_warnings(tree: OutputTree, path: str) -> None:
+    """Write the .msg generation warnings reported so far to `path` in `tree`."""
+    if DIAGNOSTICS.flush(tree, path):
+        print(f"Warnings written to  {path}")
+
+
+def log_enum_warning(warning: str, enum_name: str, file: str = None, source: str = None):
+    if warning.startswith("Error"):
+        log_warning(warning, "enum-line-too-long", "error", file, source)
+    else:
+        log_warning(warning, "empty-enum", "warning", file, source)
 
 
 def generate_enum_block(enum_name: str, block: str, field_name: str, max_line_length: int = 63) -> str:
-    
-    entries = re.findall(r'^\s*([A-Z0-9_]+)\s*=\s*(-?\d+)', block, re.MULTILINE)
-    if not entries:
-        log_warning(f"Warning: empty enum: {enum_name}")
-        return f"Warning: empty enum: {enum_name}"
-    
-    values = [int(value) for _, value in entries]
-    field_type = determine_ros_type_from_values(values)
-    lines = [f"# Add Enum {enum_name}"]
-    
-    for name, value in entries:
-        if '__' in name:
-            name = name.replace('__', '_')
-        
-        short_name = shorten_name_simple(name,max_length=max_line_length)
-        line = f"{field_type} C_{short_name} = {value}"
-        if len(short_name) > max_line_length:
-            log_warning(f"Error: generated line exceeds max length for enum : {enum_name}:\n {line}")
-            return (f"Error: generated line exceeds max length for enum : {enum_name}:\n {line}")
-        
-        lines.append(line)
-        
-    return "\n".join(lines)
+    text, warning = render_enum_block(enum_name, block, max_line_length)
+    if warning:
+        log_enum_warning(warning, enum_name)
+    return text
+
+
+def write_enum_block(enum: EnumInfo, proto_dir, file: str = None) -> str:
+    """Pre-rendered generate_enum_block of a table entry (warnings still logged at each use)."""
+    text, warning = get_enum_table(proto_dir).render(enum)
+    if warning:
+        log_enum_warning(warning, enum.name, file, enum.location)
+    return text
 
 
 def resolve_output_filename_conflict(output_filename: str, topic_hint: str, generated_msgs: dict) -> Tuple[str, bool]:
@@ -64,7 +68,8 @@ def resolve_output_filename_conflict(output_filename: str, topic_hint: str, gene
         if previous_hint == topic_hint:
             log_warning(
                 f"Warning: message already generated: {output_filename}.msg with the same topic_hint → skipped"
-                f"\n\t -> previous_hint: {previous_hint}\t -> topic_hint: {topic_hint}"
+                f"\n\t -> previous_hint: {previous_hint}\t -> topic_hint: {topic_hint}",
+                "duplicate-message", file=f"{output_filename}.msg"
                 )
             return output_filename, False
         else:
@@ -117,133 +122,325 @@ def resolve_output_filename_conflict(output_filename: str, topic_hint: str, gene
             if new_filename in generated_msgs:
                 log_warning(
                     f"Warning: persistent conflict: {new_filename}.msg already exists even after rename → skipped"
-                    f"\n\t -> previous_hint: {generated_msgs[new_filename]}\t -> topic_hint: {topic_hint}"
+                    f"\n\t -> previous_hint: {generated_msgs[new_filename]}\t -> topic_hint: {topic_hint}",
+                    "persistent-conflict", file=f"{new_filename}.msg"
                 )
                 return new_filename, False
             else:
                 log_warning(
-                    f"Info: filename conflict detected for {output_filename}.msg → renaming to {new_filename}.msg"
+                    f"Info: filename conflict detected for {output_filename}.msg → renaming to {new_filename}.msg",
+                    "filename-renamed", "info", file=f"{new_filename}.msg"
                 )
                 return new_filename, True
     
     return output_filename, True
 
 
-def generate_msg_type(attr_type: str, proto_dir: str, output_dir: str, generated_msgs: dict, topic_hint: str, ros_filename: str, event_name: str ,top_level: bool = False, manifest_records: list = None):
+@dataclass(eq=False)
+class MsgPlanNode:
+    """A .msg file of the plan: its definition, final name and field lines."""
+    index: int                      # position in the plan (post-order: field types first)
+    ros_filename: str               # name given by conflict resolution, used by the referencing fields
+    final_filename: str             # name of the written file (differs after a self-name rename)
+    definition: ProtoDefinition
+    top_level: bool
+    entries: list = field(default_factory=list)        # field lines (str) and enum constants (EnumInfo)
+    deps: List["MsgPlanNode"] = field(default_factory=list)  # nodes of the message types used by the fields
+    inputs: Dict[str, str] = field(default_factory=dict)
 
-    global LOG_WARNINGS_PATH
-    LOG_WARNINGS_PATH = os.path.join(output_dir, "generation_warnings.txt")
-    
-    base_type = attr_type.split('.')[-1]
-    output_filename = ros_filename
-    
-    if topic_hint:
-        block, proto_file = find_message_block_with_hint(proto_dir, base_type, topic_hint, top_level=top_level)
-        if not block:
-            block, proto_file = find_message_block(proto_dir, base_type)
-    else:
-        block, proto_file = find_message_block(proto_dir, base_type)
-    
-    if not block:
-        log_warning(f"# Warning: message block not found for {base_type}")
-        return
 
-    output_filename, should_generate = resolve_output_filename_conflict(output_filename, topic_hint, generated_msgs)
-    if not should_generate:
-        return
+@dataclass(eq=False)
+class SrvPlanNode:
+    """A .srv file of the plan: request field lines, '---', response field lines."""
+    method_name: str
+    path: str
+    entries: list = field(default_factory=list)        # field lines (str) and enum constants (EnumInfo)
+    deps: List[MsgPlanNode] = field(default_factory=list)
+    inputs: Dict[str, str] = field(default_factory=dict)
+    top_level: bool = False                             # no header
 
-    generated_msgs[output_filename] = topic_hint 
-    output_path = os.path.join(output_dir, f"{output_filename}.msg")
-    
-    # Handle nested cases
-    final_output_filename = output_filename
-    final_output_path = output_path
-    
-    used_enums_in_file = set()  # Avoid duplicate enums
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
+
+class MsgPlan:
+    """
+    Planned .msg generation.
+
+    `add_type` walks a message type and, depth-first, the message types of its
+    fields the way the generation always has: conflict resolution, the
+    `generated_msgs` updates, warnings and manifest records happen in the same
+    order, but no file is written. Every final file name is known once the
+    plan is complete; `emit` then renders the files in topological order.
+
+    A field whose type is a message still being planned (an ancestor in the
+    walk) closes a cycle: it is reported in `cycles` instead of becoming an edge.
+
+    `add_srv` plans a .srv file whose request and response fields go through
+    the same field rendering (`add_fields`); the .srv files are emitted after
+    the messages.
+    """
+
+    def __init__(self, proto_dir, output_dir: str, generated_msgs: dict,
+                 manifest_records: list = None, dependency_records: list = None):
+        self.proto_dir = proto_dir
+        self.output_dir = output_dir
+        self.generated_msgs = generated_msgs
+        self.manifest_records = manifest_records
+        self.dependency_records = dependency_records
+        self.nodes: List[MsgPlanNode] = []
+        self.by_name: Dict[str, MsgPlanNode] = {}
+        self.files: Dict[str, MsgPlanNode] = {}     # final path -> node writing it
+        self.srv_files: Dict[str, SrvPlanNode] = {} # path -> .srv node (the last one planned at a path wins)
+        self.cycles: List[List[str]] = []
+        self.rendered: Dict[str, Tuple[tuple, str]] = {}    # path -> (render key, text), filled by emit
+        self._stack: List[MsgPlanNode] = []
+
+    def add_type(self, attr_type: str, topic_hint: str, ros_filename: str, event_name: str,
+                 top_level: bool = False) -> Optional[MsgPlanNode]:
+        """Plan the .msg of `attr_type` and of the message types it uses."""
+        proto_dir, generated_msgs = self.proto_dir, self.generated_msgs
+        base_type = attr_type.split('.')[-1]
+        output_filename = ros_filename
+
+        if topic_hint:
+            definition = find_message_definition_with_hint(proto_dir, base_type, topic_hint, top_level=top_level)
+            if not definition:
+                definition = find_message_definition(proto_dir, base_type)
+        else:
+            definition = find_message_definition(proto_dir, base_type)
+
+        if not definition:
+            log_warning(f"# Warning: message block not found for {base_type}", "message-not-found", file=f"{ros_filename}.msg")
+            return None
+
+        output_filename, should_generate = resolve_output_filename_conflict(output_filename, topic_hint, generated_msgs)
+        if not should_generate:
+            return None
+
+        generated_msgs[output_filename] = topic_hint
+        node = MsgPlanNode(index=-1, ros_filename=output_filename, final_filename=output_filename,
+                           definition=definition, top_level=top_level)
+        node.inputs[f"message:{definition.rel_path}#{definition.name}"] = input_digest(definition.block)
         if top_level:
-            f.write("ast_ssot_msgs/Header header\n")
+            node.inputs[f"topic:{attr_type}"] = input_digest(f"{topic_hint}|{ros_filename}|{event_name}")
+        self.by_name[output_filename] = node
+        self._stack.append(node)
+
+        self.add_fields(node, definition, f"{output_filename}.msg", topic_hint, set())
+
+        self._stack.pop()
+        node.index = len(self.nodes)
+        self.nodes.append(node)
+
+        # The file is written as output_filename, then renamed: it replaces whatever was planned at either path
+        output_path = os.path.join(self.output_dir, f"{output_filename}.msg")
+        self.files[output_path] = node
+        final_output_path = os.path.join(self.output_dir, f"{node.final_filename}.msg")
+        if final_output_path != output_path:
+            self.files[final_output_path] = self.files.pop(output_path)
 
-        pattern = re.compile(r'^\s*(repeated\s+)?([\w\.]+)\s+([\w_]+)\s*=\s*\d+(?:\s*\[(.*?)\])?', re.MULTILINE | re.DOTALL)
-        for match in pattern.finditer(block):
-        
-            is_repeated = match.group(1) is not None
-            field_type = match.group(2)
-            field_name = match.group(3)
-            options_block = match.group(4) or ""
+        if self.manifest_records is not None:
+            self.manifest_records.append(ManifestRecord.make(
+                ros_filename=f"{node.final_filename}.msg",
+                topic_name=attr_type,
+                event_name=event_name,
+                proto_file=topic_hint,
+            ))
+            if self.dependency_records is not None:
+                self.dependency_records.append(node.inputs)
+        return node
 
-            repeated_count_match = re.search(r'\(.*repeated_field_max_count\)\s*=\s*(\d+)', options_block)
-            suffix = f"[{repeated_count_match.group(1)}]" if repeated_count_match else "[]"
+    def add_fields(self, node, definition: ProtoDefinition, file_name: str, topic_hint: str, used_enums: set,
+                   log=log_warning, too_long: str = "❌ Field name exceeds max length"):
+        """
+        Append the field lines of `definition` to `node.entries` (a .msg or .srv node),
+        planning the message types of the fields. `used_enums` holds the enums already
+        written in the file; field warnings go through `log`.
+        """
+        proto_dir, generated_msgs = self.proto_dir, self.generated_msgs
+        enum_table = get_enum_table(proto_dir)
+
+        for proto_field in definition.node.iter_fields():
+            if proto_field.is_map:
+                continue  # no ROS equivalent
+
+            is_repeated = proto_field.is_repeated
+            field_type = proto_field.type_name
+            field_name = proto_field.name
+
+            repeated_count = proto_field.option("repeated_field_max_count")
+            suffix = f"[{repeated_count}]" if repeated_count and repeated_count.isdigit() else "[]"
 
             if (len(field_name) > 63):
-                log_warning(f"❌ Field name exceeds max length : {field_name} in {output_filename}.msg \t -> {shorten_name_simple(field_name, max_length=63)}")
+                log(f"{too_long} : {field_name} in {file_name} \t -> {shorten_name_simple(field_name, max_length=63)}",
+                    "field-name-too-long", "error", file_name, definition.location(proto_field.offset))
                 field_name = shorten_name_simple(field_name, max_length=63) # Comply with MATLAB-style rules
-            
+
             if field_type == "bytes":
                 if field_name=="raw_bytes":
-                    log_warning(f"Warning: field {field_name} is inside a oneof block in {output_filename}.msg")
+                    log(f"Warning: field {field_name} is inside a oneof block in {file_name}",
+                        "oneof-bytes", file=file_name, source=definition.location(proto_field.offset))
                     continue
                 else:
-                    size = extract_fixed_size_from_bytes_options(options_block)
+                    size = proto_field.option("variable_type_max_size")
+                    size = int(size) if size and size.isdigit() else None
                     if size:
-                        f.write(f"uint8[{size}] {field_name}\n")
+                        node.entries.append(f"uint8[{size}] {field_name}")
                     else:
-                        f.write(f"uint8 {field_name}\n")
-                
+                        node.entries.append(f"uint8 {field_name}")
+
             elif is_primitive_type(field_type):
-                type_size = extract_primitive_byte_size__from_type(options_block)
+                type_size = proto_field.option("primitive_byte_size")
                 if( field_type.startswith("int") or field_type.startswith("uint")):
                     ros_type = resolve_type(field_type, type_size)
                     if ros_type:
-                        f.write(f"{ros_type}{suffix if is_repeated else ''} {field_name}\n")
+                        node.entries.append(f"{ros_type}{suffix if is_repeated else ''} {field_name}")
                     else:
-                        f.write(f"{field_type}{suffix if is_repeated else ''} {field_name}\n")
+                        node.entries.append(f"{field_type}{suffix if is_repeated else ''} {field_name}")
                 else:
-                    f.write(f"{field_type}{suffix if is_repeated else ''} {field_name}\n")
-                    
+                    node.entries.append(f"{field_type}{suffix if is_repeated else ''} {field_name}")
+
             else:
                 sub_base = field_type.split('.')[-1]
-                enums = find_enum_blocks(proto_dir, sub_base)
+                enums = enum_table.lookup(sub_base)
                 if enums:
-                    for _, enum_list in enums.items():
-                        for name, enum_block in enum_list:
-                            values = re.findall(r'=\s*(-?\d+)', enum_block)
-                            values = [int(v) for v in values]
-                            type_enum = determine_ros_type_from_values(values)
-                            if name.startswith(sub_base):
-                                if name not in used_enums_in_file:
-                                    f.write(f"{type_enum}{suffix if is_repeated else ''} {field_name}\n")
-                                    enum_msg = generate_enum_block(name, enum_block, field_name)
-                                    f.write(enum_msg + "\n")
-                                    used_enums_in_file.add(name)
-                                else:
-                                    f.write(f"{type_enum}{suffix if is_repeated else ''} {field_name}  # Uses enum {name}\n")
+                    for enum in enums:
+                        name = enum.name
+                        node.inputs[f"enum:{enum.rel_path}#{name}"] = enum.digest
+                        if name.startswith(sub_base):
+                            if name not in used_enums:
+                                node.entries.append(f"{enum.ros_type}{suffix if is_repeated else ''} {field_name}")
+                                warning = enum_table.render(enum)[1]
+                                if warning:
+                                    log_enum_warning(warning, name, file_name, enum.location)
+                                node.entries.append(enum)
+                                used_enums.add(name)
+                            elif isinstance(node, MsgPlanNode):
+                                node.entries.append(f"{enum.ros_type}{suffix if is_repeated else ''} {field_name}  # Uses enum {name}")
+                            # in a .srv, a second field of an enum already written is dropped (as write_srv_files did)
                 else:
                     hint_topic =  find_proto_file_msg2(proto_dir, sub_base, compute_topic_hint2(field_type), top_level=False)
                     hint_topic = hint_topic.split('.')[0]
                     output_type, should_gen = resolve_output_filename_conflict(sub_base, hint_topic, generated_msgs)
-                    f.write(f"{output_type}{suffix if is_repeated else ''} {field_name}\n")
+                    node.entries.append(f"{output_type}{suffix if is_repeated else ''} {field_name}")
                     if should_gen:
-                        generate_msg_type(sub_base, proto_dir, output_dir, generated_msgs, hint_topic, output_type, "", top_level=False,manifest_records=manifest_records)
-                        if (sub_base == output_filename and hint_topic != topic_hint):
-                            final_output_filename = hint_to_acronym(topic_hint) + output_filename
-                            final_output_path = os.path.join(output_dir, f"{final_output_filename}.msg")
-                            generated_msgs[output_filename] = topic_hint
-    
-    if Path(output_path).exists():
-        Path(output_path).rename(final_output_path)
-                            
-    if manifest_records is not None:
-        manifest_records.append({
-            "ros_filename": f"{final_output_filename}.msg",
-            "topic_name": attr_type,
-            "event_name": event_name,
-            "proto_file": topic_hint,
-        })
-    print(f"✔ Generated: {final_output_path}")
-    
-    if  LOG_WARNINGS:
-        with open(LOG_WARNINGS_PATH, "w", encoding="utf-8") as logf:
-            logf.write("\n".join(LOG_WARNINGS))
-        print(f"Warnings written to  {LOG_WARNINGS_PATH}")
\ No newline at end of file
+                        child = self.add_type(sub_base, hint_topic, output_type, "", top_level=False)
+                        if child is not None:
+                            node.deps.append(child)
+                        if (isinstance(node, MsgPlanNode) and sub_base == node.ros_filename and hint_topic != topic_hint):
+                            node.final_filename = hint_to_acronym(topic_hint) + node.ros_filename
+                            generated_msgs[node.ros_filename] = topic_hint
+                    else:
+                        self._depend_on(node, output_type)
+
+    def add_srv(self, path: str, method_name: str, request: Optional[ProtoDefinition],
+                response: Optional[ProtoDefinition], log=log_warning) -> "SrvPlanNode":
+        """Plan the .srv at `path`: request fields, '---', response fields (a missing definition leaves its part empty)."""
+        node = SrvPlanNode(method_name, path)
+        used_enums = set()  # shared by the request and the response
+        for part, definition in enumerate((request, response)):
+            if definition:
+                node.inputs[f"message:{definition.rel_path}#{definition.name}"] = input_digest(definition.block)
+                self.add_fields(node, definition, f"{method_name}.srv", "", used_enums, log, "Error: field name too long")
+            if part == 0:
+                node.entries.append("---")
+        self.srv_files[path] = node
+        return node
+
+    def _depend_on(self, node: MsgPlanNode, ros_filename: str):
+        """Add the already planned `ros_filename` to the dependencies of `node`, or record the cycle it closes."""
+        target = self.by_name.get(ros_filename)
+        if target is None:
+            return
+        if target in self._stack:
+            cycle = self._stack[self._stack.index(target):] + [target]
+            self.cycles.append([f"{n.ros_filename}.msg" for n in cycle])
+            log_warning(f"Warning: cyclic message dependency: {' -> '.join(self.cycles[-1])}",
+                        "cyclic-dependency", file=f"{node.ros_filename}.msg", source=node.definition.location())
+        elif target not in node.deps:
+            node.deps.append(target)
+
+    def topological_order(self) -> List[MsgPlanNode]:
+        """Nodes with every dependency before its dependents, in plan order among ready nodes."""
+        pending = {node: len(node.deps) for node in self.nodes}
+        dependents: Dict[MsgPlanNode, List[MsgPlanNode]] = {node: [] for node in self.nodes}
+        for node in self.nodes:
+            for dep in node.deps:
+                dependents[dep].append(node)
+
+        ready = [node.index for node in self.nodes if not node.deps]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            node = self.nodes[heapq.heappop(ready)]
+            order.append(node)
+            for dependent in dependents[node]:
+                pending[dependent] -= 1
+                if not pending[dependent]:
+                    heapq.heappush(ready, dependent.index)
+
+        if len(order) != len(self.nodes):
+            stuck = sorted(f"{node.ros_filename}.msg" for node in self.nodes if pending[node])
+            raise ValueError(f"cyclic message dependencies between: {', '.join(stuck)}")
+        return order
+
+    def render(self, node) -> str:
+        enum_table = get_enum_table(self.proto_dir)
+        lines = ["ast_ssot_msgs/Header header"] if node.top_level else []
+        for entry in node.entries:
+            lines.append(enum_table.render(entry)[0] if isinstance(entry, EnumInfo) else entry)
+        return "".join(f"{line}\n" for line in lines)
+
+    @staticmethod
+    def render_key(node) -> tuple:
+        """Everything `render` reads from `node`: the same key always renders the same text."""
+        return (node.top_level, tuple((entry.name, entry.digest) if isinstance(entry, EnumInfo) else entry
+                                      for entry in node.entries))
+
+    def emit(self, tree: OutputTree = None, previous: Optional[Dict[str, Tuple[tuple, str]]] = None):
+        """
+        Render the planned files into `tree`, the .msg files in topological order, then the .srv files.
+        Without a tree the files are written to the output folder right away.
+
+        `previous` is the `rendered` map of an earlier emission: a file whose render key
+        is unchanged takes its text from there instead of being rendered again.
+        """
+        own_tree = tree is None
+        if own_tree:
+            tree = OutputTree([self.output_dir])
+        owner = {node: path for path, node in self.files.items()}
+        targets = [(owner[node], node) for node in self.topological_order() if node in owner]
+        targets += list(self.srv_files.items())
+        reused = 0
+        for path, node in targets:
+            key = self.render_key(node)
+            known = previous.get(path) if previous else None
+            if known is not None and known[0] == key:
+                text = known[1]
+                reused += 1
+            else:
+                text = self.render(node)
+            self.rendered[path] = (key, text)
+            tree.write(path, text)
+        if own_tree:
+            tree.commit()
+        if previous is not None:
+            print(f"Render: {len(targets) - reused} rendered, {reused} unchanged")
+
+        for node in self.nodes:
+            print(f"✔ Generated: {os.path.join(self.output_dir, f'{node.final_filename}.msg')}")
+        for path in self.srv_files:
+            print(f"✔ Generated .srv : {path}")
+
+
+def generate_msg_type(attr_type: str, proto_dir: str, output_dir: str, generated_msgs: dict, topic_hint: str, ros_filename: str, event_name: str ,top_level: bool = False, manifest_records: list = None, dependency_records: list = None):
+    """
+    Generate the `.msg` of `attr_type` and, recursively, of the message types it uses.
+
+    `dependency_records`, when given, receives one {input_key: hash} dict per
+    manifest record, listing the proto blocks, enums and topic the file was derived from.
+    """
+    plan = MsgPlan(proto_dir, output_dir, generated_msgs, manifest_records, dependency_records)
+    plan.add_type(attr_type, topic_hint, ros_filename, event_name, top_level=top_level)
+    tree = OutputTree([output_dir])
+    plan.emit(tree)
+    flush_warnings(tree, os.path.join(output_dir, WARNINGS_FILENAME))
+    tree.commit()
@@ -0,0 +1,118 @@
+# ros_interface_generator/output_tree.py
+"""
+In-memory view of the output folders.
+
+Generation, sanitizing and the prefix renames of the duplicates all work on
+the documents held here; `commit` then writes every file once, each through
+a uniquely named temporary file and an atomic rename, and removes the files
+renamed away. A run that stops before the commit leaves the folders untouched.
+"""
+import fnmatch
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+
+def _is_temporary(name: str) -> bool:
+    """Temporary file of a commit in progress (".<name>.<random>.tmp")."""
+    return name.startswith(".") and name.endswith(".tmp")
+
+
+class OutputTree:
+    """Documents of the output folders, {path: text}, loaded from `roots` and committed back."""
+
+    def __init__(self, roots: List[str]):
+        self.roots = [os.path.normpath(str(root)) for root in roots]
+        self.files: Dict[str, str] = {}
+        self._dirty: Set[str] = set()
+        self._on_disk: Set[str] = set()
+        self.renames: List[Tuple[str, str]] = []   # (src, dst) of every rename, in order
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for entry in sorted(os.scandir(root), key=lambda e: e.name):
+                if not entry.is_file() or _is_temporary(entry.name):
+                    continue
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        self.files[os.path.normpath(entry.path)] = f.read()
+                except FileNotFoundError:
+                    continue    # renamed away by another run meanwhile
+                self._on_disk.add(os.path.normpath(entry.path))
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.normpath(str(path))
+
+    def exists(self, path) -> bool:
+        return self._key(path) in self.files
+
+    def read(self, path) -> str:
+        return self.files[self._key(path)]
+
+    def write(self, path, text: str) -> None:
+        key = self._key(path)
+        self.files[key] = text
+        self._dirty.add(key)
+
+    def keep(self, path) -> None:
+        """Leave the file on disk as it is at the commit (its content is already the document's)."""
+        self._dirty.discard(self._key(path))
+
+    def rename(self, src, dst) -> None:
+        """Move `src` to `dst`, replacing `dst` if it exists (like Path.rename)."""
+        src, dst = self._key(src), self._key(dst)
+        if src == dst:
+            return
+        self.files[dst] = self.files.pop(src)
+        self.renames.append((src, dst))
+        self._dirty.discard(src)
+        self._dirty.add(dst)
+
+    def unlink(self, path) -> None:
+        key = self._key(path)
+        del self.files[key]
+        self._dirty.discard(key)
+
+    def glob(self, directory, pattern: str) -> List[Path]:
+        """Files of `directory` (not recursive) matching `pattern`, sorted."""
+        directory = self._key(directory)
+        return sorted(
+            Path(path) for path in self.files
+            if os.path.dirname(path) == directory and fnmatch.fnmatchcase(os.path.basename(path), pattern)
+        )
+
+    def commit(self, jobs: int = 1) -> int:
+        """Write the modified documents atomically and delete the ones removed. Returns the number written."""
+        def _write(path: str):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # unique temporary name: another run may be writing the same folder;
+            # created with mode 0o666 so the umask applies as for any new file
+            tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+            fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(self.files[path])
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+        written = sorted(self._dirty)
+        if jobs > 1 and len(written) > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                list(pool.map(_write, written))
+        else:
+            for path in written:
+                _write(path)
+
+        for path in sorted(self._on_disk - set(self.files)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self._on_disk = set(self.files)
+        self._dirty.clear()
+        return len(written)
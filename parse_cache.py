@@ -0,0 +1,192 @@
+# ros_interface_generator/parse_cache.py
+"""
+Persistent on-disk cache of parse results.
+
+Entries are grouped in bundles (one pickle file per bundle in the cache
+directory) and keyed by source path. An entry is reused when the file's
+mtime and size are unchanged, or when its content hash still matches. Every
+bundle is stamped with CACHE_VERSION, so a generator upgrade discards
+results produced by older code.
+
+One ParseCache can be shared by concurrent sessions: lookups of different
+files do not wait for each other (an entry is refreshed or stored under
+the lock of its file), a pruned bundle is replaced as a whole, and `save`
+pickles a snapshot of each modified bundle and swaps the file in atomically.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .sources import read_bytes, stamp
+
+# Modules whose code shapes the cached values: editing any of them invalidates the cache
+_CACHED_MODULES = ("proto_ast.py", "proto_parser.py", "extractor_sdvsidl.py", "utils.py", "parse_cache.py", "sources.py", "sdvsidl_parser.py")
+CACHE_FORMAT = 1
+
+
+def _compute_cache_version() -> str:
+    h = hashlib.sha1(f"format={CACHE_FORMAT}".encode())
+    here = Path(__file__).parent
+    for name in _CACHED_MODULES:
+        try:
+            h.update((here / name).read_bytes())
+        except OSError:
+            h.update(name.encode())
+    return h.hexdigest()
+
+
+CACHE_VERSION = _compute_cache_version()
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class ParseCache:
+    """
+    Bundled parse results stored under `cache_dir`, or kept in memory only
+    when `cache_dir` is None (a watching process).
+
+    Entry layout: {path: (mtime_ns, size, digest, key, value)} (the CRC-32 in place of
+    mtime_ns for archive members, see sources.stamp) where `key` is an
+    extra validity key chosen by the caller (e.g. the proto catalog fingerprint
+    for sdvsidl extractions).
+    """
+
+    def __init__(self, cache_dir: Optional[str]):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._bundles: Dict[str, Dict[str, Tuple]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()           # bundles table, dirty set, counters, file locks
+        self._save_lock = threading.Lock()      # one writer of the bundle files at a time
+        self._file_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def _bundle_path(self, bundle: str) -> str:
+        return os.path.join(self.cache_dir, f"{bundle}.pickle")
+
+    def _bundle(self, bundle: str) -> Dict[str, Tuple]:
+        entries = self._bundles.get(bundle)
+        if entries is None:
+            loaded = {}
+            if self.cache_dir is not None:
+                try:
+                    with open(self._bundle_path(bundle), "rb") as f:
+                        payload = pickle.load(f)
+                    if payload.get("version") == CACHE_VERSION:
+                        loaded = payload["entries"]
+                except Exception:
+                    # missing, truncated or produced by another generator version
+                    loaded = {}
+            with self._lock:
+                entries = self._bundles.setdefault(bundle, loaded)     # first loader wins
+        return entries
+
+    def _file_lock(self, bundle: str, path: str) -> threading.Lock:
+        with self._lock:
+            return self._file_locks.setdefault((bundle, path), threading.Lock())
+
+    def _store(self, bundle: str, path: str, entry: Tuple) -> None:
+        self._bundle(bundle)
+        with self._lock:
+            self._bundles[bundle][path] = entry
+            self._dirty.add(bundle)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, bundle: str, path: str, key: str = "") -> Optional[Any]:
+        """Cached value of `path`, or None if the file changed since it was stored."""
+        path = os.path.abspath(path)
+        with self._file_lock(bundle, path):
+            value = self._lookup(bundle, path, key)
+        self._count(value is not None)
+        return value
+
+    def _lookup(self, bundle: str, path: str, key: str) -> Optional[Any]:
+        entry = self._bundle(bundle).get(path)
+        if entry is None or entry[3] != key:
+            return None
+        mtime_ns, size, digest, _, value = entry
+        try:
+            current = stamp(path)
+        except OSError:
+            return None
+        if current != (mtime_ns, size):
+            # touched: fall back to the content hash
+            try:
+                data = read_bytes(path)
+            except OSError:
+                return None
+            if content_digest(data) != digest:
+                return None
+            self._store(bundle, path, (current[0], current[1], digest, key, value))
+        return value
+
+    def digest(self, bundle: str, path: str) -> Optional[str]:
+        """Content hash recorded for `path`, if any."""
+        entry = self._bundle(bundle).get(os.path.abspath(path))
+        return entry[2] if entry else None
+
+    def put(self, bundle: str, path: str, value: Any, data: Optional[bytes] = None, key: str = "") -> None:
+        """Store `value` parsed from `data`, the current content of `path` (read if not given)."""
+        path = os.path.abspath(path)
+        with self._file_lock(bundle, path):
+            if data is None:
+                data = read_bytes(path)
+            try:
+                current = stamp(path)
+            except OSError:
+                current = (0, -1)
+            self._store(bundle, path, (current[0], current[1], content_digest(data), key, value))
+
+    def prune(self, bundle: str, keep) -> None:
+        """Drop entries whose path is not in `keep`."""
+        self._bundle(bundle)
+        keep = {os.path.abspath(p) for p in keep}
+        with self._lock:
+            entries = self._bundles[bundle]
+            kept = {p: entry for p, entry in entries.items() if p in keep}
+            if len(kept) != len(entries):
+                self._bundles[bundle] = kept
+                self._dirty.add(bundle)
+
+    def save(self) -> None:
+        """Write the modified bundles, each atomically."""
+        if self.cache_dir is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                # snapshot: other sessions keep storing entries while the bundles are pickled
+                snapshots = {bundle: dict(self._bundles[bundle]) for bundle in self._dirty}
+                self._dirty.clear()
+            if not snapshots:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for bundle, entries in sorted(snapshots.items()):
+                target = self._bundle_path(bundle)
+                tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with open(tmp, "wb") as f:
+                        pickle.dump({"version": CACHE_VERSION, "entries": entries}, f,
+                                    protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp, target)
+                except BaseException:
+                    with self._lock:
+                        self._dirty.add(bundle)     # written by the next save
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+
+
+def bundle_name(kind: str, root: str) -> str:
+    """Bundle name of an input tree, e.g. proto-<hash of its absolute path>."""
+    return f"{kind}-{hashlib.sha1(os.path.abspath(root).encode()).hexdigest()[:16]}"
@@ -0,0 +1,139 @@
+# ros_interface_generator/planner.py
+"""
+Plan of a generation (--plan_json): what a run would write, computed in memory.
+
+GeneratorSession.plan runs the whole pipeline (extraction, conflict
+resolution, rendering, sanitizing, duplicate prefixes, manifest remap) on an
+empty OutputTree and never commits it. The report follows every output
+file through the names it was given:
+
+    {"inputs": {"proto_dir", "sdvsidl_files"},
+     "summary": {"files", "msg", "srv", "renamed", "dropped", "diagnostics": {severity: n}},
+     "files": [{"path", "kind", "top_level", "chain": [{"stage", "name"}...]}],
+     "dropped": [{"path", "kind", "chain", "reason"}],
+     "interfaces": [{"proto_message_name", "topic_hint", "event_name", "path"}],
+     "manifest": [row...], "diagnostics": [record...]}
+
+Chain stages, each listed only when it changes the name: "sdvsidl" (topic
+name and suffix) or "proto" (message name of a field type), "topic hint
+dedupe" (deduplicate_ros_filenames_by_topic_hint2), "conflict"
+(resolve_output_filename_conflict), "self-name" (a message using a type of
+its own name), then the renames of "sanitize" (remap_*_to_ros_convention)
+and "prefix duplicates" (ManifestTable.prefix_duplicates).
+A file replaced by a later one at the same path, or merged into an
+identical layout (--dedupe_layouts merge), is reported in `dropped`.
+"""
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .msg_generator import MsgPlan
+from .output_tree import OutputTree
+from .diagnostics import SEVERITIES
+
+
+def _chain(*steps: Tuple[str, str]) -> List[Dict[str, str]]:
+    """The steps that change the name (the first one always)."""
+    chain = []
+    for stage, name in steps:
+        if not chain or chain[-1]["name"] != name:
+            chain.append({"stage": stage, "name": name})
+    return chain
+
+
+def build_plan(sdvsidl_files: List[str], topics: list, plan: MsgPlan, tree: OutputTree,
+               stages: List[Tuple[str, int]], manifest: List[dict], other_files: List[str],
+               diagnostics: list) -> dict:
+    """
+    Report of an in-memory generation. `topics` are the (extracted, deduplicated,
+    plan node) triples of GeneratorSession._generate_all and `stages` the
+    (stage, first index in tree.renames) of the rename stages that followed.
+    """
+    top_level = {node: (extracted, fixed) for extracted, fixed, node in topics if node is not None}
+    current: Dict[str, dict] = {}      # path -> file entry, as the renames are replayed
+    dropped = []
+
+    def place(path: str, entry: dict, reason: str):
+        previous = current.get(path)
+        if previous is not None:
+            previous.update(path=path, reason=reason)
+            dropped.append(previous)
+        current[path] = entry
+
+    # written by the plan: .msg files in topological order, then the .srv files (as MsgPlan.emit)
+    owner = {node: path for path, node in plan.files.items()}
+    nodes = {}
+    for node in plan.topological_order():
+        if node not in top_level:
+            steps = [("proto", node.definition.name)]
+        else:
+            extracted, fixed = top_level[node]
+            steps = [("sdvsidl", extracted.ros_filename), ("topic hint dedupe", fixed.ros_filename)]
+        entry = {"path": None, "kind": "msg", "top_level": node.top_level,
+                 "chain": _chain(*steps, ("conflict", node.ros_filename), ("self-name", node.final_filename))}
+        nodes[node] = entry
+        if node in owner:
+            current[owner[node]] = entry
+        else:
+            entry.update(path=os.path.join(plan.output_dir, f"{node.final_filename}.msg"),
+                         reason="replaced by a later message planned at the same path")
+            dropped.append(entry)
+    for path, node in plan.srv_files.items():
+        place(path, {"path": None, "kind": "srv", "top_level": False,
+                     "chain": _chain(("rpc", node.method_name))}, "replaced by a later .srv at the same path")
+
+    for i, (stage, start) in enumerate(stages):
+        end = stages[i + 1][1] if i + 1 < len(stages) else len(tree.renames)
+        for src, dst in tree.renames[start:end]:
+            entry = current.pop(src)
+            entry["chain"].append({"stage": stage, "name": Path(dst).stem})
+            place(dst, entry, f"replaced by the {stage} rename of {Path(src).name}")
+
+    for path in sorted(set(current) - set(tree.files)):
+        entry = current.pop(path)
+        entry.update(path=path, reason="merged into an identical layout")
+        dropped.append(entry)
+
+    files = []
+    for path in sorted(current):
+        entry = current[path]
+        entry["path"] = path
+        files.append(entry)
+    files += [{"path": path, "kind": "doc" if path.endswith((".json", ".csv", ".txt")) else "template",
+               "top_level": False, "chain": []} for path in other_files]
+
+    interfaces = []
+    for extracted, fixed, node in topics:
+        interfaces.append({"proto_message_name": extracted.proto_message_name, "topic_hint": extracted.topic_hint,
+                           "event_name": extracted.event_name,
+                           "path": nodes[node]["path"] if node is not None else None})
+
+    records = [asdict(record) for record in diagnostics]
+    return {
+        "inputs": {"proto_dir": plan.proto_dir, "sdvsidl_files": sdvsidl_files},
+        "summary": {
+            "files": len(files),
+            "msg": sum(1 for entry in files if entry["kind"] == "msg"),
+            "srv": sum(1 for entry in files if entry["kind"] == "srv"),
+            "renamed": sum(1 for entry in files if len(entry["chain"]) > 1),
+            "dropped": len(dropped),
+            "diagnostics": {severity: sum(1 for r in records if r["severity"] == severity) for severity in SEVERITIES},
+        },
+        "files": files,
+        "dropped": dropped,
+        "interfaces": interfaces,
+        "manifest": manifest,
+        "diagnostics": records,
+    }
+
+
+def write_plan(report: dict, output_path: Optional[str]) -> None:
+    """Write the plan as JSON to `output_path` ("-": stdout)."""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output_path == "-":
+        print(text)
+        return
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
@@ -0,0 +1,239 @@
+# ros_interface_generator/profiler.py
+"""
+Stage timings, function timings and I/O counters of a generation run (--profile).
+
+Stages are the steps of session.GeneratorSession (`with PROFILER.stage("sanitize"):`);
+functions are timed by cProfile and reported per group (extract, resolve,
+render, sanitize, post-process). While profiling, files opened, bytes read
+and os.walk calls are counted; main adds the cache counters at the end.
+
+The summary table is written to `<doc_output>/profile_summary.txt`, with on
+request the raw cProfile stats (`profile.prof`, for pstats/snakeviz) and a
+speedscope evented profile of the stages (`profile.speedscope.json`).
+Extraction workers (--jobs > 1) run in other processes and are not profiled.
+cProfile, pstats and zipfile are only imported once profiling starts, and the
+I/O counters are installed for the profiled run only.
+"""
+import builtins
+import contextlib
+import io
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+from .constants import DUMP_FORMATS
+
+PROFILE_SUMMARY_FILENAME = "profile_summary.txt"
+PROFILE_STATS_FILENAME = "profile.prof"
+SPEEDSCOPE_FILENAME = "profile.speedscope.json"
+
+# Function timings reported per group: (module file, function name)
+FUNCTION_GROUPS: Dict[str, List[Tuple[str, str]]] = {
+    "extract": [("extractor_sdvsidl.py", "extract_topics_from_sdvsidl_file_list"),
+                ("extractor_sdvsidl.py", "extract_topics_from_sdvsidl2"),
+                ("extractor_sdvsidl.py", "deduplicate_ros_filenames_by_topic_hint2")],
+    "resolve": [("proto_parser.py", "ProtoCatalog.__init__"),
+                ("proto_parser.py", "find_proto_file_msg2"),
+                ("proto_parser.py", "_resolve_proto_file"),
+                ("proto_parser.py", "ProtoCatalog.find_service_rpc"),
+                ("enum_table.py", "EnumTable.lookup")],
+    "render": [("msg_generator.py", "MsgPlan.add_type"),
+               ("msg_generator.py", "MsgPlan.add_srv"),
+               ("msg_generator.py", "MsgPlan.render"),
+               ("msg_generator.py", "write_enum_block")],
+    "sanitize": [("sanitizer.py", "sanitize_interface_files")],
+    "post-process": [("manifest.py", "ManifestTable.prefixed_stems"),
+                     ("manifest.py", "ManifestTable.prefix_duplicates"),
+                     ("manifest.py", "ManifestTable.remap_to_ros_convention"),
+                     ("manifest.py", "ManifestTable.write"),
+                     ("output_tree.py", "OutputTree.commit")],
+}
+
+
+class IOCounters:
+    """Files opened (open, io.open, zip members), bytes of the files opened for reading and os.walk calls."""
+
+    def __init__(self):
+        self.files_opened = 0
+        self.files_read = 0
+        self.bytes_read = 0
+        self.walks = 0
+        self._open = io.open
+        self._zip_open = None
+        self._walk = os.walk
+
+    def _counting_open(self, file, mode="r", *args, **kwargs):
+        f = self._open(file, mode, *args, **kwargs)
+        self.files_opened += 1
+        if not any(c in mode for c in "wax+"):
+            self.files_read += 1
+            try:
+                self.bytes_read += os.fstat(f.fileno()).st_size
+            except (OSError, ValueError, AttributeError):
+                pass
+        return f
+
+    def _counting_zip_open(self, zf, name, mode="r", *args, **kwargs):
+        f = self._zip_open(zf, name, mode, *args, **kwargs)
+        self.files_opened += 1
+        if mode == "r":
+            self.files_read += 1
+            self.bytes_read += (zf.getinfo(name) if isinstance(name, str) else name).file_size
+        return f
+
+    def _counting_walk(self, *args, **kwargs):
+        self.walks += 1
+        return self._walk(*args, **kwargs)
+
+    @contextlib.contextmanager
+    def installed(self):
+        import zipfile
+        counters = self
+        self._zip_open = zipfile.ZipFile.open
+
+        def zip_open(zf, name, mode="r", *args, **kwargs):
+            return counters._counting_zip_open(zf, name, mode, *args, **kwargs)
+
+        builtins.open = io.open = self._counting_open
+        zipfile.ZipFile.open = zip_open
+        os.walk = self._counting_walk
+        try:
+            yield self
+        finally:
+            builtins.open = io.open = self._open
+            zipfile.ZipFile.open = self._zip_open
+            os.walk = self._walk
+
+
+class Profiler:
+    """Collects stage timings, counters and a cProfile of the run inside `profiling()`."""
+
+    def __init__(self):
+        self.enabled = False
+        self.stages: List[Tuple[str, float, float, int]] = []    # (name, start, end, depth), seconds from start
+        self.counters: Dict[str, int] = {}
+        self.io = IOCounters()
+        self._profile = None                            # cProfile.Profile once started
+        self._t0 = 0.0
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def profiling(self):
+        """Profile the `with` block; open, os.walk and ZipFile.open are only patched inside it."""
+        import cProfile
+        self.enabled = True
+        self._t0 = time.perf_counter()
+        self._profile = cProfile.Profile()
+        try:
+            with self.io.installed():
+                self._profile.enable()
+                try:
+                    yield self
+                finally:
+                    self._profile.disable()
+        finally:
+            self.enabled = False
+            self.counters.update({
+                "files opened": self.io.files_opened,
+                "files read": self.io.files_read,
+                "bytes read": self.io.bytes_read,
+                "os.walk calls": self.io.walks,
+            })
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter() - self._t0
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.stages.append((name, start, time.perf_counter() - self._t0, self._depth))
+
+    def count(self, name: str, value: int):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage_timings(self) -> List[Tuple[str, int, float]]:
+        """(stage, runs, total seconds), in order of first start."""
+        totals: Dict[str, List] = {}
+        for name, start, end, _ in sorted(self.stages, key=lambda s: s[1]):
+            entry = totals.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += end - start
+        return [(name, runs, total) for name, (runs, total) in totals.items()]
+
+    def function_timings(self) -> List[Tuple[str, str, int, float, float]]:
+        """(group, function, calls, cumulative s, own s) of FUNCTION_GROUPS, from the cProfile stats."""
+        if self._profile is None:
+            return []
+        import pstats
+        stats = pstats.Stats(self._profile).stats
+        by_name: Dict[Tuple[str, str], Tuple[int, float, float]] = {}
+        for (filename, _, funcname), (_, calls, own, cumulative, _) in stats.items():
+            key = (os.path.basename(filename), funcname)
+            previous = by_name.get(key, (0, 0.0, 0.0))
+            by_name[key] = (previous[0] + calls, previous[1] + cumulative, previous[2] + own)
+        rows = []
+        for group, functions in FUNCTION_GROUPS.items():
+            for module, function in functions:
+                # cProfile reports methods by their bare name (3.11) or qualified name (3.12+)
+                found = by_name.get((module, function)) or by_name.get((module, function.rpartition(".")[2]))
+                if found:
+                    rows.append((group, function, *found))
+        return rows
+
+    def summary(self) -> str:
+        lines = [f"{'Stage':<28}{'runs':>6}{'seconds':>12}"]
+        for name, runs, total in self.stage_timings():
+            lines.append(f"{name:<28}{runs:>6}{total:>12.3f}")
+        lines += ["", f"{'Group':<14}{'Function':<44}{'calls':>9}{'cum s':>10}{'own s':>10}"]
+        for group, function, calls, cumulative, own in self.function_timings():
+            lines.append(f"{group:<14}{function:<44}{calls:>9}{cumulative:>10.3f}{own:>10.3f}")
+        lines += ["", f"{'Counter':<36}{'value':>14}"]
+        for name, value in self.counters.items():
+            lines.append(f"{name:<36}{value:>14}")
+        return "\n".join(lines) + "\n"
+
+    def _speedscope(self) -> dict:
+        names = sorted({name for name, *_ in self.stages})
+        frames = {name: i for i, name in enumerate(names)}
+        events = []
+        for name, start, end, depth in self.stages:
+            # closes sort before opens at the same instant, outer stages open first and close last
+            events.append((start, 1, depth, {"type": "O", "frame": frames[name], "at": start}))
+            events.append((end, 0, -depth, {"type": "C", "frame": frames[name], "at": end}))
+        events.sort(key=lambda e: e[:3])
+        end_value = max((end for _, _, end, _ in self.stages), default=0.0)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in names]},
+            "profiles": [{
+                "type": "evented", "name": "ros_interface_generator stages", "unit": "seconds",
+                "startValue": 0, "endValue": end_value, "events": [e[3] for e in events],
+            }],
+            "name": "ros_interface_generator",
+            "exporter": "ros_interface_generator.profiler",
+        }
+
+    def write(self, doc_output: str, dump: str = "summary") -> List[str]:
+        """Write the summary table (and the requested dumps) into `doc_output`. Returns the paths written."""
+        os.makedirs(doc_output, exist_ok=True)
+        written = [os.path.join(doc_output, PROFILE_SUMMARY_FILENAME)]
+        with open(written[0], "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        if dump in ("cprofile", "all") and self._profile is not None:
+            written.append(os.path.join(doc_output, PROFILE_STATS_FILENAME))
+            self._profile.dump_stats(written[-1])
+        if dump in ("speedscope", "all"):
+            written.append(os.path.join(doc_output, SPEEDSCOPE_FILENAME))
+            with open(written[-1], "w", encoding="utf-8") as f:
+                json.dump(self._speedscope(), f)
+        return written
+
+
+# Disabled until main.py is run with --profile
+PROFILER = Profiler()
@@ -0,0 +1,539 @@
+# ros_interface_generator/proto_ast.py
+"""
+Single-pass lexer and parser turning a .proto file into a typed AST.
+
+Comments and string literals are consumed by the lexer, so braces inside them
+no longer disturb block boundaries. Every definition keeps the source offsets
+of its block so the legacy (block, file) lookups can still return the text.
+
+Nodes are slotted dataclasses and identifiers are interned: a catalog holds
+tens of thousands of fields sharing a few hundred type and option names.
+"""
+import re
+import sys
+from bisect import bisect_right
+from itertools import accumulate, chain
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+
+# One match per significant token: group 1 is the skipped blanks/comments, group 2 the token.
+# The empty \Z alternative keeps trailing comments from being re-scanned as tokens.
+TOKEN_RE = re.compile(r'''
+    ((?:\s+|//[^\n]*|/\*.*?\*/)*)
+    (
+        "[^"\\\n]*(?:\\.[^"\\\n]*)*"                   # string
+      | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+      | \.?[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*                  # identifier, possibly dotted
+      | [-+]?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)   # number
+      | \S                                                # symbol
+      | \Z
+    )
+''', re.VERBOSE | re.DOTALL)
+
+LABELS = ("repeated", "optional", "required")
+
+
+class ProtoSyntaxError(ValueError):
+    """Raised when a .proto file cannot be parsed."""
+
+    def __init__(self, message: str, path: str = "", line: int = 0):
+        super().__init__(f"{path}:{line}: {message}" if path else message)
+        self.path = path
+        self.line = line
+
+
+@dataclass(slots=True)
+class FieldNode:
+    name: str
+    type_name: str
+    number: int
+    label: str = ""                                     # "repeated" | "optional" | "required" | ""
+    options: Dict[str, str] = field(default_factory=dict)
+    oneof: str = ""                                     # name of the enclosing oneof, if any
+    key_type: str = ""                                  # set for map<key_type, type_name> fields
+    offset: int = 0
+
+    @property
+    def is_repeated(self) -> bool:
+        return self.label == "repeated"
+
+    @property
+    def is_map(self) -> bool:
+        return bool(self.key_type)
+
+    def option(self, name: str) -> Optional[str]:
+        """Value of the option whose last name component is `name`
+        (e.g. "repeated_field_max_count" for "(.sdv.vsidl.v1.repeated_field_max_count)")."""
+        return _find_option(self.options, name)
+
+
+@dataclass(slots=True)
+class EnumValueNode:
+    name: str
+    number: int
+    options: Dict[str, str] = field(default_factory=dict)
+    literal: str = ""           # the number as written, e.g. "0x1F"
+
+
+@dataclass(slots=True)
+class EnumNode:
+    name: str
+    full_name: str
+    values: List[EnumValueNode] = field(default_factory=list)
+    options: Dict[str, str] = field(default_factory=dict)
+    start: int = 0
+    end: int = 0
+
+
+@dataclass(slots=True)
+class MessageNode:
+    name: str
+    full_name: str
+    body: List[Union[FieldNode, "MessageNode", EnumNode]] = field(default_factory=list)   # source order
+    options: Dict[str, str] = field(default_factory=dict)
+    start: int = 0
+    end: int = 0
+
+    @property
+    def fields(self) -> List[FieldNode]:
+        return [e for e in self.body if isinstance(e, FieldNode)]
+
+    def iter_fields(self, nested: bool = True) -> Iterator[FieldNode]:
+        """
+        Fields in source order, oneof members included. With `nested`, fields of
+        nested messages are yielded where they appear, as the generators have
+        always consumed a message block.
+        """
+        for element in self.body:
+            if isinstance(element, FieldNode):
+                yield element
+            elif nested and isinstance(element, MessageNode):
+                yield from element.iter_fields(nested=True)
+
+
+@dataclass(slots=True)
+class RpcNode:
+    name: str
+    request_type: str
+    response_type: str
+    client_streaming: bool = False
+    server_streaming: bool = False
+    options: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ServiceNode:
+    name: str
+    full_name: str
+    rpcs: List[RpcNode] = field(default_factory=list)
+    options: Dict[str, str] = field(default_factory=dict)
+    start: int = 0
+    end: int = 0
+
+    def find_rpc(self, name: str) -> Optional[RpcNode]:
+        for rpc in self.rpcs:
+            if rpc.name == name:
+                return rpc
+        return None
+
+
+@dataclass
+class ProtoFileNode:
+    path: str
+    syntax: str = ""
+    package: str = ""
+    imports: List[str] = field(default_factory=list)
+    options: Dict[str, str] = field(default_factory=dict)
+    definitions: List[Union[MessageNode, EnumNode, ServiceNode]] = field(default_factory=list)   # source order
+    source: str = field(default="", repr=False)
+    _line_starts: Optional[List[int]] = field(default=None, repr=False)
+
+    def iter_messages(self) -> Iterator[MessageNode]:
+        """All messages, nested ones included, in source order of their headers."""
+        for node in self._walk(self.definitions):
+            if isinstance(node, MessageNode):
+                yield node
+
+    def iter_enums(self) -> Iterator[EnumNode]:
+        """All enums, nested ones included, in source order of their headers."""
+        for node in self._walk(self.definitions):
+            if isinstance(node, EnumNode):
+                yield node
+
+    @property
+    def services(self) -> List[ServiceNode]:
+        return [d for d in self.definitions if isinstance(d, ServiceNode)]
+
+    def block_text(self, node: Union[MessageNode, EnumNode, ServiceNode]) -> str:
+        """Source text of a definition, from its keyword to its closing brace."""
+        return self.source[node.start:node.end]
+
+    def line_of(self, offset: int) -> int:
+        """1-based line number of a source offset."""
+        if self._line_starts is None:
+            self._line_starts = [0] + [m.end() for m in re.finditer(r'\n', self.source)]
+        return bisect_right(self._line_starts, offset)
+
+    @classmethod
+    def _walk(cls, elements):
+        for element in elements:
+            if isinstance(element, (MessageNode, EnumNode, ServiceNode)):
+                yield element
+            if isinstance(element, MessageNode):
+                yield from cls._walk(element.body)
+
+
+def _find_option(options: Dict[str, str], name: str) -> Optional[str]:
+    for key, value in options.items():
+        if key == name or key.rsplit('.', 1)[-1].rstrip(')') == name:
+            return value
+    return None
+
+
+def tokenize(content: str) -> Tuple[List[str], List[int]]:
+    """Return parallel lists (texts, ends) of the significant tokens; a token
+    starts at ends[i] - len(texts[i])."""
+    pairs = TOKEN_RE.findall(content)
+    while pairs and not pairs[-1][1]:
+        pairs.pop()
+    texts = [token for _, token in pairs]
+    # cumulative lengths of (skipped, token) pieces give the end of every token
+    ends = list(accumulate(map(len, chain.from_iterable(pairs))))[1::2]
+    return texts, ends
+
+
+def token_kind(text: str) -> str:
+    """Kind of a token returned by tokenize(): string, ident, number or symbol."""
+    c = text[0]
+    if c == '"' or c == "'":
+        return "string" if len(text) > 1 else "symbol"
+    if c.isalpha() or c == '_' or (c == '.' and len(text) > 1 and (text[1].isalpha() or text[1] == '_')):
+        return "ident"
+    if c.isdigit() or (len(text) > 1 and c in "+-."):
+        return "number"
+    return "symbol"
+
+
+class _Parser:
+    def __init__(self, content: str, path: str):
+        self.content = content
+        self.path = path
+        self.texts, self.ends = tokenize(content)
+        self.pos = 0
+        self.count = len(self.texts)
+
+    # -- token helpers -------------------------------------------------------
+    def error(self, message: str) -> ProtoSyntaxError:
+        offset = self.offset() if self.pos < self.count else len(self.content)
+        return ProtoSyntaxError(message, self.path, self.content.count('\n', 0, offset) + 1)
+
+    def offset(self) -> int:
+        """Source offset of the current token."""
+        return self.ends[self.pos] - len(self.texts[self.pos])
+
+    def peek(self, ahead: int = 0) -> str:
+        i = self.pos + ahead
+        return self.texts[i] if i < self.count else ""
+
+    def peek_kind(self, ahead: int = 0) -> str:
+        i = self.pos + ahead
+        return token_kind(self.texts[i]) if i < self.count else ""
+
+    def next(self) -> str:
+        if self.pos >= self.count:
+            raise self.error("unexpected end of file")
+        text = self.texts[self.pos]
+        self.pos += 1
+        return text
+
+    def expect(self, text: str) -> None:
+        if self.peek() != text:
+            raise self.error(f"expected '{text}', got '{self.peek()}'")
+        self.pos += 1
+
+    def ident(self) -> str:
+        if self.peek_kind() != "ident":
+            raise self.error(f"expected identifier, got '{self.peek()}'")
+        text = self.texts[self.pos]
+        self.pos += 1
+        return sys.intern(text)
+
+    def skip_statement(self) -> None:
+        """Skip an unsupported statement: up to ';' or over a balanced {...} block."""
+        depth = 0
+        while self.pos < self.count:
+            text = self.texts[self.pos]
+            self.pos += 1
+            if text == '{':
+                depth += 1
+            elif text == '}':
+                depth -= 1
+                if depth <= 0:
+                    return
+            elif text == ';' and depth == 0:
+                return
+
+    def skip_balanced(self, open_: str, close: str) -> int:
+        """Skip from an opening symbol to its matching closing one; return the end offset."""
+        depth = 0
+        while self.pos < self.count:
+            text = self.texts[self.pos]
+            self.pos += 1
+            if text == open_:
+                depth += 1
+            elif text == close:
+                depth -= 1
+                if depth == 0:
+                    return self.ends[self.pos - 1]
+        raise self.error(f"unbalanced '{open_}'")
+
+    # -- grammar -------------------------------------------------------------
+    def parse_file(self) -> ProtoFileNode:
+        node = ProtoFileNode(path=self.path, source=self.content)
+        while self.pos < self.count:
+            word = self.peek()
+            if word == "syntax" or word == "edition":
+                self.next()
+                self.expect('=')
+                node.syntax = self.constant()
+                self.expect(';')
+            elif word == "package":
+                self.next()
+                node.package = self.ident()
+                self.expect(';')
+            elif word == "import":
+                self.next()
+                if self.peek() in ("public", "weak"):
+                    self.next()
+                node.imports.append(self.constant())
+                self.expect(';')
+            elif word == "option":
+                self.option_statement(node.options)
+            elif word == "message":
+                node.definitions.append(self.message(node.package))
+            elif word == "enum":
+                node.definitions.append(self.enum(node.package))
+            elif word == "service":
+                node.definitions.append(self.service(node.package))
+            elif word == ';':
+                self.next()
+            else:
+                self.skip_statement()
+        return node
+
+    def message(self, scope: str) -> MessageNode:
+        start = self.offset()
+        self.expect("message")
+        name = self.ident()
+        node = MessageNode(name=name, full_name=f"{scope}.{name}" if scope else name, start=start)
+        self.expect('{')
+        while True:
+            word = self.peek()
+            if word == '}':
+                break
+            if word == "message":
+                node.body.append(self.message(node.full_name))
+            elif word == "enum":
+                node.body.append(self.enum(node.full_name))
+            elif word == "oneof":
+                self.next()
+                oneof_name = self.ident()
+                self.expect('{')
+                while self.peek() != '}':
+                    if self.peek() == "option":
+                        self.option_statement({})
+                    elif self.peek() == ';':
+                        self.next()
+                    else:
+                        node.body.append(self.field(oneof_name))
+                self.expect('}')
+            elif word == "option":
+                self.option_statement(node.options)
+            elif word == "":
+                raise self.error(f"unterminated message '{name}'")
+            elif word in ("reserved", "extensions", "extend", ';'):
+                self.skip_statement()
+            else:
+                node.body.append(self.field())
+        node.end = self.ends[self.pos]
+        self.expect('}')
+        return node
+
+    def field(self, oneof: str = "") -> FieldNode:
+        offset = self.offset() if self.pos < self.count else 0
+        label = ""
+        if self.peek() in LABELS and self.peek_kind(1) == "ident":
+            label = self.next()
+        key_type = ""
+        if self.peek() == "map" and self.peek(1) == '<':
+            self.next()
+            self.expect('<')
+            key_type = self.ident()
+            self.expect(',')
+            type_name = self.ident()
+            self.expect('>')
+        else:
+            type_name = self.ident()
+        name = self.ident()
+        self.expect('=')
+        number = self.integer()
+        options = self.field_options()
+        self.expect(';')
+        return FieldNode(name=name, type_name=type_name, number=number, label=label,
+                         options=options, oneof=oneof, key_type=key_type, offset=offset)
+
+    def enum(self, scope: str) -> EnumNode:
+        start = self.offset()
+        self.expect("enum")
+        name = self.ident()
+        node = EnumNode(name=name, full_name=f"{scope}.{name}" if scope else name, start=start)
+        self.expect('{')
+        while True:
+            word = self.peek()
+            if word == '}':
+                break
+            if word == "option":
+                self.option_statement(node.options)
+            elif word == "":
+                raise self.error(f"unterminated enum '{name}'")
+            elif word in ("reserved", ';'):
+                self.skip_statement()
+            else:
+                value_name = self.ident()
+                self.expect('=')
+                literal = self.peek()
+                number = self.integer()
+                options = self.field_options()
+                self.expect(';')
+                node.values.append(EnumValueNode(value_name, number, options, literal))
+        node.end = self.ends[self.pos]
+        self.expect('}')
+        return node
+
+    def service(self, scope: str) -> ServiceNode:
+        start = self.offset()
+        self.expect("service")
+        name = self.ident()
+        node = ServiceNode(name=name, full_name=f"{scope}.{name}" if scope else name, start=start)
+        self.expect('{')
+        while True:
+            word = self.peek()
+            if word == '}':
+                break
+            if word == "option":
+                self.option_statement(node.options)
+            elif word == "rpc":
+                node.rpcs.append(self.rpc())
+            elif word == "":
+                raise self.error(f"unterminated service '{name}'")
+            else:
+                self.skip_statement()
+        node.end = self.ends[self.pos]
+        self.expect('}')
+        return node
+
+    def rpc(self) -> RpcNode:
+        self.expect("rpc")
+        name = self.ident()
+        self.expect('(')
+        client_streaming = self.peek() == "stream" and self.peek_kind(1) == "ident"
+        if client_streaming:
+            self.next()
+        request_type = self.ident()
+        self.expect(')')
+        self.expect("returns")
+        self.expect('(')
+        server_streaming = self.peek() == "stream" and self.peek_kind(1) == "ident"
+        if server_streaming:
+            self.next()
+        response_type = self.ident()
+        self.expect(')')
+        node = RpcNode(name, request_type, response_type, client_streaming, server_streaming)
+        if self.peek() == '{':
+            self.next()
+            while self.peek() != '}':
+                if self.peek() == "option":
+                    self.option_statement(node.options)
+                elif self.peek() == "":
+                    raise self.error(f"unterminated rpc '{name}'")
+                else:
+                    self.skip_statement()
+            self.expect('}')
+        elif self.peek() == ';':
+            self.next()
+        return node
+
+    def integer(self) -> int:
+        text = self.next()
+        digits = text.lstrip("+-")
+        try:
+            if len(digits) > 1 and digits[0] == "0" and digits[1] not in "xX":
+                value = int(digits, 8)      # octal literal, e.g. 017
+                return -value if text.startswith("-") else value
+            return int(text, 0)
+        except ValueError:
+            self.pos -= 1
+            raise self.error(f"expected integer, got '{text}'") from None
+
+    def option_name(self) -> str:
+        parts = []
+        while True:
+            if self.peek() == '(':
+                self.next()
+                parts.append(f"({self.ident()})")
+                self.expect(')')
+            else:
+                parts.append(self.ident())
+            if self.peek().startswith('.') and self.peek_kind() == "ident":
+                continue
+            return sys.intern("".join(parts))
+
+    def option_statement(self, options: Dict[str, str]) -> None:
+        self.expect("option")
+        name = self.option_name()
+        self.expect('=')
+        options[name] = self.option_value()
+        self.expect(';')
+
+    def field_options(self) -> Dict[str, str]:
+        options: Dict[str, str] = {}
+        if self.peek() != '[':
+            return options
+        self.next()
+        while True:
+            name = self.option_name()
+            self.expect('=')
+            options[name] = self.option_value()
+            if self.peek() == ',':
+                self.next()
+                continue
+            self.expect(']')
+            return options
+
+    def option_value(self) -> str:
+        if self.peek() == '{':
+            start = self.offset()
+            end = self.skip_balanced('{', '}')
+            return self.content[start:end]
+        return self.constant()
+
+    def constant(self) -> str:
+        kind = self.peek_kind()
+        if kind == "string":
+            # adjacent literals are concatenated
+            parts = []
+            while self.peek_kind() == "string":
+                parts.append(self.next()[1:-1])
+            return "".join(parts)
+        if kind in ("ident", "number"):
+            return self.next()
+        if self.peek() == '-' and self.pos + 1 < self.count:
+            self.next()
+            return '-' + self.next()
+        raise self.error(f"expected constant, got '{self.peek()}'")
+
+
+def parse_proto(content: str, path: str = "") -> ProtoFileNode:
+    """Parse the text of a .proto file. Raises ProtoSyntaxError on malformed input."""
+    return _Parser(content, path).parse_file()
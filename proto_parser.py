@@ -1,55 +1,358 @@
 # ros_interface_generator/proto_parser.py
 import os
-import re
-from typing import Optional, Dict, List, Tuple,Optional
+import copy
+import hashlib
+import threading
+from typing import Optional, Dict, List, Tuple, NamedTuple, Union
+from collections import defaultdict
 from pathlib import Path
-            
-                        
+from .proto_ast import parse_proto, ProtoSyntaxError, ProtoFileNode, MessageNode, EnumNode, ServiceNode, RpcNode
+from .parse_cache import ParseCache, bundle_name, content_digest
+from .sources import forget_archive, read_bytes, resolve_root, split_archive_path, tree_stamp, walk
+
+
+class ProtoDefinition(NamedTuple):
+    """A message, enum or service block found in a .proto file."""
+    kind: str                   # "message" | "enum" | "service"
+    name: str
+    file: str                   # basename of the .proto file
+    path: str                   # os.path.join(root, file), as os.walk reports it
+    package: str
+    segments: Tuple[str, ...]   # directory parts relative to proto_dir
+    pubsub: bool                # True if a "pubsub" segment is in the directory path
+    block: str
+    walk_rank: int              # position of the file in os.walk order
+    sorted_rank: int            # position of the file in a sorted (dirs + files) walk
+    node: Union[MessageNode, EnumNode, ServiceNode]
+    line: int = 0               # line of the block header in the .proto file
+
+    def location(self, offset: Optional[int] = None) -> str:
+        """'<rel_path>:<line>' of the block, or of a source offset inside it (e.g. a field)."""
+        line = self.line
+        if offset is not None:
+            line += self.block.count("\n", 0, max(offset - self.node.start, 0))
+        return f"{self.rel_path}:{line}"
+
+    @property
+    def rel_path(self) -> str:
+        """Path of the .proto file relative to proto_dir, '/'-separated."""
+        return "/".join(self.segments + (self.file,))
+
+
+class RpcDefinition(NamedTuple):
+    """An rpc of a service with its request and response types."""
+    name: str
+    service: ProtoDefinition
+    request_type: str
+    response_type: str
+    node: RpcNode
+
+
+def _sorted_walk_key(rel_path: str) -> Tuple[Tuple[int, str], ...]:
+    """Order key reproducing os.walk with dirs.sort() and sorted files:
+    files of a directory come before its sub-directories."""
+    parts = Path(rel_path).parts
+    return tuple((1, p) for p in parts[:-1]) + ((0, parts[-1]),)
+
+
+class ProtoCatalog:
+    """
+    Index of every message, enum, service and rpc of a proto tree.
+
+    The tree is walked and each .proto file is read and parsed (proto_ast) exactly
+    once; the lookup functions of this module then answer from the index instead
+    of walking `proto_dir` again. Definitions are kept per name in os.walk order, which is
+    the order the lookups have always scanned files in.
+
+    With a ParseCache, the ASTs of unchanged files are loaded from disk instead of
+    being parsed again. `fingerprint` identifies the content of the whole tree and
+    `source_stamp` the file stamps it was built from (see `is_current`).
+
+    `refreshed` derives the catalog of the same tree after some files were
+    edited in place, indexing those files only.
+    """
+
+    _INDEXES = ("messages", "enums", "services", "rpcs", "service_rpcs")    # filled by _index_file
+
+    def __init__(self, proto_dir: str, cache: Optional[ParseCache] = None):
+        self.proto_dir = resolve_root(proto_dir)
+        self.source_stamp = tree_stamp(self.proto_dir, ".proto")
+        self.fingerprint = ""
+        self.messages: Dict[str, List[ProtoDefinition]] = defaultdict(list)
+        self.enums: Dict[str, List[ProtoDefinition]] = defaultdict(list)
+        self.services: Dict[str, List[ProtoDefinition]] = defaultdict(list)
+        self.rpcs: Dict[str, List[RpcDefinition]] = defaultdict(list)
+        # (service name, method name) -> rpcs, in os.walk order of their service
+        self.service_rpcs: Dict[Tuple[str, str], List[RpcDefinition]] = defaultdict(list)
+        self.file_count = 0
+        # find_proto_file_msg2 results, misses included: {(message_name, topic_hint, top_level): file or None}
+        self.file_resolutions: Dict[Tuple[str, str, bool], Optional[str]] = {}
+        self.resolution_hits = 0
+        self.resolution_misses = 0
+        self._stats_lock = threading.Lock()     # counters shared by concurrent sessions
+        self._ranks: Dict[str, Tuple[str, str, int, int]] = {}     # path -> (root, file, walk rank, sorted rank)
+        self._digests: Dict[str, str] = {}      # content digest of every indexed file, in walk order
+        self._indexed: Dict[str, Dict[str, set]] = {}    # path -> {index attribute: keys the file added}
+        self.refreshed_keys: Dict[str, set] = {}    # index attribute -> keys changed by `refreshed`
+        self._load(cache)
+
+    def is_current(self) -> bool:
+        """True if no .proto file was added, removed or modified since the catalog was built."""
+        try:
+            return tree_stamp(self.proto_dir, ".proto") == self.source_stamp
+        except OSError:
+            return False
+
+    def _load(self, cache: Optional[ParseCache]):
+        entries = []
+        for root, _, files in walk(self.proto_dir):
+            for file in sorted(files):
+                if file.endswith(".proto"):
+                    entries.append((root, file))
+
+        sorted_ranks = {
+            i: rank for rank, i in enumerate(sorted(
+                range(len(entries)),
+                key=lambda i: _sorted_walk_key(os.path.relpath(os.path.join(*entries[i]), self.proto_dir))))
+        }
+
+        for walk_rank, (root, file) in enumerate(entries):
+            path = os.path.join(root, file)
+            self._ranks[path] = (root, file, walk_rank, sorted_ranks[walk_rank])
+            self._read_file(path, cache)
+
+        self.fingerprint = self._fingerprint()
+        if cache:
+            cache.prune(bundle_name("proto", self.proto_dir), self._ranks.keys())
+
+    def _read_file(self, path: str, cache: Optional[ParseCache], reparse: bool = False) -> None:
+        """Index the file at `path` (parsed, or from `cache` unless `reparse`); unreadable files are skipped."""
+        bundle = bundle_name("proto", self.proto_dir)
+        ast = cache.get(bundle, path) if cache and not reparse else None
+        if ast is None:
+            try:
+                data = read_bytes(path)
+                ast = parse_proto(data.decode('utf-8'), path)
+            except (UnicodeDecodeError, OSError):
+                return
+            except ProtoSyntaxError as e:
+                print(f"Warning: {e} → file not indexed")
+                return
+            digest = content_digest(data)
+            if cache:
+                cache.put(bundle, path, ast, data)
+        else:
+            digest = cache.digest(bundle, path)
+        self._digests[path] = digest
+        self.file_count += 1
+        root, file, walk_rank, sorted_rank = self._ranks[path]
+        self._index_file(ast, root, file, path, walk_rank, sorted_rank)
+
+    def _fingerprint(self) -> str:
+        fingerprint = hashlib.sha1()
+        for path, digest in self._digests.items():
+            fingerprint.update(f"{os.path.relpath(path, self.proto_dir)}\0{digest}\0".encode())
+        return fingerprint.hexdigest()
+
+    def refreshed(self, paths: List[str], cache: Optional[ParseCache] = None) -> Optional["ProtoCatalog"]:
+        """
+        Catalog of the tree after the .proto files `paths` were modified in place: a
+        copy of this one where only those files are read again. Returns None when
+        .proto files were added or removed (or for an archive): build a new catalog.
+        """
+        if split_archive_path(self.proto_dir) is not None:
+            return None
+        try:
+            stamp = tree_stamp(self.proto_dir, ".proto")
+        except OSError:
+            return None
+        if [path for path, _, _ in stamp] != list(self._ranks):
+            return None
+
+        changed = {os.path.abspath(path) for path in paths}
+        paths = [path for path in self._ranks if os.path.abspath(path) in changed]
+        catalog = copy.copy(self)
+        catalog.source_stamp = stamp
+        catalog.file_resolutions = {}       # lookups may resolve differently now
+        catalog.resolution_hits = catalog.resolution_misses = 0
+        catalog._stats_lock = threading.Lock()
+        catalog._digests = dict(self._digests)
+        catalog._indexed = dict(self._indexed)
+        for attribute in self._INDEXES:
+            setattr(catalog, attribute, defaultdict(list, {k: list(v) for k, v in getattr(self, attribute).items()}))
+
+        touched = defaultdict(set)
+        for path in paths:
+            for attribute, keys in catalog._indexed.pop(path, {}).items():
+                index = getattr(catalog, attribute)
+                for key in keys:
+                    index[key] = [d for d in index[key] if _definition_path(d) != path]
+                touched[attribute] |= keys
+            if catalog._digests.pop(path, None) is not None:
+                catalog.file_count -= 1
+            catalog._read_file(path, cache, reparse=True)
+            for attribute, keys in catalog._indexed.get(path, {}).items():
+                touched[attribute] |= keys
+
+        # same order as a full build: files in walk order, definitions in file order
+        catalog._digests = {path: catalog._digests[path] for path in self._ranks if path in catalog._digests}
+        for attribute, keys in touched.items():
+            index = getattr(catalog, attribute)
+            for key in keys:
+                index[key].sort(key=lambda d: self._ranks[_definition_path(d)][2])
+                if not index[key]:
+                    del index[key]
+        catalog.fingerprint = catalog._fingerprint()
+        catalog.refreshed_keys = dict(touched)
+        return catalog
+
+    def _index_file(self, ast: ProtoFileNode, root: str, file: str, path: str, walk_rank: int, sorted_rank: int):
+        segments = tuple(p for p in Path(os.path.relpath(root, self.proto_dir)).parts if p != ".")
+        pubsub = any(part == "pubsub" for part in Path(root).parts)
+        indexed = self._indexed[path] = defaultdict(set)
+
+        def _definition(kind: str, node) -> ProtoDefinition:
+            return ProtoDefinition(
+                kind=kind,
+                name=node.name,
+                file=file,
+                path=path,
+                package=ast.package,
+                segments=segments,
+                pubsub=pubsub,
+                block=ast.block_text(node),
+                walk_rank=walk_rank,
+                sorted_rank=sorted_rank,
+                node=node,
+                line=ast.line_of(node.start),
+            )
+
+        # messages and services: the lookups only ever used the first block of a file
+        seen = set()
+        for node in ast.iter_messages():
+            if node.name not in seen:
+                seen.add(node.name)
+                self.messages[node.name].append(_definition("message", node))
+                indexed["messages"].add(node.name)
+
+        # enums: every block of the first matching file is returned
+        for node in ast.iter_enums():
+            self.enums[node.name].append(_definition("enum", node))
+            indexed["enums"].add(node.name)
+
+        seen = set()
+        for node in ast.services:
+            if node.name in seen:
+                continue
+            seen.add(node.name)
+            service = _definition("service", node)
+            self.services[node.name].append(service)
+            indexed["services"].add(node.name)
+            for rpc in node.rpcs:
+                if service.node.find_rpc(rpc.name) is rpc:
+                    definition = RpcDefinition(rpc.name, service, rpc.request_type, rpc.response_type, rpc)
+                    self.rpcs[rpc.name].append(definition)
+                    self.service_rpcs[(node.name, rpc.name)].append(definition)
+                    indexed["rpcs"].add(rpc.name)
+                    indexed["service_rpcs"].add((node.name, rpc.name))
+
+    def find_messages(self, message_name: str) -> List[ProtoDefinition]:
+        """Definitions of `message_name`, in os.walk order (one per file)."""
+        return self.messages.get(message_name, [])
+
+    def find_messages_sorted(self, message_name: str) -> List[ProtoDefinition]:
+        """Definitions of `message_name`, in sorted traversal order (one per file)."""
+        return sorted(self.find_messages(message_name), key=lambda d: d.sorted_rank)
+
+    def find_enums(self, enum_name: str) -> List[ProtoDefinition]:
+        return self.enums.get(enum_name, [])
+
+    def find_services(self, service_name: str) -> List[ProtoDefinition]:
+        return self.services.get(service_name, [])
+
+    def find_service_rpc(self, service_name: str, method_name: str, topic_hint: str = "") -> Optional[RpcDefinition]:
+        """Method `method_name` of the first service `service_name` whose file contains `topic_hint`."""
+        for rpc in self.service_rpcs.get((service_name, method_name), ()):
+            if not topic_hint or topic_hint in rpc.service.file:
+                return rpc
+        return None
+
+    def find_rpc(self, service: ProtoDefinition, method_name: str) -> Optional[RpcDefinition]:
+        for rpc in self.rpcs.get(method_name, []):
+            if rpc.service is service:
+                return rpc
+        return None
+
+
+def _definition_path(definition: Union[ProtoDefinition, RpcDefinition]) -> str:
+    return definition.service.path if isinstance(definition, RpcDefinition) else definition.path
+
+
+# One catalog per proto_dir, built on first lookup
+PROTO_CATALOGS: Dict[str, ProtoCatalog] = {}
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_proto_catalog(proto_dir, cache: Optional[ParseCache] = None, revalidate: bool = False) -> ProtoCatalog:
+    """
+    Return the catalog of `proto_dir`, building it on first use
+    (through `cache` when given). With `revalidate`, a catalog whose .proto
+    files changed since it was built is built again. A ProtoCatalog may be
+    passed directly in place of a directory.
+    """
+    if isinstance(proto_dir, ProtoCatalog):
+        return proto_dir
+    catalog = PROTO_CATALOGS.get(proto_dir)
+    stale = catalog if catalog is not None and revalidate and not catalog.is_current() else None
+    if catalog is None or stale is not None:
+        with _CATALOG_LOCK:     # concurrent sessions build a shared catalog once
+            catalog = PROTO_CATALOGS.get(proto_dir)
+            if catalog is None or catalog is stale:
+                if stale is not None:
+                    forget_archive(stale.proto_dir)
+                catalog = ProtoCatalog(proto_dir, cache)
+                PROTO_CATALOGS[proto_dir] = catalog
+    return catalog
+
+
 def find_proto_file_msg2(proto_dir, message_name, topic_hint: str = "", top_level: bool = False):
-    message_pattern = re.compile(r'\bmessage\s+' + re.escape(message_name) + r'\s*{')
+    """
+    Name of the .proto file defining `message_name`, or None.
+    Results (misses included) are memoized in the catalog, see `resolution_stats`.
+    """
+    catalog = get_proto_catalog(proto_dir)
+    key = (message_name, topic_hint, top_level)
+    if key in catalog.file_resolutions:
+        with catalog._stats_lock:
+            catalog.resolution_hits += 1
+        return catalog.file_resolutions[key]
+    with catalog._stats_lock:
+        catalog.resolution_misses += 1
+    res = _resolve_proto_file(catalog, message_name, topic_hint, top_level)
+    catalog.file_resolutions[key] = res
+    return res
+
+
+def _resolve_proto_file(catalog: ProtoCatalog, message_name, topic_hint: str, top_level: bool):
+    candidates = catalog.find_messages_sorted(message_name)
 
     # Split the hint into segments: "sdv.chassis.stand_still_assist" -> ["sdv","chassis","stand_still_assist"]
     segments = [p for p in topic_hint.split('.') if p]
 
-    def _has_pubsub(root: str) -> bool:
-        # test by path segment
-        return any(part == "pubsub" for part in Path(root).parts)
-
     def _search_with_hint(hint_subpath: str):
-        """Traverse proto_dir applying top_level + path filtering by hint_subpath (if non-empty).
+        """Scan the definitions applying top_level + path filtering by hint_subpath (if non-empty).
            Returns the matched .proto file, otherwise None.
         """
-        for root, dirs, files in os.walk(proto_dir):
-            dirs.sort()                 # deterministic traversal
-            files = sorted(files)
-
+        for definition in candidates:
             # Apply top_level filter on the path (by "pubsub" segment)
-            for file in files:
-                if not file.endswith(".proto"):
-                    continue
-                has_pub = _has_pubsub(root)
-                if top_level and not has_pub:
-                    continue
-                if not top_level and has_pub:
-                    continue
-
-                path = os.path.join(root, file)
-
-                # Filter by hint subpath (case-insensitive)
-                if hint_subpath:
-                    norm_path = Path(path).as_posix()
-                    if hint_subpath not in norm_path:
-                        continue
-
-                # Read and search for the message
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                except Exception:
-                    continue
-
-                if message_pattern.search(content):
-                    return file  
+            if definition.pubsub != top_level:
+                continue
+
+            # Filter by hint subpath
+            if hint_subpath and hint_subpath not in Path(definition.path).as_posix():
+                continue
+
+            return definition.file
 
         return None
 
@@ -67,154 +370,71 @@ def find_proto_file_msg2(proto_dir, message_name, topic_hint: str = "", top_leve
 
     # 3) Strategy fallback: if top_level=True, retry with top_level=False (using the same reduction logic)
     if top_level:
-        return find_proto_file_msg2(proto_dir, message_name, topic_hint, top_level=False)
+        return find_proto_file_msg2(catalog, message_name, topic_hint, top_level=False)
 
     # Not found
     return None
 
+
+def resolution_stats(proto_dir, since: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Counters of the find_proto_file_msg2 memo of a catalog; with `since` (earlier
+    stats of the same catalog), what was added since then, e.g. by one run.
+    """
+    catalog = get_proto_catalog(proto_dir)
+    with catalog._stats_lock:
+        stats = {
+            "hits": catalog.resolution_hits,
+            "misses": catalog.resolution_misses,
+            "entries": len(catalog.file_resolutions),
+            "not_found": sum(1 for res in list(catalog.file_resolutions.values()) if res is None),
+        }
+    if since is not None:
+        stats = {name: value - since.get(name, 0) for name, value in stats.items()}
+    return stats
+
+
+def find_message_definition_with_hint(proto_dir, message_name, topic_hint="", top_level=False) -> Optional[ProtoDefinition]:
+    for definition in get_proto_catalog(proto_dir).find_messages(message_name):
+        file = definition.file
+        if (not topic_hint or topic_hint in file) and (not top_level or 'topics' in file):
+            return definition
+    return None
+
+
+def find_message_definition(proto_dir, message_name) -> Optional[ProtoDefinition]:
+    for definition in get_proto_catalog(proto_dir).find_messages(message_name):
+        return definition
+    return None
+
+
 def find_message_block_with_hint(proto_dir, message_name, topic_hint="",top_level=False):
-    message_pattern = re.compile(r'message\s+' + re.escape(message_name) + r'\s*{')
-    for root, _, files in os.walk(proto_dir):
-        for file in sorted(files):
-            if file.endswith(".proto") and (not topic_hint or topic_hint in file) and (not top_level or 'topics' in file):
-
-                path = os.path.join(root, file)
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    match = message_pattern.search(content)
-                    if match:
-                        start_idx = match.start()
-                        brace_count = 0
-                        end_idx = start_idx
-                        inside_message = False
-                        while end_idx < len(content):
-                            c = content[end_idx]
-                            if c == '{':
-                                brace_count += 1
-                                inside_message = True
-                            elif c == '}':
-                                brace_count -= 1
-                                if brace_count == 0 and inside_message:
-                                    end_idx += 1
-                                    break
-                            end_idx += 1
-                        return content[start_idx:end_idx],file
-                except Exception:
-                    continue
-    return None,None
+    definition = find_message_definition_with_hint(proto_dir, message_name, topic_hint, top_level)
+    return (definition.block, definition.file) if definition else (None, None)
 
 
 def find_message_block(proto_dir, message_name):
-    message_pattern = re.compile(r'message\s+' + re.escape(message_name) + r'\s*{')
-    for root, _, files in os.walk(proto_dir):
-        for file in sorted(files):
-            if file.endswith(".proto"):
-                path = os.path.join(root, file)
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    match = message_pattern.search(content)
-                    if match:
-                        start_idx = match.start()
-                        brace_count = 0
-                        end_idx = start_idx
-                        inside_message = False
-                        while end_idx < len(content):
-                            c = content[end_idx]
-                            if c == '{':
-                                brace_count += 1
-                                inside_message = True
-                            elif c == '}':
-                                brace_count -= 1
-                                if brace_count == 0 and inside_message:
-                                    end_idx += 1
-                                    break
-                            end_idx += 1
-                        return content[start_idx:end_idx],file
-                except (UnicodeDecodeError, OSError):
-                    continue
-    return None,None
+    definition = find_message_definition(proto_dir, message_name)
+    return (definition.block, definition.file) if definition else (None, None)
 
 
 def find_enum_blocks(proto_dir, base_type):
-    enum_header_pattern = re.compile(r'enum\s+(' + re.escape(base_type) + r')\s*{')
-
-    results = {}
-
-    for root, _, files in os.walk(proto_dir):
-        for file in sorted(files):
-            if file.endswith(".proto"):
-                path = os.path.join(root, file)
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    matches = []
-                    for match in enum_header_pattern.finditer(content):
-                        enum_name = match.group(1)
-                        start_idx = match.start()
-                        brace_count = 0
-                        end_idx = start_idx
-                        inside_enum = False
-                        while end_idx < len(content):
-                            c = content[end_idx]
-                            if c == '{':
-                                brace_count += 1
-                                inside_enum = True
-                            elif c == '}':
-                                brace_count -= 1
-                                if brace_count == 0 and inside_enum:
-                                    end_idx += 1
-                                    break
-                            end_idx += 1
-                        enum_block = content[start_idx:end_idx]
-                        matches.append((enum_name, enum_block))
-                    if matches:
-                        results[path] = matches
-                        return results
-                except (UnicodeDecodeError, OSError):
-                    continue
-    return None 
+    definitions = get_proto_catalog(proto_dir).find_enums(base_type)
+    if not definitions:
+        return None
+
+    # Only the blocks of the first file defining the enum are reported
+    path = definitions[0].path
+    return {path: [(d.name, d.block) for d in definitions if d.path == path]}
 
 
 def find_service_block(proto_dir, method_name, service_name, topic_hint=""):
-    method_pattern = re.compile(
-        r'rpc\s+' + re.escape(method_name) + r'\s*\((.*?)\)\s+returns\s+\((.*?)\)', re.DOTALL
-    )
-    service_header_pattern = re.compile(r'service\s+' + re.escape(service_name) + r'\s*{')
-
-    for root, _, files in os.walk(proto_dir):
-        for file in sorted(files):
-            if file.endswith(".proto") and (not topic_hint or topic_hint in file):
-                path = os.path.join(root, file)
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                except Exception:
-                    continue
-
-                match = service_header_pattern.search(content)
-                if match:
-                    start_idx = match.end()  # start of the block after '{'
-                    brace_count = 1
-                    idx = start_idx
-
-                    while idx < len(content) and brace_count > 0:
-                        if content[idx] == '{':
-                            brace_count += 1
-                        elif content[idx] == '}':
-                            brace_count -= 1
-                        idx += 1
-
-                    service_block = content[match.start():idx]
-                    print(f"Service '{service_name}' found in {file}")
-
-                    method_match = method_pattern.search(service_block)
-                    if method_match:
-                        request_type = method_match.group(1).strip()
-                        response_type = method_match.group(2).strip()
-                        print(f"    Method :  '{method_name}':")
-                        print(f"        Input: {request_type}")
-                        print(f"        Output: {response_type}")
-                        return request_type, response_type
-    return None, None
\ No newline at end of file
+    rpc = get_proto_catalog(proto_dir).find_service_rpc(service_name, method_name, topic_hint)
+    if rpc is None:
+        return None, None
+
+    print(f"Service '{service_name}' found in {rpc.service.file}")
+    print(f"    Method :  '{method_name}':")
+    print(f"        Input: {rpc.request_type}")
+    print(f"        Output: {rpc.response_type}")
+    return rpc.request_type, rpc.response_type
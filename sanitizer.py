@@ -1,13 +1,15 @@
 # ros_interface_generator/sanitizer.py
+import io
 import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Set
 import shutil
 import re
 import json
-from .utils import PRIMITIVE_TYPES, remap_filename_to_ros_convention, is_primitive_type, compute_topic_hint, compute_topic_hint2, hint_to_acronym, load_prefixed_files_from_manifest,remap_fqin_to_ros_convention
+from .utils import PRIMITIVE_TYPES, remap_filename_to_ros_convention, is_primitive_type, compute_topic_hint, compute_topic_hint2, hint_to_acronym, load_prefixed_files_from_manifest,remap_fqin_to_ros_convention, remap_names
 from .proto_parser import find_message_block
-from .msg_generator import generate_msg_type
+from .msg_generator import generate_msg_type, log_warning
+from .output_tree import OutputTree
 
 
 def should_keep_line(line: str) -> bool:
@@ -83,95 +85,112 @@ def parse_srv_and_generate_msgs(srv_dir: str, proto_dir: str, output_msg_dir: st
 
 
 
-def sanitize_interface_files(directory: str, extension: str, manifest_path: str) -> None:
-    directory = Path(directory)
-    rename_map = {}
+ARRAY_SUFFIX_RE = re.compile(r'\[.*\]')
 
-    # files to ignore because already "acro+topic_name"
-    prefixed = load_prefixed_files_from_manifest(manifest_path)
-    
-    for file in sorted(directory.glob(f"*.{extension}")):
-        
-        if file.stem in prefixed:
-            print(f" Ignored (contains an FQIN): {file.name}")
-            original, corrected =  remap_fqin_to_ros_convention(file.stem)
-            if original != corrected:
-                rename_map[original] = corrected
-
-        else :
-            original, corrected = remap_filename_to_ros_convention(file.stem)
-            if original != corrected:
-                rename_map[original] = corrected
-
-    for file in sorted(directory.glob(f"*.{extension}")):
-        
-        
-        path = file
-        with path.open('r', encoding='utf-8') as f:
-            lines = f.readlines()
 
-        new_lines = []
-        changed = False
+class RenamePlan:
+    """
+    ROS names of the interface files of one folder, computed once per run
+    (the remap_* results are memoized in utils).
+    """
 
-        for line in lines:
-            stripped = line.strip()
-            #if not stripped or stripped.startswith("#") or "=" in stripped or "swl_sdv_adas_msgs" in stripped or "ssot_abcd" in stripped or stripped.startswith("builtin_interfaces") or stripped == "---":
-            if should_keep_line(line):
-                new_lines.append(line)
-                continue
+    def __init__(self, stems: List[str], prefixed: Set[str], extension: str):
+        self.prefixed = prefixed
+        for stem in stems:
+            if stem in prefixed:
+                print(f" Ignored (contains an FQIN): {stem}.{extension}")
+        self.rename_map: Dict[str, str] = {
+            stem: corrected for stem, corrected in remap_names(stems, prefixed).items() if corrected != stem
+        }
 
-            tokens = stripped.split()
-            if len(tokens) != 2:
-                new_lines.append(line)
-                continue
+    def remap(self, name: str) -> str:
+        remap = remap_fqin_to_ros_convention if name in self.prefixed else remap_filename_to_ros_convention
+        return remap(name)[1]
 
-            type_name, field_name = tokens
-            base_type = re.sub(r'\[.*\]', '', type_name)
+    def corrected_type(self, base_type: str) -> str:
+        corrected = self.rename_map.get(base_type)
+        return corrected if corrected is not None else self.remap(base_type)
 
-            if base_type == "float":
-                corrected_type = type_name.replace("float", "float32")
-                new_lines.append(f"{corrected_type} {field_name}\n")
-                changed = True
-            elif base_type == "double":
-                corrected_type = type_name.replace("double", "float64")
-                new_lines.append(f"{corrected_type} {field_name}\n")
+
+def sanitize_line(line: str, plan: RenamePlan) -> Optional[str]:
+    """The rewritten `line`, or None if it is kept as is."""
+    if should_keep_line(line):
+        return None
+
+    tokens = line.split()
+    if len(tokens) != 2:
+        return None
+
+    type_name, field_name = tokens
+    base_type = ARRAY_SUFFIX_RE.sub('', type_name) if '[' in type_name else type_name
+
+    if base_type == "float":
+        return f"{type_name.replace('float', 'float32')} {field_name}\n"
+    if base_type == "double":
+        return f"{type_name.replace('double', 'float64')} {field_name}\n"
+    if base_type in PRIMITIVE_TYPES:
+        return None
+
+    corrected_type = plan.corrected_type(base_type)
+    if corrected_type != base_type:
+        return f"{type_name.replace(base_type, corrected_type)} {field_name}\n"
+    return None
+
+
+def sanitize_interface_files(directory: str, extension: str, manifest_path: str, tree: OutputTree = None,
+                             prefixed: Set[str] = None) -> None:
+    """
+    Fix the types of the interface files of `directory` and rename the files to the ROS conventions.
+
+    One pass over the documents of `tree`: the rename map is computed once, only the
+    lines whose type changes are rewritten, then the renames are applied together.
+    A rename onto a file that already exists replaces it and is logged as a collision.
+    Without a tree the folder is loaded and committed; `prefixed` (the FQIN-prefixed
+    names of the manifest) is loaded from `manifest_path` when not given.
+    """
+    directory = Path(directory)
+    own_tree = tree is None
+    if own_tree:
+        tree = OutputTree([str(directory)])
+
+    # files to ignore because already "acro+topic_name"
+    if prefixed is None:
+        prefixed = load_prefixed_files_from_manifest(manifest_path)
+
+    files = tree.glob(directory, f"*.{extension}")
+    plan = RenamePlan([file.stem for file in files], prefixed, extension)
+
+    for file in files:
+        lines = io.StringIO(tree.read(file)).readlines()
+        changed = False
+        for i, line in enumerate(lines):
+            new_line = sanitize_line(line, plan)
+            if new_line is not None:
+                lines[i] = new_line
                 changed = True
-            elif base_type in PRIMITIVE_TYPES:
-                new_lines.append(line)
-            else:
-                if(base_type in prefixed):
-                    corrected_type = rename_map.get(base_type, remap_fqin_to_ros_convention(base_type)[1])
-                else:
-                    corrected_type = rename_map.get(base_type, remap_filename_to_ros_convention(base_type)[1])
-                    
-                if corrected_type != base_type:
-                    corrected_full = type_name.replace(base_type, corrected_type)
-                    new_lines.append(f"{corrected_full} {field_name}\n")
-                    changed = True
-                else:
-                    new_lines.append(line)
 
         if changed:
-            with path.open('w', encoding='utf-8') as f:
-                f.writelines(new_lines)
+            tree.write(file, "".join(lines))
             print(f"✔ Content updated : {file}")
 
-    for old_name, new_name in rename_map.items():
-            #if old_name != new_name:
-            old_path = directory / f"{old_name}.{extension}"
-            new_path = directory / f"{new_name}.{extension}"
-            if old_path.exists():
-                old_path.rename(new_path)
-                print(f"🔄 File renamed : {old_name}.{extension} → {new_name}.{extension}")
-                """if not new_path.exists():
-                    old_path.rename(new_path)
-                    print(f"🔄 Fichier renommé : {old_name}.{extension} → {new_name}.{extension}")"""
-                """else:
-                    print(f"⚠️ Renommage ignoré : {new_name}.{extension} existe déjà. Conflit avec {old_name}.{extension}")
-                    shutil.move(str(old_path), str(Path(directory).parents[0]/"conflicts") / f"{old_name}.{extension}")  # Déplacer vers un dossier de conflits
-                    old_path.unlink()  #  Supprime l'ancien fichier"""
-
-
-def sanitize_ros_interfaces(msg_dir: str, srv_dir: str, manifest_path: str) -> None:
-    sanitize_interface_files(msg_dir, "msg", manifest_path)
-    sanitize_interface_files(srv_dir, "srv", manifest_path)
\ No newline at end of file
+    for old_name, new_name in plan.rename_map.items():
+        old_path = directory / f"{old_name}.{extension}"
+        new_path = directory / f"{new_name}.{extension}"
+        if tree.exists(old_path):
+            if tree.exists(new_path):
+                log_warning(f"Warning: rename collision: {old_name}.{extension} → {new_name}.{extension} "
+                            f"replaces an existing {new_name}.{extension}",
+                            code="rename-collision", file=f"{new_name}.{extension}")
+            tree.rename(old_path, new_path)
+            print(f"🔄 File renamed : {old_name}.{extension} → {new_name}.{extension}")
+
+    if own_tree:
+        tree.commit()
+
+
+def sanitize_ros_interfaces(msg_dir: str, srv_dir: str, manifest_path: str, tree: OutputTree = None,
+                            prefixed: Set[str] = None) -> None:
+    if prefixed is None:
+        prefixed = load_prefixed_files_from_manifest(manifest_path)
+    sanitize_interface_files(msg_dir, "msg", manifest_path, tree, prefixed)
+    sanitize_interface_files(srv_dir, "srv", manifest_path, tree, prefixed)
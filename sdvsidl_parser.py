@@ -0,0 +1,135 @@
+# ros_interface_generator/sdvsidl_parser.py
+"""
+Streaming parser of the sdvsidl text format (protobuf text format).
+
+The file is read line by line and tokenized; comments and string literals are
+consumed by the lexer, so braces inside them never disturb block boundaries.
+`iter_sdvsidl_blocks` yields, in file order and in a single pass:
+
+    SdvsidlBlock("event", event_name, topics)
+    SdvsidlBlock("method_fire_forget", method_name, topics)
+    SdvsidlBlock("rpc_definition", rpc_service_name, methods=(method_vsidl_name, ...))
+    SdvsidlBlock("topic", None, (topic,))       # topic_name outside an event or method
+
+Only the block being read is kept in memory.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+from .sources import open_text
+
+# One match per token: group 1 the skipped blanks/comments, group 2 the token
+TOKEN_RE = re.compile(r'''
+    ((?:\s+|\#[^\n]*)*)
+    (
+        "[^"\\\n]*(?:\\.[^"\\\n]*)*"        # string
+      | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+      | [A-Za-z_][\w.]*                     # identifier
+      | [-+]?[\d.]\w*                       # number
+      | \S                                  # symbol
+      | \Z
+    )
+''', re.VERBOSE)
+
+# "sdv.adas.hmi.Foo" or "sdv.adas.hmi.Foo::FIRST_ROW_LEFT"
+TOPIC_VALUE_RE = re.compile(r'([\w\.]+)(?:::(\w+))?')
+
+BLOCK_KINDS = ("event", "method_fire_forget", "rpc_definition")
+TOPIC_OWNERS = ("event", "method_fire_forget")
+NAME_FIELDS = {"event": "event_name", "method_fire_forget": "method_name", "rpc_definition": "rpc_service_name"}
+
+
+@dataclass
+class SdvsidlTopic:
+    topic_name: str             # "sdv.adas.hmi.Foo"
+    suffix: Optional[str]       # "FIRST_ROW_LEFT" for "sdv.adas.hmi.Foo::FIRST_ROW_LEFT"
+    line: int
+
+    @property
+    def base_type(self) -> str:
+        return self.topic_name.split('.')[-1]
+
+
+@dataclass
+class SdvsidlBlock:
+    kind: str                                   # "event" | "method_fire_forget" | "rpc_definition" | "topic"
+    name: Optional[str]                         # event_name / method_name / rpc_service_name
+    topics: List[SdvsidlTopic] = field(default_factory=list)
+    methods: List[str] = field(default_factory=list)    # method_vsidl_name of an rpc_definition
+    line: int = 0
+
+
+def _unquote(token: str) -> str:
+    return token[1:-1]
+
+
+def iter_sdvsidl_blocks(lines: Iterable[str]) -> Iterator[SdvsidlBlock]:
+    """Blocks of an sdvsidl text given as an iterable of lines, in file order."""
+    stack: List[Optional[SdvsidlBlock]] = []    # one entry per open brace, None for other messages
+    field_name = None                           # identifier waiting for its value or block
+    expect_value = False
+
+    def owner(kinds) -> Optional[SdvsidlBlock]:
+        for block in reversed(stack):
+            if block is not None and block.kind in kinds:
+                return block
+        return None
+
+    for lineno, line in enumerate(lines, 1):
+        for match in TOKEN_RE.finditer(line):
+            token = match.group(2)
+            if not token:
+                break
+            first = token[0]
+
+            if first == '{':
+                block = SdvsidlBlock(field_name, None, line=lineno) if field_name in BLOCK_KINDS else None
+                stack.append(block)
+                field_name, expect_value = None, False
+            elif first == '}':
+                if stack:
+                    block = stack.pop()
+                    if block is not None:
+                        yield block
+                field_name, expect_value = None, False
+            elif first == ':':
+                expect_value = field_name is not None
+            elif first in '"\'' and expect_value:
+                value = _unquote(token)
+                if field_name == "topic_name":
+                    topic_match = TOPIC_VALUE_RE.fullmatch(value)
+                    if topic_match:
+                        topic = SdvsidlTopic(topic_match.group(1), topic_match.group(2), lineno)
+                        block = owner(TOPIC_OWNERS)
+                        if block is None:
+                            yield SdvsidlBlock("topic", None, [topic], line=lineno)
+                        else:
+                            block.topics.append(topic)
+                elif field_name == "method_vsidl_name":
+                    block = owner(("rpc_definition",))
+                    if block is not None and value:
+                        block.methods.append(value)
+                else:
+                    # the first name field of a block names it
+                    for kind, name_field in NAME_FIELDS.items():
+                        if field_name == name_field:
+                            block = owner((kind,))
+                            if block is not None and block.name is None and value:
+                                block.name = value
+                field_name, expect_value = None, False
+            elif not expect_value and (first.isalpha() or first == '_'):
+                field_name = token
+            else:
+                field_name, expect_value = None, False
+
+    # Events and methods left open at the end of the file still count
+    for block in stack:
+        if block is not None and block.kind in TOPIC_OWNERS:
+            yield block
+
+
+def read_sdvsidl_blocks(filepath: str) -> Iterator[SdvsidlBlock]:
+    """Stream the blocks of a .sdvsidl file (folder path or archive member)."""
+    with open_text(filepath) as f:
+        yield from iter_sdvsidl_blocks(f)
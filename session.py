@@ -0,0 +1,392 @@
+# ros_interface_generator/session.py
+"""
+Library API of the generator.
+
+A GeneratorSession holds what outlives a generation: the options, the proto
+catalog (shared per proto_dir and built once), the enum table and the parse
+cache. Everything a generation accumulates (conflict table, manifest and
+dependency records, project filter, diagnostics) is created by each
+`generate` call, so one warm process can run many generations one after
+another or concurrently in threads:
+
+    session = GeneratorSession("catalog", "Templates", cache_dir=".cache")
+    session.generate(["BL6"], "out/msg", "out/srv", "out/doc")
+
+main.py is the command line wrapper around it.
+"""
+import os
+import shutil
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .utils import copy_header_msg, parse_sdvsidl_file, load_projects_filter
+from .extractor_sdvsidl import Interface, deduplicate_ros_filenames_by_topic_hint2, extract_topics_from_sdvsidl_file_list
+from .msg_generator import MsgPlan, MsgPlanNode, DIAGNOSTICS, WARNINGS_FILENAME, flush_warnings
+from .srv_generator import plan_srv_files, flush_srv_warnings, SRV_DIAGNOSTICS, SRV_WARNINGS_FILENAME
+from .sanitizer import sanitize_ros_interfaces
+from .proto_parser import ProtoCatalog, get_proto_catalog, resolution_stats
+from .enum_table import EnumTable, get_enum_table
+from .parse_cache import ParseCache
+from .output_tree import OutputTree
+from .diagnostics import DiagnosticsCollector
+from .batch import MANIFEST_DIFF_FILENAME, write_manifest_diff
+from .incremental import DEPS_FILENAME, build_dependency_graph, commit_outputs, load_dependency_graph
+from .profiler import PROFILER
+from .planner import build_plan
+from .layouts import LAYOUT_REPORT_FILENAME, dedupe_layouts, layout_alias_column, write_layout_report
+from .manifest import MANIFEST_FILENAME, MANIFEST_CSV_FILENAME, ManifestTable
+
+
+def parse_and_sanitize(msg_output_dir, srv_output_dir, manifest_path: str, tree: OutputTree = None, prefixed=None):
+    print("Sanitizing interfaces...")
+    sanitize_ros_interfaces(msg_output_dir, srv_output_dir, manifest_path, tree, prefixed)
+    print("Sanitizing Done ! Interfaces generated in:")
+    print(f"  - Messages : {msg_output_dir}")
+    print(f"  - Services : {srv_output_dir}")
+
+
+class GeneratorSession:
+    """
+    Generates ROS interfaces from a proto catalog, as many times as asked.
+
+    Args:
+        proto_dir: directory (or .zip archive) containing the .proto files
+        template_path: folder of Header.msg and project_fut.txt
+        cache_dir: persistent parse cache folder (or pass `cache`)
+        jobs: worker processes of the sdvsidl extraction (0 = one per CPU)
+        filter_projects: only generate the projects listed in project_fut.txt
+        incremental: only rewrite outputs whose content changed
+        diagnostics_jsonl: also stream the warnings as JSON lines to this file
+        dedupe_layouts: "report" or "merge" the structurally identical messages (see layouts)
+    """
+
+    def __init__(self, proto_dir: str, template_path: str, cache_dir: Optional[str] = None, jobs: int = 1,
+                 filter_projects: bool = True, incremental: bool = False, diagnostics_jsonl: Optional[str] = None,
+                 cache: Optional[ParseCache] = None, dedupe_layouts: Optional[str] = None):
+        self.proto_dir = proto_dir
+        self.template_path = template_path
+        self.cache = cache if cache is not None else (ParseCache(cache_dir) if cache_dir else None)
+        self.jobs = jobs
+        self.filter_projects = filter_projects
+        self.incremental = incremental
+        self.diagnostics_jsonl = diagnostics_jsonl
+        self.dedupe_layouts = dedupe_layouts
+        self._catalog: Optional[ProtoCatalog] = None
+        self._rendered: Dict[str, Tuple[tuple, str]] = {}     # incremental: files of the last run, see MsgPlan.emit
+
+    def load_catalog(self) -> ProtoCatalog:
+        """
+        Index of the proto catalog, built (through the parse cache) on first use and
+        shared by later runs. It is built again when its .proto files changed since.
+        """
+        with PROFILER.stage("catalog"):
+            catalog = get_proto_catalog(self.proto_dir, self.cache, revalidate=True)
+        if self._catalog is not None and catalog is not self._catalog:
+            print(f"🔄 .proto files changed since the last run: catalog {self.proto_dir} indexed again")
+        self._catalog = catalog
+        return catalog
+
+    def enum_table(self) -> EnumTable:
+        return get_enum_table(self.load_catalog())
+
+    def _init_env(self, msg_output_dir: str, srv_output_dir: str) -> List[str]:
+        """Create the output folders and return the project filter."""
+        os.makedirs(msg_output_dir, exist_ok=True)
+        os.makedirs(srv_output_dir, exist_ok=True)
+        return self._projects_filter()
+
+    def _copy_header(self, tree: OutputTree, msg_output_dir: str) -> None:
+        """Add the template's Header.msg to the .msg outputs of `tree`."""
+        header_file = os.path.join(self.template_path, "Header.msg")
+        if os.path.exists(header_file):
+            copy_header_msg(header_file, msg_output_dir, tree)
+
+    def _projects_filter(self) -> List[str]:
+        """Projects listed in the template's project_fut.txt (empty without the file)."""
+        futurama_projects = os.path.join(self.template_path, "project_fut.txt")
+        projects_filter = []
+        if futurama_projects and os.path.exists(futurama_projects):
+            print("futurama_projects file exists")
+            projects_filter.extend(load_projects_filter(futurama_projects))
+        return projects_filter
+
+    def _select_projects(self, sdvsidl_inputs: List[str], projects_filter: List[str]) -> List[str]:
+        """The .sdvsidl files of `sdvsidl_inputs` to generate, sorted."""
+        selected = []
+        sdvsidl_files = []
+        for sdvsidl_input in sdvsidl_inputs:
+            domain = Path(sdvsidl_input).name
+            print(f"\n===============================")
+            print(f" Detected domain : {domain}")
+            print(f" Scanned folder : {sdvsidl_input}")
+            print("===============================\n")
+
+            sdvsidl_files.extend(parse_sdvsidl_file(sdvsidl_input))
+            print(f" sdvsidl Files found ({len(sdvsidl_files)}) : {[Path(f).stem for f in sdvsidl_files]}")
+
+            if not self.filter_projects:
+                print(f"\n All ABCD projects are considered (filter disabled)")
+                selected = sdvsidl_files
+            else:
+                for sdvsidl_file in sdvsidl_files:
+                    # Filter only the allowed projects
+                    if Path(sdvsidl_file).stem in projects_filter:
+                        selected.append(sdvsidl_file)
+
+        selected = sorted(list(set(selected)))
+        print(f" Files included ({len(selected)}) : {[Path(f).stem for f in selected]}")
+        return selected
+
+    def _generate_all(self, msg_output_dir: str, srv_output_dir: str, projects_list: list, plan: MsgPlan,
+                      jobs: int, tree: OutputTree) -> List[Tuple[Interface, Interface, Optional[MsgPlanNode]]]:
+        """Plan and render every interface into `tree`. Returns (extracted, deduplicated, plan node) per topic."""
+        rpc_methods = {}
+        with PROFILER.stage("extract"):
+            interfaces = extract_topics_from_sdvsidl_file_list(projects_list, self.proto_dir, self.cache, jobs, rpc_methods)
+            if self.cache:
+                self.cache.save()
+            interfaces_fixed = deduplicate_ros_filenames_by_topic_hint2(interfaces)
+
+        for base_type, topic_hint, ros_filename, event in interfaces_fixed:
+            print(f" base_type de {base_type} \t topic_hint '{topic_hint}' \t ros_filename  {ros_filename}.msg \t event_name {event}")
+
+        # Plan every message first (final names, dependency DAG), then write the files
+        with PROFILER.stage("plan"):
+            nodes = [plan.add_type(base_type, topic_hint.split('.')[0], ros_filename, event_name, top_level=True)
+                     for base_type, topic_hint, ros_filename, event_name in interfaces_fixed]
+
+        # .srv files and the messages they use join the same plan
+        print("Generating .srv files...")
+        with PROFILER.stage("plan srv"):
+            for sdvsidl_file in projects_list:
+                plan_srv_files(plan, sdvsidl_file, srv_output_dir, rpc_methods[sdvsidl_file])
+        with PROFILER.stage("render"):
+            plan.emit(tree, self._rendered if self.incremental else None)
+        return list(zip(interfaces, interfaces_fixed, nodes))
+
+    def generate(self, sdvsidl_inputs: List[str], msg_output_dir: str, srv_output_dir: str, doc_output_dir: str,
+                 baseline: Optional[str] = None) -> str:
+        """
+        Generate the interfaces of `sdvsidl_inputs` (.sdvsidl folders, files or
+        archives) into the given folders. Returns the manifest path.
+        `baseline` names the run in the diagnostics JSONL file name.
+        """
+        output_dirs = {"msg": msg_output_dir, "srv": srv_output_dir, "doc": doc_output_dir}
+
+        # Warnings are buffered and written once with the outputs, or on close when the run stops on an error
+        jsonl_path = self.diagnostics_jsonl
+        if jsonl_path and baseline:
+            jsonl_path = f"{os.path.splitext(jsonl_path)[0]}_{baseline}.jsonl"
+        diagnostics = DiagnosticsCollector(os.path.join(output_dirs["doc"], WARNINGS_FILENAME), jsonl_path)
+        srv_diagnostics = DiagnosticsCollector(os.path.join(output_dirs["srv"], SRV_WARNINGS_FILENAME),
+                                               f"{os.path.splitext(jsonl_path)[0]}_srv.jsonl" if jsonl_path else None)
+        try:
+            with DIAGNOSTICS.use(diagnostics), SRV_DIAGNOSTICS.use(srv_diagnostics):
+                return self._generate_into(sdvsidl_inputs, output_dirs)
+        finally:
+            diagnostics.close()
+            srv_diagnostics.close()
+
+    def _generate_into(self, sdvsidl_inputs: List[str], output_dirs: Dict[str, str]) -> str:
+        msg_output, srv_output, doc_output = output_dirs["msg"], output_dirs["srv"], output_dirs["doc"]
+
+        # Clean output folders (incremental runs only replace the files that changed)
+        if not self.incremental:
+            for output_dir in output_dirs.values():
+                if os.path.exists(output_dir):
+                    shutil.rmtree(output_dir)
+        for output_dir in output_dirs.values():
+            os.makedirs(output_dir, exist_ok=True)
+
+        # Initialize generation environment
+        projects_filter = self._init_env(msg_output, srv_output)
+
+        # Process provided sdvsidl files
+        projects = self._select_projects(sdvsidl_inputs, projects_filter)
+
+        # Load the proto catalog (once for all runs, again if it changed), from the parse cache when enabled
+        catalog = self.load_catalog()
+        resolutions = resolution_stats(catalog)
+
+        # Interfaces are rendered, sanitized and renamed in memory, then written once
+        jobs = self.jobs or os.cpu_count() or 1
+        tree = OutputTree([] if self.incremental else [msg_output, srv_output])   # incremental: this run's files only
+        self._copy_header(tree, msg_output)
+        generated_msgs: Dict[str, str] = {}
+        manifest_records = []
+        dependency_records = []     # aligned with manifest_records (incremental mode)
+        plan = MsgPlan(self.proto_dir, msg_output, generated_msgs, manifest_records, dependency_records)
+        self._generate_all(msg_output, srv_output, projects, plan, jobs, tree)
+        if self.incremental:
+            self._rendered = plan.rendered
+        if self.cache:
+            print(f"Parse cache: {self.cache.hits} hits, {self.cache.misses} misses ({self.cache.cache_dir or 'in memory'})")
+        stats = resolution_stats(catalog, since=resolutions)     # this run only
+        print(f"Proto file resolution: {stats['hits']} hits, {stats['misses']} misses ({stats['not_found']} not found)")
+        PROFILER.count("proto resolution hits", stats["hits"])
+        PROFILER.count("proto resolution misses", stats["misses"])
+
+        # Final Sanitation and manifest post-processing, in memory
+        manifest, _, aliases = self._post_process(manifest_records, msg_output, srv_output, tree)
+        if self.dedupe_layouts:
+            write_layout_report(aliases, self.dedupe_layouts, os.path.join(doc_output, LAYOUT_REPORT_FILENAME), tree)
+            print(f"Layouts: {len(aliases)} messages identical to another one "
+                  f"({'merged' if self.dedupe_layouts == 'merge' else 'reported'})")
+
+        # Every output is written once
+        manifest_path = os.path.join(doc_output, MANIFEST_FILENAME)
+        manifest.write(manifest_path, os.path.join(doc_output, MANIFEST_CSV_FILENAME), tree)
+        flush_srv_warnings(tree, SRV_DIAGNOSTICS.text_path)
+        flush_warnings(tree, DIAGNOSTICS.text_path)
+        with PROFILER.stage("write outputs"):
+            if self.incremental:
+                graph = build_dependency_graph(manifest.rows(), dependency_records, tree, output_dirs)
+                written, unchanged, deleted = commit_outputs(
+                    tree, output_dirs, graph, os.path.join(doc_output, DEPS_FILENAME), jobs)
+            else:
+                tree.commit(jobs)
+        print(f"Diagnostics: {DIAGNOSTICS.count('error')} errors, {DIAGNOSTICS.count('warning')} warnings, {DIAGNOSTICS.count('info')} info")
+
+        if self.incremental:
+            print(f"Incremental: {len(written)} written, {len(unchanged)} unchanged, {len(deleted)} deleted")
+            for key in written:
+                print(f"  ✎ {key}")
+            for key in deleted:
+                print(f"  ✘ {key}")
+        return manifest_path
+
+    def _post_process(self, manifest_records: list, msg_output: str, srv_output: str,
+                      tree: OutputTree) -> Tuple[ManifestTable, List[Tuple[str, int]], Dict[str, str]]:
+        """
+        Sanitize the files of `tree` and post-process the manifest, as column operations on
+        a ManifestTable: duplicate prefixes, ROS remap and, with dedupe_layouts, the layout
+        aliases. Returns the table, the rename stages (stage, first index in tree.renames)
+        and the layout aliases.
+        """
+        manifest = ManifestTable.from_records(manifest_records)
+        stages = [("sanitize", len(tree.renames))]
+        with PROFILER.stage("sanitize"):
+            parse_and_sanitize(msg_output, srv_output, None, tree, manifest.prefixed_stems())
+        stages.append(("prefix duplicates", len(tree.renames)))
+        with PROFILER.stage("prefix duplicates"):
+            manifest.prefix_duplicates(msg_output, tree)
+        aliases = {}
+        with PROFILER.stage("post-process"):
+            manifest.remap_to_ros_convention()
+            # Structurally identical messages: reported, or merged before the outputs are written
+            if self.dedupe_layouts:
+                aliases = dedupe_layouts(tree, msg_output, srv_output, merge=self.dedupe_layouts == "merge")
+                manifest.columns["alias_of"] = layout_alias_column(manifest.column("ros_filename"), aliases)
+        return manifest, stages, aliases
+
+    def plan(self, sdvsidl_inputs: List[str], msg_output_dir: str, srv_output_dir: str, doc_output_dir: str) -> dict:
+        """
+        Run the generation of `sdvsidl_inputs` in memory and return its plan
+        (see planner.build_plan): every output file with the chain of names it
+        went through, the final manifest and the diagnostics. Nothing is
+        written to the output folders.
+        """
+        diagnostics, srv_diagnostics = DiagnosticsCollector(write=False), DiagnosticsCollector(write=False)
+        with DIAGNOSTICS.use(diagnostics), SRV_DIAGNOSTICS.use(srv_diagnostics):
+            projects = self._select_projects(sdvsidl_inputs, self._projects_filter())
+            self.load_catalog()
+
+            # Same steps as _generate_into, on an empty in-memory tree and manifest
+            jobs = self.jobs or os.cpu_count() or 1
+            tree = OutputTree([])
+            self._copy_header(tree, msg_output_dir)
+            manifest_records = []
+            plan = MsgPlan(self.proto_dir, msg_output_dir, {}, manifest_records)
+            topics = self._generate_all(msg_output_dir, srv_output_dir, projects, plan, jobs, tree)
+            manifest, stages, _ = self._post_process(manifest_records, msg_output_dir, srv_output_dir, tree)
+
+        other_files = [os.path.join(doc_output_dir, name) for name in (MANIFEST_FILENAME, MANIFEST_CSV_FILENAME)]
+        if diagnostics.messages:
+            other_files.append(os.path.join(doc_output_dir, WARNINGS_FILENAME))
+        if srv_diagnostics.messages:
+            other_files.append(os.path.join(srv_output_dir, SRV_WARNINGS_FILENAME))
+        if self.dedupe_layouts:
+            other_files.append(os.path.join(doc_output_dir, LAYOUT_REPORT_FILENAME))
+        if self.incremental:
+            other_files.append(os.path.join(doc_output_dir, DEPS_FILENAME))
+        if os.path.exists(os.path.join(self.template_path, "Header.msg")):
+            other_files.append(os.path.join(msg_output_dir, "Header.msg"))
+        return build_plan(projects, topics, plan, tree, stages, manifest.rows(), other_files,
+                          diagnostics.records + srv_diagnostics.records)
+
+    def generate_baselines(self, baselines: List[Tuple[str, List[str]]], msg_output: str, srv_output: str,
+                           doc_output: str) -> int:
+        """
+        Generate every (name, sdvsidl_inputs) baseline into <output>/<name> folders,
+        then compare the manifests of consecutive baselines. Returns the number of failed baselines.
+        """
+        self.load_catalog()
+
+        generated, failed = [], []
+        for name, sdvsidl_inputs in baselines:
+            print(f"\n######## Baseline {name} ########")
+            dirs = [os.path.join(output, name) for output in (msg_output, srv_output, doc_output)]
+            try:
+                manifest_path = self.generate(sdvsidl_inputs, *dirs, baseline=name)
+            except Exception as e:
+                traceback.print_exc()
+                print(f"❌ Baseline {name} failed: {e!r}")
+                failed.append(name)
+                continue
+            generated.append((name, manifest_path, dirs[0]))
+
+        diff_path = os.path.join(doc_output, MANIFEST_DIFF_FILENAME)
+        for diff in write_manifest_diff(generated, diff_path):
+            print(f"Baseline {diff['from']} → {diff['to']}: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+                  f"{len(diff['changed'])} changed, {len(diff['content_changed'])} with different content")
+        print(f"Manifest diff written to {diff_path}")
+        if failed:
+            print(f"❌ Failed baselines: {', '.join(failed)}")
+        return len(failed)
+
+    def watch(self, sdvsidl_inputs: List[str], msg_output_dir: str, srv_output_dir: str, doc_output_dir: str,
+              interval: float = 0.5, debounce: float = 0.3):
+        """
+        Generate once, then regenerate on every change of the .proto / .sdvsidl inputs
+        until interrupted. Runs are incremental; the catalog is refreshed for the edited
+        .proto files only and the parse cache (kept in memory without cache_dir) keeps the
+        unchanged .proto ASTs and sdvsidl extractions between runs.
+        """
+        from .watch import InputWatcher, affected_outputs, forget_inputs
+        self.incremental = True
+        memory_cache = self.cache is None
+        if memory_cache:
+            self.cache = ParseCache(None)
+        watcher = InputWatcher([self.proto_dir, *sdvsidl_inputs], interval, debounce)
+
+        changes = None
+        try:
+            while True:
+                start = time.perf_counter()
+                self.cache.hits = self.cache.misses = 0
+                try:
+                    self.generate(sdvsidl_inputs, msg_output_dir, srv_output_dir, doc_output_dir)
+                except Exception as e:
+                    traceback.print_exc()
+                    print(f"❌ Generation failed: {e!r}")
+                label = "Generated" if changes is None else f"Regenerated after {len(changes)} change(s)"
+                print(f"\n👀 {label} in {(time.perf_counter() - start) * 1000:.0f} ms; "
+                      f"watching {', '.join(watcher.roots)} ({watcher.backend}, Ctrl+C to stop)")
+                try:
+                    changes = watcher.wait()
+                except KeyboardInterrupt:
+                    return
+                for path in changes:
+                    print(f"  ~ {path}")
+                update = forget_inputs(self.proto_dir, changes, self.cache)
+                if update == "refreshed":
+                    affected = affected_outputs(load_dependency_graph(os.path.join(doc_output_dir, DEPS_FILENAME)),
+                                                self.proto_dir, changes)
+                    print(f"Proto inputs changed: changed files indexed again, {len(affected)} outputs use them")
+                elif update == "rebuilt":
+                    print("Proto inputs changed: the catalog is rebuilt (unchanged files from the parse cache)")
+        finally:
+            if memory_cache:
+                self.cache = None
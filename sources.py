@@ -0,0 +1,194 @@
+# ros_interface_generator/sources.py
+"""
+Input trees read from folders or straight from .zip archives.
+
+A path inside an archive is written as if the archive were a folder:
+`inputs/catalog.zip/catalog/sdv/foo.proto`. `walk`, `open_text`,
+`read_bytes` and `stamp` accept both kinds of paths, so the walkers and the
+parse cache never need the archive extracted. Members are read from the
+central directory on demand, each one when it is opened.
+
+When an archive is given as a root (`--proto_dir catalog.zip`) and holds a
+single top-level folder, that folder is the root, as it would be once
+extracted.
+"""
+import io
+import os
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
+
+ARCHIVE_SUFFIX = ".zip"
+
+
+class ZipTree:
+    """Directory structure of a zip archive, in central directory order."""
+
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        self.zip = zipfile.ZipFile(archive_path)
+        self.members: Dict[str, zipfile.ZipInfo] = {}
+        self.dirs: Dict[str, Tuple[List[str], List[str]]] = {"": ([], [])}   # dir -> (subdirs, files)
+        for info in self.zip.infolist():
+            name = info.filename.strip("/")
+            if not name:
+                continue
+            if info.is_dir():
+                self._add_dir(name)
+            else:
+                parent, _, base = name.rpartition("/")
+                self._add_dir(parent)
+                self.dirs[parent][1].append(base)
+                self.members[name] = info
+
+    def _add_dir(self, name: str):
+        if name in self.dirs:
+            return
+        parent, _, base = name.rpartition("/")
+        self._add_dir(parent)
+        self.dirs[name] = ([], [])
+        self.dirs[parent][0].append(base)
+
+    def default_root(self) -> str:
+        """The single top-level folder of the archive, or its root."""
+        subdirs, files = self.dirs[""]
+        return subdirs[0] if len(subdirs) == 1 and not files else ""
+
+    def walk(self, inner: str) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """Like os.walk (top-down), with member names relative to the archive."""
+        if inner not in self.dirs:
+            return
+        subdirs, files = self.dirs[inner]
+        yield inner, list(subdirs), list(files)
+        for sub in subdirs:
+            yield from self.walk(f"{inner}/{sub}" if inner else sub)
+
+
+_ARCHIVES: Dict[str, ZipTree] = {}
+_IS_ARCHIVE_FILE: Dict[str, bool] = {}
+# An inherited archive handle would share its file offset with the parent process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_ARCHIVES.clear)
+
+
+def forget_archives():
+    """Close the opened archives, so changed ones are read again (watch mode)."""
+    for tree in _ARCHIVES.values():
+        tree.zip.close()
+    _ARCHIVES.clear()
+    _IS_ARCHIVE_FILE.clear()
+
+
+def forget_archive(path: str) -> None:
+    """
+    Drop the index of the archive of `path`, so the next access reads it again.
+    Its handle is left open for the readers still using it.
+    """
+    split = split_archive_path(path)
+    if split is not None:
+        _ARCHIVES.pop(split[0], None)
+
+
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """(archive path, member path inside it) if `path` goes through a .zip archive, else None."""
+    parts = os.path.normpath(str(path)).split(os.sep)
+    for i, part in enumerate(parts):
+        if part.lower().endswith(ARCHIVE_SUFFIX):
+            archive = os.sep.join(parts[:i + 1]) or os.sep
+            is_file = _IS_ARCHIVE_FILE.get(archive)
+            if is_file is None:
+                is_file = _IS_ARCHIVE_FILE[archive] = os.path.isfile(archive)
+            if is_file:
+                return archive, "/".join(parts[i + 1:])
+    return None
+
+
+def _archive(archive_path: str) -> ZipTree:
+    tree = _ARCHIVES.get(archive_path)
+    if tree is None:
+        tree = _ARCHIVES[archive_path] = ZipTree(archive_path)
+    return tree
+
+
+def is_archive_path(path: str) -> bool:
+    return split_archive_path(path) is not None
+
+
+def resolve_root(path: str) -> str:
+    """Root folder to walk for an input path: a bare archive resolves to its single top-level folder."""
+    split = split_archive_path(path)
+    if split is None:
+        return path
+    archive, inner = split
+    if not inner:
+        inner = _archive(archive).default_root()
+    return os.path.join(archive, *inner.split("/")) if inner else archive
+
+
+def walk(top: str) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """os.walk for folders and archives; archive roots are yielded as `<archive>/<member dir>` paths."""
+    split = split_archive_path(top)
+    if split is None:
+        yield from os.walk(top)
+        return
+    archive, inner = split
+    for name, dirs, files in _archive(archive).walk(inner):
+        yield (os.path.join(archive, *name.split("/")) if name else archive), dirs, files
+
+
+def _member(path: str) -> Tuple[ZipTree, zipfile.ZipInfo]:
+    archive, inner = split_archive_path(path)
+    tree = _archive(archive)
+    info = tree.members.get(inner)
+    if info is None:
+        raise FileNotFoundError(path)
+    return tree, info
+
+
+def open_binary(path: str) -> BinaryIO:
+    if not is_archive_path(path):
+        return open(path, "rb")
+    tree, info = _member(path)
+    return tree.zip.open(info)
+
+
+def open_text(path: str, encoding: str = "utf-8") -> TextIO:
+    """Text stream with the newline translation of open(path, 'r')."""
+    if not is_archive_path(path):
+        return open(path, "r", encoding=encoding)
+    return io.TextIOWrapper(open_binary(path), encoding=encoding)
+
+
+def read_bytes(path: str) -> bytes:
+    with open_binary(path) as f:
+        return f.read()
+
+
+def stamp(path: str) -> Tuple[int, int]:
+    """(mtime_ns, size) of a file; for an archive member the CRC-32 stands in for the mtime."""
+    if not is_archive_path(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    _, info = _member(path)
+    return info.CRC, info.file_size
+
+
+def tree_stamp(root: str, suffix: str) -> Tuple[Tuple[str, int, int], ...]:
+    """
+    Cheap identity of the `suffix` files under `root`, to tell whether they changed:
+    (path, mtime_ns, size) of the archive, or of every matching file of a folder.
+    """
+    split = split_archive_path(root)
+    if split is not None:
+        st = os.stat(split[0])
+        return ((split[0], st.st_mtime_ns, st.st_size),)
+    stamps = []
+    for dirpath, _, files in os.walk(root):
+        for file in sorted(files):
+            if file.endswith(suffix):
+                path = os.path.join(dirpath, file)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue    # removed while walking
+                stamps.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(stamps)
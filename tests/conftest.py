@@ -0,0 +1,144 @@
+# ros_interface_generator/tests/conftest.py
+"""
+Shared fixtures. The generator is imported as `ros_interface_generator`
+from its source folder, as main.py runs it (python -m ros_interface_generator.main).
+"""
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+if "ros_interface_generator" not in sys.modules:
+    package = types.ModuleType("ros_interface_generator")
+    package.__path__ = [str(Path(__file__).resolve().parent.parent)]
+    sys.modules["ros_interface_generator"] = package
+
+
+# A small catalog: "Brake" is defined in a pubsub topics file and in a types file,
+# "Level" twice in one file and once in another, and one service.
+SAMPLE_PROTOS = {
+    "sdv/chassis/pubsub/brake_topics.proto": """syntax = "proto3";
+package sdv.chassis;
+message Brake {
+  int32 pressure = 1;
+}
+""",
+    "sdv/chassis/brake_types.proto": """syntax = "proto3";
+package sdv.chassis;
+message Brake {
+  int32 torque = 1;
+  Level level = 2;
+}
+message Wheel {
+  enum Level {
+    LEVEL_UNSPECIFIED = 0;
+    LEVEL_HIGH = 1;
+  }
+}
+enum Level {
+  LEVEL_UNSPECIFIED = 0;
+  LEVEL_LOW = 1;
+}
+""",
+    "sdv/body/sdv_body_door_service.proto": """syntax = "proto3";
+package sdv.body;
+message OpenDoorRequest {
+  int32 door = 1;
+}
+message OpenDoorResponse {
+  bool opened = 1;
+}
+service DoorService {
+  rpc OpenDoor(OpenDoorRequest) returns (OpenDoorResponse);
+}
+""",
+}
+
+
+def write_files(root: Path, files: dict) -> str:
+    """Write {relative path: text} under `root`; returns str(root)."""
+    for rel_path, text in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return str(root)
+
+
+@pytest.fixture
+def sample_protos(tmp_path) -> str:
+    """Folder holding SAMPLE_PROTOS."""
+    return write_files(tmp_path / "protos", SAMPLE_PROTOS)
+
+
+# Two sdvsidl files using the sample catalog: a topic with an instance suffix,
+# the same topic twice in two files, and a fire-and-forget rpc
+SAMPLE_SDVSIDL = {
+    "swc/chassis/BrakeApp.sdvsidl": """package: "com.test.chassis"
+sdv_service_bundle {
+  name: "BrakeApp"
+  offered_interface {
+    interface_name: "Brake"
+    event {
+      event_name: "BrakeFront"
+      topic {
+        topic_name: "sdv.chassis.Brake::FRONT_LEFT"
+      }
+    }
+  }
+}
+""",
+    "swc/body/DoorApp.sdvsidl": """package: "com.test.body"
+sdv_service_bundle {
+  name: "DoorApp"
+  offered_interface {
+    interface_name: "Door"
+    rpc_definition {
+      rpc_service_name: "sdv.body.DoorService"
+      method_definition {
+        method_vsidl_name: "OpenDoor"
+      }
+    }
+    event {
+      event_name: "Brake"
+      topic {
+        topic_name: "sdv.chassis.Brake"
+      }
+    }
+  }
+}
+""",
+}
+
+
+@pytest.fixture
+def sample_sdvsidl(tmp_path) -> list:
+    """Paths of the SAMPLE_SDVSIDL files, in SAMPLE_SDVSIDL order."""
+    root = Path(write_files(tmp_path / "sdv", SAMPLE_SDVSIDL))
+    return [str(root / rel_path) for rel_path in SAMPLE_SDVSIDL]
+
+
+def write_zip(archive: Path, files: dict, prefix: str = "") -> str:
+    """Write {relative path: text} into a new .zip archive, under `prefix/` if given; returns str(archive)."""
+    import zipfile
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(archive, "w") as zf:
+        for rel_path, text in files.items():
+            zf.writestr(f"{prefix}/{rel_path}" if prefix else rel_path, text)
+    return str(archive)
+
+
+@pytest.fixture
+def sample_template(tmp_path) -> str:
+    """Template folder: a Header.msg and a project_fut.txt selecting both SAMPLE_SDVSIDL projects."""
+    return write_files(tmp_path / "template", {
+        "Header.msg": "builtin_interfaces/Time stamp\nstring frame_id\n",
+        "project_fut.txt": "BrakeApp\nDoorApp  # both sample projects\n#Other\n",
+    })
+
+
+def read_tree(root) -> dict:
+    """{relative path: text} of every file under `root`."""
+    root = Path(root)
+    return {path.relative_to(root).as_posix(): path.read_text(encoding="utf-8")
+            for path in sorted(root.rglob("*")) if path.is_file()}
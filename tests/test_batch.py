@@ -0,0 +1,56 @@
+# ros_interface_generator/tests/test_batch.py
+import json
+
+import pytest
+
+from ros_interface_generator.batch import MANIFEST_DIFF_FILENAME, parse_baseline_spec, write_manifest_diff
+
+from conftest import write_files
+
+
+def _baseline(tmp_path, name, rows, files):
+    root = tmp_path / name
+    write_files(root / "msg", files)
+    manifest = root / "doc" / "ros_interface_manifest.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text(json.dumps(rows))
+    return name, str(manifest), str(root / "msg")
+
+
+def test_manifest_diff_of_consecutive_baselines(tmp_path):
+    brake = {"ros_filename": "Brake.msg", "proto_file": "brake_topics.proto"}
+    wheel = {"ros_filename": "Wheel.msg", "proto_file": "wheel.proto"}
+    door = {"ros_filename": "Door.msg", "proto_file": "door.proto"}
+    baselines = [
+        _baseline(tmp_path, "BL4", [brake, wheel], {"Brake.msg": "int32 a\n", "Wheel.msg": "int32 s\n"}),
+        _baseline(tmp_path, "BL5", [brake, {**wheel, "proto_file": "wheel_v2.proto"}, door],
+                  {"Brake.msg": "int32 a\n", "Wheel.msg": "int64 s\n", "Door.msg": "bool o\n"}),
+        _baseline(tmp_path, "BL6", [door], {"Door.msg": "bool opened\n"}),
+    ]
+    output = tmp_path / "doc" / MANIFEST_DIFF_FILENAME
+
+    diffs = write_manifest_diff(baselines, str(output))
+    assert json.loads(output.read_text()) == diffs
+    first, second = diffs
+    assert (first["from"], first["to"], second["from"], second["to"]) == ("BL4", "BL5", "BL5", "BL6")
+    assert first["added"] == [door] and first["removed"] == []
+    assert first["changed"] == [{"ros_filename": "Wheel.msg", "from": [wheel],
+                                 "to": [{**wheel, "proto_file": "wheel_v2.proto"}]}]
+    # Brake.msg is unchanged, Wheel.msg changed on disk as well
+    assert first["content_changed"] == ["Wheel.msg"]
+    assert [r["ros_filename"] for r in second["removed"]] == ["Brake.msg", "Wheel.msg"]
+    assert second["changed"] == [] and second["content_changed"] == ["Door.msg"]
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("BL6=a.zip", ("BL6", ["a.zip"])),
+    ("BL6=a,b/c,", ("BL6", ["a", "b/c"])),
+])
+def test_baseline_spec(spec, expected):
+    assert parse_baseline_spec(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["BL6", "=a.zip", "BL6="])
+def test_invalid_baseline_spec(spec):
+    with pytest.raises(ValueError):
+        parse_baseline_spec(spec)
@@ -0,0 +1,56 @@
+# ros_interface_generator/tests/test_check.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from ros_interface_generator.check import check_inputs
+
+from conftest import SAMPLE_SDVSIDL, write_files
+
+
+def test_planned_outputs(tmp_path, sample_protos, sample_template):
+    sdv = write_files(tmp_path / "BL", SAMPLE_SDVSIDL)
+    errors, warnings, planned = check_inputs(sample_protos, sample_template, [sdv])
+    assert (errors, warnings) == ([], [])
+    assert planned == [("msg", "Brake.msg"), ("msg", "BrakeFrontLeft.msg"), ("srv", "OpenDoor.srv")]
+
+
+def test_unresolved_inputs(tmp_path, sample_protos, sample_template):
+    sdv = write_files(tmp_path / "BL", {
+        "swc/BrakeApp.sdvsidl": 'event { topic { topic_name: "sdv.chassis.Missing" } }\n',
+        "swc/DoorApp.sdvsidl": 'rpc_definition { rpc_service_name: "sdv.body.DoorService"\n'
+                               '  method_definition { method_vsidl_name: "CloseDoor" } }\n',
+    })
+    errors, warnings, planned = check_inputs(sample_protos, sample_template, [sdv])
+    assert errors == ["BrakeApp.sdvsidl: message Missing not found in the proto catalog"]
+    assert warnings == ["Warning: DoorApp.sdvsidl: service CloseDoor could not be resolved (sdv.body.DoorService)"]
+    assert planned == []
+
+
+def test_missing_paths(tmp_path, sample_template):
+    missing = str(tmp_path / "nowhere")
+    errors, _, _ = check_inputs(missing, sample_template, [missing + ".zip"])
+    assert errors == [f"proto folder not found: {missing}", f"sdvsidl input not found: {missing}.zip"]
+    _, warnings, _ = check_inputs(str(tmp_path), str(tmp_path), [str(tmp_path)])
+    assert warnings[0] == f"Warning: no Header.msg in {tmp_path} → not copied"
+    assert not os.path.exists(tmp_path / "msg")
+
+
+def test_help_imports_only_the_constants():
+    package_dir = Path(__file__).resolve().parent.parent
+    script = (
+        "import runpy, sys, types\n"
+        "package = types.ModuleType('ros_interface_generator')\n"
+        f"package.__path__ = [{str(package_dir)!r}]\n"
+        "sys.modules['ros_interface_generator'] = package\n"
+        "sys.argv = ['main', '--help']\n"
+        "try:\n"
+        "    runpy.run_module('ros_interface_generator.main', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in sys.modules if m.startswith('ros_interface_generator.')), file=sys.stderr)\n"
+    )
+    done = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert "--dedupe_layouts {report,merge}" in done.stdout
+    assert done.stderr.strip() == "['ros_interface_generator.constants']"
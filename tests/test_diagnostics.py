@@ -0,0 +1,51 @@
+# ros_interface_generator/tests/test_diagnostics.py
+import json
+
+import pytest
+
+from ros_interface_generator.diagnostics import DiagnosticsCollector
+from ros_interface_generator.output_tree import OutputTree
+
+
+def test_text_file_and_jsonl_stream(tmp_path):
+    text_path, jsonl_path = tmp_path / "doc" / "warnings.txt", tmp_path / "doc" / "warnings.jsonl"
+    diagnostics = DiagnosticsCollector(str(text_path), str(jsonl_path))
+    diagnostics.report("warning", "empty-enum", "Warning: empty enum: Level", source="a.proto:3")
+    # streamed as soon as reported, the text file only on flush
+    assert json.loads(jsonl_path.read_text())["code"] == "empty-enum"
+    assert not text_path.exists()
+
+    diagnostics.report("info", "filename-conflict", "Info: renamed", file="Brake.msg")
+    assert diagnostics.flush()
+    assert not diagnostics.flush()
+    diagnostics.close()
+
+    assert text_path.read_text() == "Warning: empty enum: Level\nInfo: renamed"
+    records = [json.loads(line) for line in jsonl_path.read_text().splitlines()]
+    assert [(r["severity"], r["file"], r["source"]) for r in records] == [
+        ("warning", None, "a.proto:3"), ("info", "Brake.msg", None)]
+    assert (diagnostics.count("warning"), diagnostics.count("info"), diagnostics.count("error")) == (1, 1, 0)
+
+
+def test_nothing_written_without_records(tmp_path):
+    diagnostics = DiagnosticsCollector(str(tmp_path / "warnings.txt"))
+    diagnostics.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_severity():
+    with pytest.raises(ValueError):
+        DiagnosticsCollector().report("fatal", "x", "x")
+
+
+def test_flush_into_a_tree(tmp_path):
+    text_path = str(tmp_path / "doc" / "warnings.txt")
+    diagnostics = DiagnosticsCollector(text_path)
+    diagnostics.report("warning", "empty-enum", "Warning: empty enum: Level")
+    tree = OutputTree([])
+    assert diagnostics.flush(tree)
+    assert tree.read(text_path) == "Warning: empty enum: Level"
+    diagnostics.close()     # already flushed: not written again
+    assert not (tmp_path / "doc").exists()
+    tree.commit()
+    assert (tmp_path / "doc" / "warnings.txt").read_text() == "Warning: empty enum: Level"
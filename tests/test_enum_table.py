@@ -0,0 +1,63 @@
+# ros_interface_generator/tests/test_enum_table.py
+import pytest
+
+from ros_interface_generator.enum_table import EnumTable, get_enum_table, render_enum_block
+from ros_interface_generator.proto_parser import ProtoCatalog
+
+from conftest import SAMPLE_PROTOS, write_files
+
+MODES = """syntax = "proto3";
+package sdv.test;
+enum Mode {
+  MODE_OFF = 0;
+  MODE_HEX = 0x10;
+  MODE_OCTAL = 017;
+  MODE_BACK = -2;
+}
+enum Empty {
+  option allow_alias = true;
+}
+"""
+
+
+@pytest.fixture
+def table(tmp_path):
+    root = write_files(tmp_path / "protos", {**SAMPLE_PROTOS, "sdv/test/modes.proto": MODES})
+    return EnumTable(ProtoCatalog(root))
+
+
+def test_lookup_selects_the_first_file(table):
+    levels = table.lookup("Level")
+    assert [info.rel_path for info in levels] == ["sdv/chassis/brake_types.proto"] * 2
+    assert [info.values for info in levels] == [(0, 1), (0, 1)]
+    assert table.lookup("Brake") == ()
+
+
+def test_numbers_are_read_as_written_digits(table):
+    [mode] = table.lookup("Mode")
+    # 0x10 has always been read as 0 and 017 as 17
+    assert mode.values == (0, 0, 17, -2)
+    assert mode.ros_type == "int8"
+    text, warning = table.render(mode)
+    assert warning is None
+    assert text == "\n".join([
+        "# Add Enum Mode",
+        "int8 C_MODE_OFF = 0",
+        "int8 C_MODE_HEX = 0",
+        "int8 C_MODE_OCTAL = 17",
+        "int8 C_MODE_BACK = -2",
+    ])
+    assert (text, warning) == render_enum_block("Mode", mode.block)
+
+
+def test_warnings(table):
+    [empty] = table.lookup("Empty")
+    assert empty.ros_type is None
+    assert table.render(empty) == ("Warning: empty enum: Empty", "Warning: empty enum: Empty")
+
+    [mode] = table.lookup("Mode")
+    assert table.render(mode, max_line_length=4) is table.render(mode, max_line_length=4)
+
+
+def test_table_is_built_once_per_catalog(sample_protos):
+    assert get_enum_table(sample_protos) is get_enum_table(sample_protos)
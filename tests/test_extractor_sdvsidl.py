@@ -0,0 +1,33 @@
+# ros_interface_generator/tests/test_extractor_sdvsidl.py
+from ros_interface_generator.extractor_sdvsidl import (
+    extract_rpc_methods_from_sdvsidl, extract_topics_from_sdvsidl_file_list)
+from ros_interface_generator.parse_cache import ParseCache
+
+EXPECTED = [
+    ("Brake", "brake_topics.proto", "BrakeFrontLeft", "BrakeFront"),
+    ("Brake", "brake_topics.proto", "Brake", "Brake"),
+]
+
+
+def test_topics_in_file_order(sample_protos, sample_sdvsidl):
+    assert extract_topics_from_sdvsidl_file_list(sample_sdvsidl, sample_protos) == EXPECTED
+
+
+def test_parallel_extraction_matches_serial(sample_protos, sample_sdvsidl):
+    serial = extract_topics_from_sdvsidl_file_list(sample_sdvsidl, sample_protos, jobs=1)
+    assert extract_topics_from_sdvsidl_file_list(sample_sdvsidl, sample_protos, jobs=2) == serial
+    reversed_files = sample_sdvsidl[::-1]
+    assert (extract_topics_from_sdvsidl_file_list(reversed_files, sample_protos, jobs=2)
+            == extract_topics_from_sdvsidl_file_list(reversed_files, sample_protos, jobs=1))
+
+
+def test_cached_extraction(tmp_path, sample_protos, sample_sdvsidl):
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert extract_topics_from_sdvsidl_file_list(sample_sdvsidl, sample_protos, cache, jobs=2) == EXPECTED
+    hits = cache.hits
+    assert extract_topics_from_sdvsidl_file_list(sample_sdvsidl, sample_protos, cache, jobs=2) == EXPECTED
+    assert cache.hits == hits + len(sample_sdvsidl)
+
+
+def test_rpc_methods(sample_sdvsidl):
+    assert extract_rpc_methods_from_sdvsidl(sample_sdvsidl[1]) == [("sdv.body.DoorService", "OpenDoor")]
@@ -0,0 +1,104 @@
+# ros_interface_generator/tests/test_incremental.py
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from ros_interface_generator.incremental import (
+    DEPS_FILENAME, build_dependency_graph, commit_outputs, load_dependency_graph)
+from ros_interface_generator.output_tree import OutputTree
+from ros_interface_generator.parse_cache import CACHE_VERSION
+from ros_interface_generator.session import GeneratorSession
+
+from conftest import SAMPLE_SDVSIDL, read_tree, write_files
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    target = {g: str(tmp_path / "out" / g) for g in ("msg", "srv")}
+    return target, str(tmp_path / "out" / "doc" / DEPS_FILENAME)
+
+
+def _run(dirs, files):
+    target, deps = dirs
+    tree = OutputTree([])
+    for key, text in files.items():
+        group, name = key.split("/", 1)
+        tree.write(os.path.join(target[group], name), text)
+    graph = build_dependency_graph([], [], tree, target)
+    return commit_outputs(tree, target, graph, deps)
+
+
+def test_unchanged_outputs_keep_their_mtime(dirs):
+    target, deps = dirs
+    files = {"msg/Brake.msg": "int32 level\n", "srv/OpenDoor.srv": "---\n"}
+    assert _run(dirs, files)[0] == ["msg/Brake.msg", "srv/OpenDoor.srv"]
+    brake = os.path.join(target["msg"], "Brake.msg")
+    os.utime(brake, (1, 1))
+
+    written, unchanged, deleted = _run(dirs, {**files, "srv/OpenDoor.srv": "int32 id\n---\n"})
+    assert (written, unchanged, deleted) == (["srv/OpenDoor.srv"], ["msg/Brake.msg"], [])
+    assert os.stat(brake).st_mtime == 1
+    assert set(load_dependency_graph(deps)) == {"msg/Brake.msg", "srv/OpenDoor.srv"}
+
+
+def test_only_recorded_outputs_are_deleted(dirs):
+    target, deps = dirs
+    _run(dirs, {"msg/Brake.msg": "int32 level\n", "msg/Wheel.msg": "int32 speed\n"})
+    write_files(Path(target["msg"]), {"NOTES.txt": "kept by the user\n"})
+
+    written, unchanged, deleted = _run(dirs, {"msg/Brake.msg": "int32 level\n"})
+    assert deleted == ["msg/Wheel.msg"]
+    assert sorted(os.listdir(target["msg"])) == ["Brake.msg", "NOTES.txt"]
+
+
+def test_outputs_of_another_generator_version_are_still_deleted(dirs):
+    target, deps = dirs
+    _run(dirs, {"msg/Brake.msg": "int32 level\n", "msg/Wheel.msg": "int32 speed\n"})
+    with open(deps, encoding="utf-8") as f:
+        data = json.load(f)
+    data["version"] = "older"
+    with open(deps, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert load_dependency_graph(deps) == {}
+
+    assert _run(dirs, {"msg/Brake.msg": "int32 level\n"})[2] == ["msg/Wheel.msg"]
+    with open(deps, encoding="utf-8") as f:
+        assert json.load(f)["version"] == CACHE_VERSION
+
+
+def test_inputs_follow_the_manifest_rows(dirs):
+    target, _ = dirs
+    tree = OutputTree([])
+    tree.write(os.path.join(target["msg"], "Brake.msg"), "int32 level\n")
+    rows = [{"ros_filename": "Brake.msg"}, {"ros_filename": "BrakeRear.msg", "alias_of": "Brake.msg"}]
+    graph = build_dependency_graph(rows, [{"message:Brake": "abc"}, {"message:BrakeRear": "def"}], tree, target)
+    assert graph["msg/Brake.msg"]["inputs"] == {"message:Brake": "abc", "message:BrakeRear": "def"}
+
+
+def test_session_writes_only_the_changed_files(tmp_path, sample_protos, sample_template, capsys):
+    sdv = write_files(tmp_path / "BL", SAMPLE_SDVSIDL)
+    out = tmp_path / "out"
+    session = GeneratorSession(sample_protos, sample_template, incremental=True)
+
+    def _generate():
+        session.generate([sdv], str(out / "msg"), str(out / "srv"), str(out / "doc"))
+        return read_tree(out)
+
+    first = _generate()
+    assert f"Messages : {out / 'msg'}" in capsys.readouterr().out
+    brake = out / "msg" / "Brake.msg"
+    os.utime(brake, (1, 1))
+    write_files(out / "msg", {"Notes.txt": "kept by the user\n"})
+
+    assert _generate() == {**first, "msg/Notes.txt": "kept by the user\n"}
+    printed = capsys.readouterr().out
+    assert "Render: 0 rendered, 3 unchanged" in printed
+    assert "Incremental: 0 written, 6 unchanged, 0 deleted" in printed
+    assert os.stat(brake).st_mtime == 1
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]     # no staging folder
+
+    os.remove(os.path.join(sdv, "swc", "body", "DoorApp.sdvsidl"))
+    assert "srv/OpenDoor.srv" not in _generate()
+    assert "✘ srv/OpenDoor.srv" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+# ros_interface_generator/tests/test_layouts.py
+import json
+import os
+
+import pytest
+
+from ros_interface_generator.layouts import LAYOUT_REPORT_FILENAME, canonical_layout, dedupe_layouts
+from ros_interface_generator.output_tree import OutputTree
+from ros_interface_generator.session import GeneratorSession
+
+from conftest import SAMPLE_SDVSIDL, read_tree, write_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    msg = write_files(tmp_path / "msg", {
+        "Gear.msg": "uint8 value\n",
+        "GearState.msg": "# same layout, other comments\nuint8   value  # current gear\n\n",
+        "Pedal.msg": "Gear gear\n",
+        "PedalInput.msg": "GearState gear\n",       # identical to Pedal once GearState is merged
+        "Car.msg": "GearState gear\nGearState[] history\nPedalInput pedal\nGearStateX other\n",
+        "Other.msg": "int32 value\n",
+    })
+    srv = write_files(tmp_path / "srv", {"Shift.srv": "GearState target\n---\nbool ok\n"})
+    return msg, srv, OutputTree([msg, srv])
+
+
+def test_canonical_layout():
+    assert canonical_layout("# c\n  uint8   value  # x\n\nint32 y\n") == "uint8 value\nint32 y"
+
+
+def test_report_keeps_files(tree):
+    msg, srv, tree = tree
+    before = dict(tree.files)
+    assert dedupe_layouts(tree, msg, srv) == {"GearState": "Gear"}
+    assert tree.files == before
+
+
+def test_merge_retypes_users_until_stable(tree):
+    msg, srv, tree = tree
+    aliases = dedupe_layouts(tree, msg, srv, merge=True)
+    assert aliases == {"GearState": "Gear", "PedalInput": "Pedal"}
+    files = {os.path.relpath(path, os.path.dirname(msg)): text for path, text in tree.files.items()}
+    assert sorted(files) == ["msg/Car.msg", "msg/Gear.msg", "msg/Other.msg", "msg/Pedal.msg", "srv/Shift.srv"]
+    # only whole type names are retyped
+    assert files["msg/Car.msg"] == "Gear gear\nGear[] history\nPedal pedal\nGearStateX other\n"
+    assert files["srv/Shift.srv"] == "Gear target\n---\nbool ok\n"
+
+
+@pytest.mark.parametrize("mode", ["report", "merge"])
+def test_session_alias_of(tmp_path, sample_protos, sample_template, mode):
+    sdv = write_files(tmp_path / "BL", SAMPLE_SDVSIDL)
+    out = tmp_path / "out"
+    session = GeneratorSession(sample_protos, sample_template, dedupe_layouts=mode)
+    session.generate([sdv], str(out / "msg"), str(out / "srv"), str(out / "doc"))
+    written = read_tree(out)
+
+    rows = json.loads(written["doc/ros_interface_manifest.json"])
+    assert [(row["ros_filename"], row["alias_of"]) for row in rows] == [
+        ("Brake.msg", ""), ("BrakeFrontLeft.msg", "Brake.msg")]
+    assert ("msg/BrakeFrontLeft.msg" in written) == (mode == "report")
+    assert json.loads(written[f"doc/{LAYOUT_REPORT_FILENAME}"]) == {
+        "mode": mode, "groups": [{"canonical": "Brake.msg", "aliases": ["BrakeFrontLeft.msg"]}], "aliases": 1}
+    assert "alias_of" in written["doc/ros_interface_manifest.csv"].splitlines()[0]
@@ -0,0 +1,74 @@
+# ros_interface_generator/tests/test_output_tree.py
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from ros_interface_generator.output_tree import OutputTree
+
+from conftest import write_files
+
+
+@pytest.fixture
+def out(tmp_path):
+    return write_files(tmp_path / "msg", {"Brake.msg": "int32 level\n", "Wheel.msg": "int32 speed\n"})
+
+
+def test_only_modified_documents_are_written(out):
+    wheel = os.path.join(out, "Wheel.msg")
+    os.utime(wheel, (1, 1))
+    tree = OutputTree([out])
+    tree.write(os.path.join(out, "Door.msg"), "bool opened\n")
+    assert tree.commit() == 1
+    assert os.stat(wheel).st_mtime == 1
+    assert sorted(os.listdir(out)) == ["Brake.msg", "Door.msg", "Wheel.msg"]
+
+
+def test_renames_and_unlinks_reach_the_disk_on_commit(out):
+    tree = OutputTree([out])
+    tree.rename(os.path.join(out, "Brake.msg"), os.path.join(out, "BrakeT.msg"))
+    tree.unlink(os.path.join(out, "Wheel.msg"))
+    assert sorted(os.listdir(out)) == ["Brake.msg", "Wheel.msg"]
+    assert [p.name for p in tree.glob(out, "*.msg")] == ["BrakeT.msg"]
+    tree.commit()
+    assert os.listdir(out) == ["BrakeT.msg"]
+    assert OutputTree([out]).files == {os.path.join(out, "BrakeT.msg"): "int32 level\n"}
+
+
+def test_written_files_follow_the_umask(out):
+    previous = os.umask(0o027)
+    try:
+        tree = OutputTree([out])
+        tree.write(os.path.join(out, "Door.msg"), "bool opened\n")
+        tree.commit()
+    finally:
+        os.umask(previous)
+    assert stat.S_IMODE(os.stat(os.path.join(out, "Door.msg")).st_mode) == 0o640
+
+
+def test_temporary_files_are_skipped_and_cleaned_up(out, monkeypatch):
+    write_files(Path(out), {".Brake.msg.0123abcd.tmp": "partial"})
+    tree = OutputTree([out])
+    assert sorted(os.path.basename(p) for p in tree.files) == ["Brake.msg", "Wheel.msg"]
+
+    def _fail(src, dst):
+        raise OSError("disk full")
+
+    tree.write(os.path.join(out, "Brake.msg"), "int32 torque\n")
+    monkeypatch.setattr(os, "replace", _fail)
+    with pytest.raises(OSError):
+        tree.commit()
+    assert sorted(os.listdir(out)) == [".Brake.msg.0123abcd.tmp", "Brake.msg", "Wheel.msg"]
+
+
+def test_parallel_commit_matches_serial(tmp_path):
+    trees = []
+    for jobs in (1, 4):
+        root = str(tmp_path / f"jobs{jobs}")
+        tree = OutputTree([root])
+        for i in range(20):
+            tree.write(os.path.join(root, f"M{i}.msg"), f"int32 f{i}\n")
+        assert tree.commit(jobs) == 20
+        trees.append({os.path.basename(p): text for p, text in OutputTree([root]).files.items()})
+    assert trees[0] == trees[1]
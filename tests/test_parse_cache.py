@@ -0,0 +1,141 @@
+# ros_interface_generator/tests/test_parse_cache.py
+import os
+import sys
+import threading
+
+import pytest
+
+from ros_interface_generator import parse_cache
+from ros_interface_generator.parse_cache import ParseCache, bundle_name
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "a.proto"
+    path.write_text("message A {}\n")
+    return path
+
+
+def _stored(tmp_path, source, key=""):
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.put("protos", str(source), "parsed A", key=key)
+    cache.save()
+    return ParseCache(str(tmp_path / "cache"))
+
+
+def test_unchanged_source_is_reused(tmp_path, source):
+    cache = _stored(tmp_path, source)
+    assert cache.get("protos", str(source)) == "parsed A"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_edited_source_is_invalidated(tmp_path, source):
+    cache = _stored(tmp_path, source)
+    source.write_text("message B {}\n")
+    assert cache.get("protos", str(source)) is None
+    assert cache.misses == 1
+
+
+def test_touched_source_falls_back_to_content_hash(tmp_path, source):
+    cache = _stored(tmp_path, source)
+    st = source.stat()
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get("protos", str(source)) == "parsed A"
+
+
+def test_same_size_edit_with_new_stamp_is_invalidated(tmp_path, source):
+    cache = _stored(tmp_path, source)
+    st = source.stat()
+    source.write_text("message Z {}\n")
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get("protos", str(source)) is None
+
+
+def test_key_mismatch_and_deleted_source(tmp_path, source):
+    cache = _stored(tmp_path, source, key="catalog-1")
+    assert cache.get("protos", str(source), key="catalog-2") is None
+    assert cache.get("protos", str(source), key="catalog-1") == "parsed A"
+    source.unlink()
+    assert cache.get("protos", str(source), key="catalog-1") is None
+
+
+def test_module_change_discards_bundles(tmp_path, source, monkeypatch):
+    _stored(tmp_path, source)
+    monkeypatch.setattr(parse_cache, "CACHE_VERSION", "another generator")
+    assert ParseCache(str(tmp_path / "cache")).get("protos", str(source)) is None
+
+
+def test_cache_version_follows_module_sources(tmp_path, monkeypatch):
+    for name in parse_cache._CACHED_MODULES:
+        (tmp_path / name).write_text(f"# {name}\n")
+    monkeypatch.setattr(parse_cache, "__file__", str(tmp_path / "parse_cache.py"))
+    before = parse_cache._compute_cache_version()
+    (tmp_path / "proto_ast.py").write_text("# edited\n")
+    assert parse_cache._compute_cache_version() != before
+
+
+def test_prune_and_bundle_name(tmp_path, source):
+    cache = _stored(tmp_path, source)
+    cache.prune("protos", [])
+    cache.save()
+    assert ParseCache(str(tmp_path / "cache")).get("protos", str(source)) is None
+    assert bundle_name("proto", str(tmp_path)) == bundle_name("proto", str(tmp_path) + "/.")
+    assert bundle_name("proto", str(tmp_path)) != bundle_name("sdv", str(tmp_path))
+
+
+def test_catalog_reparses_only_edited_protos(tmp_path, sample_protos):
+    from ros_interface_generator.proto_parser import ProtoCatalog
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    first = ProtoCatalog(sample_protos, cache)
+    cache.save()
+
+    door = os.path.join(sample_protos, "sdv", "body", "sdv_body_door_service.proto")
+    with open(door, "a") as f:
+        f.write("message CloseDoorRequest {}\n")
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    second = ProtoCatalog(sample_protos, cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert second.find_messages("CloseDoorRequest")
+    assert second.fingerprint != first.fingerprint
+
+
+def test_concurrent_readers_and_writers(tmp_path):
+    sources = []
+    for i in range(40):
+        path = tmp_path / f"m{i}.proto"
+        path.write_text(f"message M{i} {{}}\n")
+        sources.append(str(path))
+    cache = ParseCache(str(tmp_path / "cache"))
+    errors = []
+
+    def _worker(offset):
+        try:
+            for i in range(len(sources)):
+                path = sources[(i + offset) % len(sources)]
+                if cache.get("protos", path) is None:
+                    cache.put("protos", path, f"parsed {os.path.basename(path)}")
+                if i % 10 == 0:
+                    cache.save()
+                    cache.prune("protos", sources)
+        except Exception as e:      # surfaced in the main thread
+            errors.append(e)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)     # switch threads as often as possible
+    try:
+        threads = [threading.Thread(target=_worker, args=(n * 7,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    cache.save()
+    assert errors == []
+    assert cache.hits + cache.misses == 8 * len(sources)
+
+    reloaded = ParseCache(str(tmp_path / "cache"))
+    assert [reloaded.get("protos", path) for path in sources] == [f"parsed m{i}.proto" for i in range(40)]
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.endswith(".tmp")]
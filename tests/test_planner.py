@@ -0,0 +1,68 @@
+# ros_interface_generator/tests/test_planner.py
+import json
+import os
+
+import pytest
+
+from ros_interface_generator.planner import write_plan
+from ros_interface_generator.session import GeneratorSession
+
+from conftest import SAMPLE_PROTOS, SAMPLE_SDVSIDL, read_tree, write_files
+
+# A lower-case topic type renamed by the sanitizer, using a message of another file
+WHEEL_PROTO = """syntax = "proto3";
+package sdv.chassis;
+message wheel_state_t {
+  Wheel wheel = 1;
+  Level level = 2;
+}
+"""
+WHEEL_SDVSIDL = """event {
+  event_name: "WheelState"
+  topic { topic_name: "sdv.chassis.wheel_state_t" }
+}
+"""
+
+
+@pytest.fixture
+def inputs(tmp_path, sample_template):
+    protos = write_files(tmp_path / "protos", {**SAMPLE_PROTOS, "sdv/chassis/pubsub/wheel_topics.proto": WHEEL_PROTO})
+    sdv = write_files(tmp_path / "BL", {**SAMPLE_SDVSIDL, "swc/chassis/BrakeApp2.sdvsidl": WHEEL_SDVSIDL})
+    template = write_files(tmp_path / "template", {"project_fut.txt": "BrakeApp\nBrakeApp2\nDoorApp\n"})
+    return protos, sdv, template
+
+
+def _dirs(out):
+    return str(out / "msg"), str(out / "srv"), str(out / "doc")
+
+
+def test_plan_matches_the_written_tree(tmp_path, inputs):
+    protos, sdv, template = inputs
+    out = tmp_path / "out"
+    report = GeneratorSession(protos, template).plan([sdv], *_dirs(out))
+    assert not out.exists()
+
+    GeneratorSession(protos, template).generate([sdv], *_dirs(out))
+    written = read_tree(out)
+    assert sorted(os.path.relpath(f["path"], out) for f in report["files"]) == sorted(written)
+    assert report["manifest"] == json.loads(written["doc/ros_interface_manifest.json"])
+    assert report["summary"]["files"] == len(written)
+
+
+def test_rename_chain(tmp_path, inputs):
+    protos, sdv, template = inputs
+    report = GeneratorSession(protos, template).plan([sdv], *_dirs(tmp_path / "out"))
+    files = {os.path.basename(f["path"]): f for f in report["files"]}
+    assert files["WheelStateT.msg"]["chain"] == [
+        {"stage": "sdvsidl", "name": "wheel_state_t"}, {"stage": "sanitize", "name": "WheelStateT"}]
+    assert files["WheelStateT.msg"]["top_level"]
+    assert not files["Wheel.msg"]["top_level"]
+    assert report["summary"]["renamed"] == 1
+
+
+def test_write_plan(tmp_path, capsys):
+    path = tmp_path / "plan.json"
+    write_plan({"files": []}, str(path))
+    assert json.loads(path.read_text()) == {"files": []}
+    write_plan({"files": []}, "-")
+    assert json.loads(capsys.readouterr().out) == {"files": []}
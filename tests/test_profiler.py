@@ -0,0 +1,46 @@
+# ros_interface_generator/tests/test_profiler.py
+import builtins
+import io
+import os
+import zipfile
+
+import pytest
+
+from ros_interface_generator.profiler import Profiler
+
+from conftest import write_files
+
+
+def _patched():
+    return builtins.open, io.open, os.walk, zipfile.ZipFile.open
+
+
+def test_io_is_counted_inside_the_profiled_run_only(tmp_path):
+    write_files(tmp_path, {"a.proto": "syntax = \"proto3\";\n"})
+    before = _patched()
+    profiler = Profiler()
+    with profiler.profiling():
+        with profiler.stage("read"):
+            with open(tmp_path / "a.proto", encoding="utf-8") as f:
+                f.read()
+            list(os.walk(tmp_path))
+    assert _patched() == before
+    assert not profiler.enabled
+    assert profiler.counters["files read"] == 1
+    assert profiler.counters["bytes read"] == len('syntax = "proto3";\n')
+    assert profiler.counters["os.walk calls"] == 1
+    assert [name for name, *_ in profiler.stage_timings()] == ["read"]
+
+    open(tmp_path / "a.proto").close()      # not counted once the run is over
+    assert profiler.io.files_opened == 1
+
+
+def test_patches_are_undone_when_the_run_fails():
+    before = _patched()
+    profiler = Profiler()
+    with pytest.raises(RuntimeError):
+        with profiler.profiling():
+            raise RuntimeError("generation failed")
+    assert _patched() == before
+    assert not profiler.enabled
+    assert "files opened" in profiler.counters
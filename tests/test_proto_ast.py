@@ -0,0 +1,108 @@
+# ros_interface_generator/tests/test_proto_ast.py
+import pytest
+
+from ros_interface_generator.proto_ast import ProtoSyntaxError, parse_proto, tokenize
+
+SOURCE = """syntax = "proto3";
+package sdv.test;
+// a comment with braces } {
+/* a block comment {
+   spanning lines } */
+message Outer {
+  string label = 1 [default = "}{ not a brace"];
+  message Inner {
+    enum Kind {
+      KIND_UNSPECIFIED = 0;
+    }
+    int32 depth = 1;   // trailing }
+  }
+  Inner inner = 2;
+  oneof choice {
+    bytes raw_bytes = 3;
+    int64 count = 4;
+  }
+  map<string, int32> counters = 5;
+  repeated int32 samples = 6 [(sdv.repeated_field_max_count) = 8];
+}
+enum Numbers {
+  NUMBERS_ZERO = 0;
+  NUMBERS_HEX = 0x1F;
+  NUMBERS_OCTAL = 017;
+  NUMBERS_NEGATIVE = -3;
+  NUMBERS_NEGATIVE_HEX = -0x10;
+}
+service Control {
+  rpc Start(Outer) returns (stream Outer);
+  rpc Stop(Outer) returns (Outer) { option deprecated = true; }
+}
+"""
+
+
+@pytest.fixture
+def ast():
+    return parse_proto(SOURCE, "test.proto")
+
+
+def test_comments_and_strings_do_not_affect_blocks(ast):
+    assert [m.name for m in ast.iter_messages()] == ["Outer", "Inner"]
+    outer = next(ast.iter_messages())
+    text = ast.block_text(outer)
+    assert text.startswith("message Outer {") and text.endswith("}")
+    assert text.count("\n") == 15
+    assert outer.fields[0].options["default"] == "}{ not a brace"
+
+
+def test_tokens_skip_comments():
+    texts, ends = tokenize('a /* { */ "x}" // }\nb')
+    assert texts == ["a", '"x}"', "b"]
+    assert ends[-1] == len('a /* { */ "x}" // }\nb')
+
+
+def test_nested_messages_and_fields(ast):
+    outer, inner = ast.iter_messages()
+    assert inner.full_name == "sdv.test.Outer.Inner"
+    assert [e.full_name for e in ast.iter_enums()] == ["sdv.test.Outer.Inner.Kind", "sdv.test.Numbers"]
+    # nested fields are yielded where their message appears, as the generators read a block
+    assert [f.name for f in outer.iter_fields()] == ["label", "depth", "inner", "raw_bytes", "count", "counters", "samples"]
+    assert [f.name for f in outer.iter_fields(nested=False)] == ["label", "inner", "raw_bytes", "count", "counters", "samples"]
+
+    fields = {f.name: f for f in outer.fields}
+    assert fields["raw_bytes"].oneof == "choice"
+    assert fields["counters"].is_map and fields["counters"].key_type == "string"
+    assert fields["samples"].is_repeated
+    assert fields["samples"].option("repeated_field_max_count") == "8"
+
+
+def test_enum_value_literals(ast):
+    numbers = list(ast.iter_enums())[1]
+    assert [(v.name, v.number) for v in numbers.values] == [
+        ("NUMBERS_ZERO", 0),
+        ("NUMBERS_HEX", 31),
+        ("NUMBERS_OCTAL", 15),
+        ("NUMBERS_NEGATIVE", -3),
+        ("NUMBERS_NEGATIVE_HEX", -16),
+    ]
+
+
+def test_services(ast):
+    [service] = ast.services
+    start, stop = service.rpcs
+    assert (start.request_type, start.response_type, start.server_streaming) == ("Outer", "Outer", True)
+    assert stop.options == {"deprecated": "true"}
+    assert service.find_rpc("Stop") is stop
+
+
+def test_line_of(ast):
+    outer = next(ast.iter_messages())
+    assert ast.line_of(outer.start) == 6
+
+
+@pytest.mark.parametrize("source, line", [
+    ("message A {\n  int32 x = ;\n}\n", 2),
+    ("message A {\n  int32 x = 1;\n", 3),
+    ("enum E {\n  E_A = 08;\n}\n", 2),
+])
+def test_syntax_errors(source, line):
+    with pytest.raises(ProtoSyntaxError) as error:
+        parse_proto(source, "bad.proto")
+    assert error.value.line == line
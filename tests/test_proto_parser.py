@@ -0,0 +1,93 @@
+# ros_interface_generator/tests/test_proto_parser.py
+import builtins
+import os
+
+import pytest
+
+from ros_interface_generator.enum_table import get_enum_table
+from ros_interface_generator.proto_parser import (
+    find_enum_blocks, find_message_block, find_proto_file_msg2, find_service_block, get_proto_catalog,
+    resolution_stats,
+)
+
+from conftest import write_zip
+
+
+def test_catalog_is_built_once_per_folder(sample_protos):
+    catalog = get_proto_catalog(sample_protos)
+    assert get_proto_catalog(sample_protos) is catalog
+    assert get_proto_catalog(catalog) is catalog
+    assert catalog.file_count == 3
+
+
+def test_lookups_do_not_read_the_tree_again(sample_protos, monkeypatch):
+    get_proto_catalog(sample_protos)
+
+    def no_open(*args, **kwargs):
+        raise AssertionError("the catalog read a file after being built")
+
+    monkeypatch.setattr(builtins, "open", no_open)
+    assert find_message_block(sample_protos, "OpenDoorRequest")[1] == "sdv_body_door_service.proto"
+    assert find_proto_file_msg2(sample_protos, "Brake", "sdv.chassis", top_level=True) == "brake_topics.proto"
+
+
+@pytest.mark.parametrize("message, hint, top_level, expected", [
+    ("Brake", "sdv.chassis", True, "brake_topics.proto"),       # top-level: the pubsub file
+    ("Brake", "sdv.chassis", False, "brake_types.proto"),
+    ("OpenDoorRequest", "sdv.body", True, "sdv_body_door_service.proto"),   # no pubsub file: fallback
+    ("Brake", "sdv.unknown.part", False, "brake_types.proto"),     # hint reduced, then dropped
+    ("Missing", "", False, None),
+])
+def test_find_proto_file_msg2(sample_protos, message, hint, top_level, expected):
+    assert find_proto_file_msg2(sample_protos, message, hint, top_level) == expected
+
+
+def test_enum_blocks_of_the_first_file_only(sample_protos):
+    blocks = find_enum_blocks(sample_protos, "Level")
+    assert len(blocks) == 1
+    [(path, enums)] = blocks.items()
+    assert [name for name, _ in enums] == ["Level", "Level"]
+    assert all(block.startswith("enum Level {") and block.endswith("}") for _, block in enums)
+    assert find_enum_blocks(sample_protos, "Missing") is None
+
+
+def test_find_service_block(sample_protos):
+    assert find_service_block(sample_protos, "OpenDoor", "DoorService") == ("OpenDoorRequest", "OpenDoorResponse")
+    assert find_service_block(sample_protos, "OpenDoor", "DoorService", "chassis") == (None, None)
+    assert find_service_block(sample_protos, "Close", "DoorService") == (None, None)
+
+
+def _touch_later(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_revalidate_rebuilds_changed_folder_catalog(sample_protos):
+    catalog = get_proto_catalog(sample_protos)
+    assert get_enum_table(sample_protos).lookup("Level")[0].values == (0, 1)
+
+    assert get_proto_catalog(sample_protos, revalidate=True) is catalog
+    types = os.path.join(sample_protos, "sdv", "chassis", "brake_types.proto")
+    with open(types, "a") as f:
+        f.write("enum Gear {\n  GEAR_P = 0;\n}\n")
+    _touch_later(types)
+    assert get_proto_catalog(sample_protos, revalidate=True) is not catalog
+    assert get_enum_table(sample_protos).lookup("Gear")[0].values == (0,)
+
+
+def test_revalidate_rebuilds_changed_zip_catalog(tmp_path):
+    for value in (1, 200):
+        archive = write_zip(tmp_path / "catalog.zip", {"modes.proto": f"enum Mode {{\n  MODE_ON = {value};\n}}\n"},
+                            prefix="catalog")
+        _touch_later(archive)
+        get_proto_catalog(archive, revalidate=True)
+        assert get_enum_table(archive).lookup("Mode")[0].values == (value,)
+
+
+def test_resolution_stats_since(sample_protos):
+    catalog = get_proto_catalog(sample_protos)
+    find_proto_file_msg2(catalog, "Brake")
+    before = resolution_stats(catalog)
+    find_proto_file_msg2(catalog, "Brake")
+    find_proto_file_msg2(catalog, "Missing")
+    assert resolution_stats(catalog, since=before) == {"hits": 1, "misses": 1, "entries": 1, "not_found": 1}
@@ -0,0 +1,43 @@
+# ros_interface_generator/tests/test_sanitizer.py
+import os
+
+from ros_interface_generator.msg_generator import DIAGNOSTICS
+from ros_interface_generator.output_tree import OutputTree
+from ros_interface_generator.sanitizer import RenamePlan, sanitize_interface_files
+
+from conftest import write_files
+
+
+def test_rename_plan():
+    plan = RenamePlan(["Speed_t", "SpeedT", "brake_status", "DoorRequest"], {"brake_status"}, "msg")
+    assert plan.rename_map == {"Speed_t": "SpeedT", "DoorRequest": "DoorRequestDT"}
+    # FQIN-prefixed names keep their spelling, other types are remapped once
+    assert plan.corrected_type("brake_status") == "brake_status"
+    assert plan.corrected_type("wheel_state") == "WheelState"
+    assert plan.remap("wheel_state") is plan.remap("wheel_state")
+
+
+def test_collision_replaces_the_existing_file(tmp_path):
+    out = write_files(tmp_path / "msg", {
+        "Speed_t.msg": "int32 value\n",
+        "SpeedT.msg": "int64 other\n",
+        "brake_status.msg": "double x\n",
+        "Car.msg": "# a comment\nSpeed_t speed\nfloat ratio\nbrake_status[] brakes\nuint8 gear\n",
+    })
+    tree = OutputTree([out])
+    warnings = len(DIAGNOSTICS.records)
+
+    sanitize_interface_files(out, "msg", "", tree, prefixed={"brake_status"})
+
+    files = {os.path.basename(path): text for path, text in tree.files.items()}
+    assert files == {
+        "SpeedT.msg": "int32 value\n",
+        "brake_status.msg": "float64 x\n",
+        "Car.msg": "# a comment\nSpeedT speed\nfloat32 ratio\nbrake_status[] brakes\nuint8 gear\n",
+    }
+    [collision] = DIAGNOSTICS.records[warnings:]
+    assert (collision.code, collision.file) == ("rename-collision", "SpeedT.msg")
+    # nothing reaches the disk before the commit
+    assert sorted(os.listdir(out)) == ["Car.msg", "SpeedT.msg", "Speed_t.msg", "brake_status.msg"]
+    tree.commit()
+    assert sorted(os.listdir(out)) == ["Car.msg", "SpeedT.msg", "brake_status.msg"]
@@ -0,0 +1,57 @@
+# ros_interface_generator/tests/test_sdvsidl_parser.py
+from ros_interface_generator.sdvsidl_parser import iter_sdvsidl_blocks, read_sdvsidl_blocks
+
+from conftest import SAMPLE_SDVSIDL
+
+SOURCE = """# header comment with a brace {
+package: "com.test"
+sdv_service_bundle {
+  name: "App"   # trailing } comment
+  event {
+    event_name: "Front}{"
+    topic { topic_name: "sdv.chassis.Brake::FRONT_LEFT" }
+    topic {
+      topic_name: "sdv.chassis.Wheel"
+    }
+  }
+  method_fire_forget {
+    method_name: "Reset"
+    topic: { topic_name: "sdv.body.ResetRequest" }
+  }
+  rpc_definition {
+    rpc_service_name: "sdv.body.DoorService"
+    method_definition { method_vsidl_name: "OpenDoor" }
+    method_definition { method_vsidl_name: "CloseDoor" }
+  }
+}
+topic_name: "sdv.body.Loose"
+event {
+  event_name: "Unclosed"
+  topic { topic_name: "sdv.body.Last" }
+"""
+
+
+def _summary(blocks):
+    return [(b.kind, b.name, [(t.base_type, t.suffix, t.line) for t in b.topics], b.methods, b.line) for b in blocks]
+
+
+def test_blocks_in_file_order():
+    assert _summary(iter_sdvsidl_blocks(SOURCE.splitlines(True))) == [
+        ("event", "Front}{", [("Brake", "FRONT_LEFT", 7), ("Wheel", None, 9)], [], 5),
+        ("method_fire_forget", "Reset", [("ResetRequest", None, 14)], [], 12),
+        ("rpc_definition", "sdv.body.DoorService", [], ["OpenDoor", "CloseDoor"], 16),
+        ("topic", None, [("Loose", None, 22)], [], 22),
+        # an event left open at the end of the file still counts
+        ("event", "Unclosed", [("Last", None, 25)], [], 23),
+    ]
+
+
+def test_full_topic_names():
+    [event] = [b for b in iter_sdvsidl_blocks(SOURCE.splitlines(True)) if b.name == "Front}{"]
+    assert [t.topic_name for t in event.topics] == ["sdv.chassis.Brake", "sdv.chassis.Wheel"]
+
+
+def test_read_file(sample_sdvsidl):
+    blocks = list(read_sdvsidl_blocks(sample_sdvsidl[1]))
+    assert [(b.kind, b.name) for b in blocks] == [("rpc_definition", "sdv.body.DoorService"), ("event", "Brake")]
+    assert list(iter_sdvsidl_blocks(SAMPLE_SDVSIDL["swc/body/DoorApp.sdvsidl"].splitlines(True))) == blocks
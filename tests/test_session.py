@@ -0,0 +1,129 @@
+# ros_interface_generator/tests/test_session.py
+import os
+import threading
+
+import pytest
+
+from ros_interface_generator.parse_cache import ParseCache
+from ros_interface_generator.session import GeneratorSession
+
+from conftest import SAMPLE_PROTOS, SAMPLE_SDVSIDL, read_tree, write_files, write_zip
+
+
+def _generate(session, sdvsidl_inputs, out) -> dict:
+    session.generate(sdvsidl_inputs, str(out / "msg"), str(out / "srv"), str(out / "doc"))
+    return read_tree(out)
+
+
+@pytest.fixture
+def sdv_folder(tmp_path):
+    return write_files(tmp_path / "BL", SAMPLE_SDVSIDL)
+
+
+@pytest.fixture
+def expected(tmp_path, sample_protos, sdv_folder, sample_template):
+    return _generate(GeneratorSession(sample_protos, sample_template), [sdv_folder], tmp_path / "expected")
+
+
+def test_generated_tree(expected):
+    assert sorted(expected) == [
+        "doc/ros_interface_manifest.csv", "doc/ros_interface_manifest.json",
+        "msg/Brake.msg", "msg/BrakeFrontLeft.msg", "msg/Header.msg", "srv/OpenDoor.srv",
+    ]
+    assert expected["msg/Brake.msg"] == "ast_ssot_msgs/Header header\nint32 pressure\n"
+    assert expected["srv/OpenDoor.srv"] == "int32 door\n---\nbool opened\n"
+
+
+def test_zip_inputs_match_folders(tmp_path, sample_template, expected):
+    catalog_zip = write_zip(tmp_path / "catalog.zip", SAMPLE_PROTOS, prefix="catalog")
+    sdv_zip = write_zip(tmp_path / "BL.zip", SAMPLE_SDVSIDL)
+    assert _generate(GeneratorSession(catalog_zip, sample_template), [sdv_zip], tmp_path / "zip") == expected
+
+
+def test_jobs_match_serial(tmp_path, sample_protos, sdv_folder, sample_template, expected):
+    session = GeneratorSession(sample_protos, sample_template, cache_dir=str(tmp_path / "cache"), jobs=2)
+    assert _generate(session, [sdv_folder], tmp_path / "jobs") == expected
+    # second run served by the parse cache
+    assert _generate(session, [sdv_folder], tmp_path / "cached") == expected
+
+
+def test_concurrent_sessions(tmp_path, sample_protos, sdv_folder, sample_template, expected):
+    results = {}
+
+    def _run(i):
+        results[i] = _generate(GeneratorSession(sample_protos, sample_template), [sdv_folder], tmp_path / f"run{i}")
+
+    threads = [threading.Thread(target=_run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert list(results.values()) == [expected] * 4
+
+
+def test_warm_session_reindexes_changed_protos(tmp_path, sample_protos, sdv_folder, sample_template, expected, capsys):
+    session = GeneratorSession(sample_protos, sample_template)
+    assert _generate(session, [sdv_folder], tmp_path / "first") == expected
+
+    topics = os.path.join(sample_protos, "sdv", "chassis", "pubsub", "brake_topics.proto")
+    with open(topics, "w", encoding="utf-8") as f:
+        f.write(SAMPLE_PROTOS["sdv/chassis/pubsub/brake_topics.proto"].replace(
+            "int32 pressure = 1;", "int32 pressure = 1;\n  bool abs_active = 2;"))
+    st = os.stat(topics)
+    os.utime(topics, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    second = _generate(session, [sdv_folder], tmp_path / "second")
+    assert second["msg/Brake.msg"] == "ast_ssot_msgs/Header header\nint32 pressure\nbool abs_active\n"
+    assert "catalog " + sample_protos + " indexed again" in capsys.readouterr().out
+
+
+def _warning_inputs(tmp_path, crash: bool):
+    """Sample inputs with an empty enum (msg warning), an unresolved rpc (srv warning) and, with `crash`, an unknown field type."""
+    protos = dict(SAMPLE_PROTOS)
+    fields = "int32 pressure = 1;\n  Mode mode = 2;" + ("\n  Ghost ghost = 3;" if crash else "")
+    protos["sdv/chassis/pubsub/brake_topics.proto"] = (
+        protos["sdv/chassis/pubsub/brake_topics.proto"].replace("int32 pressure = 1;", fields) + "enum Mode {\n}\n")
+    sdvsidl = dict(SAMPLE_SDVSIDL)
+    sdvsidl["swc/body/DoorApp.sdvsidl"] = sdvsidl["swc/body/DoorApp.sdvsidl"].replace(
+        'method_vsidl_name: "OpenDoor"\n      }',
+        'method_vsidl_name: "OpenDoor"\n      }\n      method_definition {\n        method_vsidl_name: "CloseDoor"\n      }')
+    return write_files(tmp_path / "protos_w", protos), write_files(tmp_path / "BL_w", sdvsidl)
+
+
+def test_warnings_are_written_with_the_outputs(tmp_path, sample_template):
+    protos, sdv = _warning_inputs(tmp_path, crash=False)
+    tree = _generate(GeneratorSession(protos, sample_template), [sdv], tmp_path / "out")
+    assert sorted(path for path in tree if "warnings" in path) == [
+        "doc/generation_warnings.txt", "srv/generation_warnings_srv.txt"]
+    assert tree["doc/generation_warnings.txt"] == "Warning: empty enum: Mode\nWarning: empty enum: Mode"
+    assert tree["srv/generation_warnings_srv.txt"].startswith("Warning: service CloseDoor could not be resolved")
+
+
+def test_warnings_are_written_when_the_run_fails(tmp_path, sample_template):
+    protos, sdv = _warning_inputs(tmp_path, crash=True)
+    with pytest.raises(AttributeError):
+        _generate(GeneratorSession(protos, sample_template), [sdv], tmp_path / "out")
+    tree = read_tree(tmp_path / "out")
+    assert {path: text for path, text in tree.items() if "warnings" in path} == {
+        "doc/generation_warnings.txt": "Warning: empty enum: Mode"}
+
+
+def test_concurrent_sessions_share_one_cache(tmp_path, sample_protos, sdv_folder, sample_template, expected):
+    cache = ParseCache(str(tmp_path / "cache"))
+    results = {}
+
+    def _run(i):
+        session = GeneratorSession(sample_protos, sample_template, cache=cache)
+        results[i] = _generate(session, [sdv_folder], tmp_path / f"run{i}")
+
+    threads = [threading.Thread(target=_run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert list(results.values()) == [expected] * 4
+    # the bundles saved by the concurrent runs serve the next one entirely
+    reloaded = ParseCache(str(tmp_path / "cache"))
+    session = GeneratorSession(sample_protos, sample_template, cache=reloaded)
+    assert _generate(session, [sdv_folder], tmp_path / "reloaded") == expected
+    assert (reloaded.hits, reloaded.misses) == (len(SAMPLE_SDVSIDL), 0)
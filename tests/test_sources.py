@@ -0,0 +1,58 @@
+# ros_interface_generator/tests/test_sources.py
+import os
+
+import pytest
+
+from ros_interface_generator import sources
+from ros_interface_generator.extractor_sdvsidl import extract_topics_from_sdvsidl_file_list
+from ros_interface_generator.proto_parser import ProtoCatalog
+from ros_interface_generator.utils import parse_sdvsidl_file
+
+from conftest import SAMPLE_PROTOS, SAMPLE_SDVSIDL, write_zip
+
+
+@pytest.fixture
+def archives(tmp_path):
+    return (write_zip(tmp_path / "catalog.zip", SAMPLE_PROTOS, prefix="catalog"),
+            write_zip(tmp_path / "BL.zip", SAMPLE_SDVSIDL))
+
+
+def _definitions(catalog):
+    return sorted(
+        # walk_rank follows the listing order of the file system or archive
+        (kind, name, os.path.relpath(d.path, catalog.proto_dir), d.block, d.sorted_rank)
+        for kind, table in (("message", catalog.messages), ("enum", catalog.enums), ("service", catalog.services))
+        for name, definitions in table.items() for d in definitions)
+
+
+def test_archive_root_is_its_single_folder(archives):
+    catalog_zip, sdv_zip = archives
+    assert sources.resolve_root(catalog_zip) == os.path.join(catalog_zip, "catalog")
+    assert sources.resolve_root(sdv_zip) == os.path.join(sdv_zip, "swc")
+    assert sources.resolve_root(os.path.dirname(catalog_zip)) == os.path.dirname(catalog_zip)
+
+
+def test_member_access(archives):
+    catalog_zip, _ = archives
+    path = os.path.join(catalog_zip, "catalog", "sdv", "body", "sdv_body_door_service.proto")
+    assert sources.read_bytes(path).decode() == SAMPLE_PROTOS["sdv/body/sdv_body_door_service.proto"]
+    with sources.open_text(path) as f:
+        assert f.readline() == 'syntax = "proto3";\n'
+    assert sources.stamp(path)[1] == len(SAMPLE_PROTOS["sdv/body/sdv_body_door_service.proto"])
+    with pytest.raises(FileNotFoundError):
+        sources.read_bytes(os.path.join(catalog_zip, "catalog", "missing.proto"))
+
+
+def test_zip_catalog_matches_folder(archives, sample_protos):
+    from_zip = ProtoCatalog(archives[0])
+    assert from_zip.proto_dir == os.path.join(archives[0], "catalog")
+    assert _definitions(from_zip) == _definitions(ProtoCatalog(sample_protos))
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_zip_extraction_matches_folder(archives, sample_protos, sample_sdvsidl, jobs):
+    catalog_zip, sdv_zip = archives
+    zipped = parse_sdvsidl_file(sdv_zip)
+    assert [os.path.relpath(p, sdv_zip) for p in zipped] == sorted(SAMPLE_SDVSIDL)
+    from_folder = extract_topics_from_sdvsidl_file_list(sorted(sample_sdvsidl), sample_protos)
+    assert extract_topics_from_sdvsidl_file_list(zipped, catalog_zip, jobs=jobs) == from_folder
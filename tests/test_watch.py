@@ -0,0 +1,120 @@
+# ros_interface_generator/tests/test_watch.py
+import os
+import threading
+from pathlib import Path
+
+from ros_interface_generator.enum_table import get_enum_table
+from ros_interface_generator.proto_parser import ProtoCatalog, get_proto_catalog
+from ros_interface_generator.watch import InputWatcher, affected_outputs, changed_paths, forget_inputs, snapshot
+
+from conftest import write_files, write_zip
+
+ENUM_PROTO = """syntax = "proto3";
+package sdv.test;
+enum Mode {{
+  MODE_UNSPECIFIED = 0;
+  MODE_ON = {value};
+}}
+"""
+
+
+def _mode_values(proto_dir):
+    return get_enum_table(proto_dir).lookup("Mode")[0].values
+
+
+def test_enum_edit_in_zip_catalog_rebuilds_enum_table(tmp_path):
+    archive = write_zip(tmp_path / "catalog.zip", {"modes.proto": ENUM_PROTO.format(value=1)}, prefix="catalog")
+    assert _mode_values(archive) == (0, 1)
+
+    write_zip(tmp_path / "catalog.zip", {"modes.proto": ENUM_PROTO.format(value=200)}, prefix="catalog")
+    assert forget_inputs(archive, [archive])
+    assert _mode_values(archive) == (0, 200)
+
+
+def test_enum_edit_in_folder_catalog_rebuilds_enum_table(tmp_path):
+    write_files(tmp_path / "protos", {"modes.proto": ENUM_PROTO.format(value=1)})
+    proto = tmp_path / "protos" / "modes.proto"
+    assert _mode_values(str(proto.parent)) == (0, 1)
+
+    proto.write_text(ENUM_PROTO.format(value=200))
+    assert forget_inputs(str(proto.parent), [str(proto)])
+    assert _mode_values(str(proto.parent)) == (0, 200)
+
+
+def test_change_in_sibling_folder_keeps_catalog(tmp_path):
+    protos = tmp_path / "protos"
+    write_files(protos, {"modes.proto": ENUM_PROTO.format(value=1)})
+    catalog = get_proto_catalog(str(protos))
+
+    sibling = os.path.join(str(tmp_path), "protos2", "other.proto")
+    assert not forget_inputs(str(protos), [sibling])
+    assert get_proto_catalog(str(protos)) is catalog
+
+
+def test_snapshot_changes(tmp_path, sample_protos):
+    archive = write_zip(tmp_path / "catalog.zip", {"modes.proto": ENUM_PROTO.format(value=1)})
+    before = snapshot([sample_protos, archive])
+    assert len(before) == 4
+
+    door = os.path.join(sample_protos, "sdv", "body", "sdv_body_door_service.proto")
+    os.remove(door)
+    write_files(tmp_path / "protos", {"sdv/body/window.proto": "syntax = \"proto3\";\n", "notes.txt": "ignored"})
+    write_zip(tmp_path / "catalog.zip", {"modes.proto": ENUM_PROTO.format(value=20000)})
+    assert changed_paths(before, snapshot([sample_protos, archive])) == sorted(
+        [archive, door, os.path.join(sample_protos, "sdv", "body", "window.proto")])
+
+
+def test_polling_watcher_returns_the_settled_changes(sample_protos):
+    watcher = InputWatcher([sample_protos], interval=0.01, debounce=0.02, use_inotify=False)
+    assert watcher.backend == "polling"
+    brake = os.path.join(sample_protos, "sdv", "chassis", "brake_types.proto")
+
+    def _edit():
+        with open(brake, "a") as f:
+            f.write("// edited\n")
+
+    timer = threading.Timer(0.05, _edit)
+    timer.start()
+    assert watcher.wait() == [brake]
+    timer.join()
+
+
+def _index(catalog):
+    return {attribute: {key: [getattr(d, "service", d).path for d in definitions]
+                        for key, definitions in getattr(catalog, attribute).items()}
+            for attribute in ("messages", "enums", "services", "rpcs", "service_rpcs")}
+
+
+def test_edited_protos_are_indexed_again_on_their_own(sample_protos):
+    catalog = get_proto_catalog(sample_protos)
+    table = get_enum_table(sample_protos)
+    index = _index(catalog)
+
+    topics = os.path.join(sample_protos, "sdv", "chassis", "pubsub", "brake_topics.proto")
+    with open(topics, "a", encoding="utf-8") as f:
+        f.write("enum Mode {\n  MODE_UNSPECIFIED = 0;\n  MODE_ON = 3;\n}\n")
+    assert forget_inputs(sample_protos, [topics]) == "refreshed"
+
+    refreshed = get_proto_catalog(sample_protos)
+    assert _index(refreshed) == _index(ProtoCatalog(sample_protos))
+    assert refreshed.fingerprint == ProtoCatalog(sample_protos).fingerprint != catalog.fingerprint
+    assert _index(catalog) == index                     # the previous catalog is left as it was
+    assert _mode_values(sample_protos) == (0, 3)
+    assert get_enum_table(sample_protos).lookup("Level") is table.lookup("Level")     # not in the edited file
+
+    write_files(Path(sample_protos), {"sdv/body/window.proto": "syntax = \"proto3\";\n"})
+    assert forget_inputs(sample_protos, [os.path.join(sample_protos, "sdv", "body", "window.proto")]) == "rebuilt"
+    assert get_proto_catalog(sample_protos).file_count == 4
+
+
+def test_affected_outputs(sample_protos):
+    graph = {
+        "msg/Brake.msg": {"sha1": "1", "inputs": {"message:sdv/chassis/brake_types.proto#Brake": "a",
+                                                  "topic:sdv.chassis.Brake": "b"}},
+        "msg/Wheel.msg": {"sha1": "2", "inputs": {"enum:sdv/chassis/brake_types.proto#Level": "c"}},
+        "srv/OpenDoor.srv": {"sha1": "3", "inputs": {"message:sdv/body/sdv_body_door_service.proto#OpenDoorRequest": "d"}},
+        "doc/ros_interface_manifest.json": {"sha1": "4", "inputs": {}},
+    }
+    types = os.path.join(sample_protos, "sdv", "chassis", "brake_types.proto")
+    assert affected_outputs(graph, sample_protos, [types]) == ["msg/Brake.msg", "msg/Wheel.msg"]
+    assert affected_outputs(graph, sample_protos, [os.path.join(sample_protos, "notes.txt")]) == []
@@ -1,14 +1,17 @@
 # ros_interface_generator/utils.py
 
 import re
-from typing import Tuple, Union, List, Dict
-from collections import defaultdict
+import sys
+from typing import Tuple, Union, List, Dict, Iterable, Set, NamedTuple
+from functools import lru_cache
 
 import os
 import shutil
 import json
 import csv
 from pathlib import Path
+from .output_tree import OutputTree
+from .sources import resolve_root, walk
 
 PRIMITIVE_TYPES = {
     "bool", "char", "string", "double",
@@ -24,6 +27,31 @@ PBS_SIZE_MAP = {
     "PBS_EIGHT": 64,
 }
 
+# Naming functions are pure and called for every type token, manifest row and conflict:
+# their patterns are compiled once and their results kept in bounded LRU caches.
+NAME_CACHE_SIZE = 65536
+
+_CAMEL_BOUNDARY_RE = re.compile(r'(?<!^)(?=[A-Z])')
+_INTERFACE_EXT_RE = re.compile(r'\.(msg|srv)$')
+_VERSION_SUFFIX_RE = re.compile(r'V[0-9]$')
+_XX_SUFFIX_RE = re.compile(r'XX$')
+_T_SUFFIX_RE = re.compile(r'_t$', flags=re.IGNORECASE)
+_NAME_TOKEN_RE = re.compile(r'[A-Z]{2,}(?=[A-Z][a-z]|[0-9]|$)|[A-Z]?[a-z0-9]+|[A-Z]|T')
+
+
+class ManifestRecord(NamedTuple):
+    """A row of ros_interface_manifest.json (names interned)."""
+    ros_filename: str           # ex: CruiseSettingRequestT.msg
+    topic_name: str
+    event_name: str
+    proto_file: str             # topic_hint of the message
+
+    @classmethod
+    def make(cls, ros_filename: str, topic_name: str, event_name: str, proto_file: str) -> "ManifestRecord":
+        intern = sys.intern
+        return cls(intern(ros_filename), intern(topic_name), intern(event_name) if event_name else event_name,
+                   intern(proto_file) if proto_file else proto_file)
+
 def resolve_type(base_type: str, pbs_value: str) -> str | None:
     if pbs_value not in PBS_SIZE_MAP:
         return None  
@@ -45,15 +73,18 @@ def move_file(src: str, dst: str):
         shutil.move(str(src_path), str(dst_path))
 
 
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def to_snake_case(name: str) -> str:
-    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+    return _CAMEL_BOUNDARY_RE.sub('_', name).lower()
 
 
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def pascal_case(s):
     """Converts a string to PascalCase by removing underscores and capitalizing each word."""
     return ''.join(part.capitalize() for part in s.lower().split('_'))
 
 
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def hint_to_acronym(hint_str: str) -> str:
         parts = hint_str.split('_')
         return ''.join(part[0].upper() for part in parts if part)
@@ -79,58 +110,64 @@ def compute_topic_hint2(topic_name: str) -> str:
     return (".".join(parts[:-1]))
 
 
-def remap_fqin_to_ros_convention(filename: str) -> Tuple[str, str]:
+def _truncate_name(name: str) -> Tuple[str, bool]:
+    if(len(name)>63):
+        name =  name[-63:]
+        return name[0].upper()+ name[1:], True
+    return name, False
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _remap_fqin(filename: str) -> Tuple[str, str, bool]:
+    """(original, ROS name, truncated) of an FQIN-prefixed name."""
      # Remove the extension if it exists
-    base = re.sub(r'\.(msg|srv)$', '', filename)
+    base = _INTERFACE_EXT_RE.sub('', filename)
     original = base
     
     # Do nothing if the name already ends with DT
     if base.endswith("DT"):
-        return original, original
+        return original, original, False
     
     # Remove V followed by a digit if it is at the end of the name
-    base = re.sub(r'V[0-9]$', '', base)
+    base = _VERSION_SUFFIX_RE.sub('', base)
     
     # Remove XX followed by a digit if it is at the end of the name
-    base = re.sub(r'XX$', '', base)
+    base = _XX_SUFFIX_RE.sub('', base)
     
     # Transform final "_t" or "_T" → add a " T" to force a separate token
-    base = re.sub(r'_t$', ' T', base, flags=re.IGNORECASE)
+    base = _T_SUFFIX_RE.sub(' T', base)
     
     
     # Append DT if the file is a .msg/.srv and ends with "Request" or "Response"
     if base.endswith("Request") or base.endswith("Response") :
         base += "DT"
     
-    if(len(base)>63):
-        base =  base[-63:]
-        base =  base[0].upper()+ base[1:]
-        print(f"message {base} truncated to 63 characters")
-        
-    return original, base
+    return (original, *_truncate_name(base))
 
 
-def remap_filename_to_ros_convention(filename: str) -> Tuple[str, str]:
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _remap_filename(filename: str) -> Tuple[str, str, bool]:
+    """(original, ROS name, truncated) of an interface name."""
      # Remove the extension if it exists
-    base = re.sub(r'\.(msg|srv)$', '', filename)
+    base = _INTERFACE_EXT_RE.sub('', filename)
     original = base
     
     # Do nothing if the name already ends with DT
     if base.endswith("DT"):
-        return original, original
+        return original, original, False
     
     # Remove V followed by a digit if it is at the end of the name
-    base = re.sub(r'V[0-9]$', '', base)
+    base = _VERSION_SUFFIX_RE.sub('', base)
     
     # Remove XX followed by a digit if it is at the end of the name
-    base = re.sub(r'XX$', '', base)
+    base = _XX_SUFFIX_RE.sub('', base)
     
     # Transform final "_t" or "_T" → add a " T" to force a separate token
-    base = re.sub(r'_t$', ' T', base, flags=re.IGNORECASE)
+    base = _T_SUFFIX_RE.sub(' T', base)
     
     
     # Identify words/tokens
-    tokens = re.findall(r'[A-Z]{2,}(?=[A-Z][a-z]|[0-9]|$)|[A-Z]?[a-z0-9]+|[A-Z]|T', base)
+    tokens = _NAME_TOKEN_RE.findall(base)
     # Capitalize each token unless it is all uppercase
     capitalized = [t[0].upper() + t[1:].lower() if not t.isupper() else t for t in tokens]
     transformed = ''.join(capitalized)
@@ -140,26 +177,68 @@ def remap_filename_to_ros_convention(filename: str) -> Tuple[str, str]:
     if transformed.endswith("Request") or transformed.endswith("Response") :
         transformed += "DT"
     
-    if(len(transformed)>63):
-        transformed =  transformed[-63:]
-        transformed =  transformed[0].upper()+ transformed[1:]
+    return (original, *_truncate_name(transformed))
+
+
+def remap_fqin_to_ros_convention(filename: str) -> Tuple[str, str]:
+    original, base, truncated = _remap_fqin(filename)
+    if truncated:
+        print(f"message {base} truncated to 63 characters")
+    return original, base
+
+
+def remap_filename_to_ros_convention(filename: str) -> Tuple[str, str]:
+    original, transformed, truncated = _remap_filename(filename)
+    if truncated:
         print(f"message {transformed} truncated to 63 characters")
     return original, transformed
 
 
-def copy_header_msg(template_path, output_dir):
+def remap_names(names: Iterable[str], fqin_names: Set[str] = frozenset()) -> Dict[str, str]:
+    """
+    {name: ROS name} for a whole list of interface names in one call;
+    the names of `fqin_names` follow the FQIN rules (remap_fqin_to_ros_convention).
+    """
+    remapped = {}
+    for name in names:
+        if name not in remapped:
+            remap = remap_fqin_to_ros_convention if name in fqin_names else remap_filename_to_ros_convention
+            remapped[name] = remap(name)[1]
+    return remapped
+
+
+def naming_cache_info() -> Dict[str, object]:
+    """lru_cache statistics of the naming functions (hits, misses, maxsize, currsize)."""
+    return {fn.__name__.lstrip("_"): fn.cache_info() for fn in _NAMING_FUNCTIONS}
+
+
+def clear_naming_caches() -> None:
+    for fn in _NAMING_FUNCTIONS:
+        fn.cache_clear()
+
+
+_NAMING_FUNCTIONS = (to_snake_case, pascal_case, hint_to_acronym, _remap_fqin, _remap_filename)
+
+
+def copy_header_msg(template_path, output_dir, tree=None):
+    """Copy the template Header.msg into `output_dir`, or into the OutputTree `tree` when given."""
     dest_path = os.path.join(output_dir, "Header.msg")
-    if not os.path.exists(dest_path):
+    if tree is not None:
+        if not tree.exists(dest_path):
+            with open(template_path, "r", encoding="utf-8", newline="") as f:
+                tree.write(dest_path, f.read())
+            print(f"✔ Copié : {dest_path}")
+    elif not os.path.exists(dest_path):
         shutil.copy(template_path, dest_path)
         print(f"✔ Copié : {dest_path}")
         
         
 def parse_sdvsidl_file(sdvsidl_path):
     """
-    return all sdvsidl files in the given path
+    return all sdvsidl files in the given path (folder or .zip archive)
     """
     sdvsidl_files = []
-    for root, _, files in os.walk(sdvsidl_path):
+    for root, _, files in walk(resolve_root(sdvsidl_path)):
         for file in files:
             if file.endswith('.sdvsidl'):
                 sdvsidl_files.append(os.path.join(root, file))
@@ -211,22 +290,8 @@ def load_prefixed_files_from_manifest(manifest_path: str) -> set[str]:
     Load the manifest JSON and return the set of files already prefixed
     in the form fqin + topic_name.
     """
-    with open(manifest_path, "r", encoding="utf-8") as f:
-        manifest = json.load(f)
-
-    prefixed_files = set()
-    for rec in manifest:
-        ros = rec.get("ros_filename", "")
-        topic = rec.get("topic_name", "")
-        proto_file = rec.get("proto_file", "")
-        if not ros or not topic or not proto_file:
-            continue
-
-        fqin = hint_to_acronym(proto_file.replace(".", "_"))
-        expected = f"{fqin}{topic}"
-        if ros.startswith(expected) or (ros.startswith(fqin) and expected in ros):
-            prefixed_files.add(Path(ros).stem)  # sans extension
-    return prefixed_files
+    from .manifest import ManifestTable     # manifest imports utils
+    return ManifestTable.load(manifest_path).prefixed_stems()
 
 
 def write_manifest_json(records: list, output_path: str):
@@ -234,12 +299,13 @@ def write_manifest_json(records: list, output_path: str):
     Write the list of generated interfaces to a human-readable JSON file.
     
     Args:
-        records (list): List of dictionaries containing interface data.
+        records (list): ManifestRecord rows (or dictionaries) containing interface data.
         output_path (str): Path to the .json file to write.
     """
     try:
+        rows = [record._asdict() if isinstance(record, ManifestRecord) else record for record in records]
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(records, f, indent=2, ensure_ascii=False)
+            json.dump(rows, f, indent=2, ensure_ascii=False)
         
     except Exception as e:
         print(f"❌ Error while writing in the manifest JSON : {e}")
@@ -261,38 +327,20 @@ def apply_remap_on_json(json_data: List[Dict]) -> List[Dict]:
 
 
 def apply_remap_on_json_using_manifest(json_data: List[Dict], manifest_path: str) -> List[Dict]:
-    prefixed_files = load_prefixed_files_from_manifest(manifest_path)  # stems without extension
-
-    for entry in json_data:
-        ros = entry.get("ros_filename", "")
-        if not ros:
-            continue
-        stem = Path(ros).stem
-        ext  = ".msg" if ros.lower().endswith(".msg") else ".srv"
-
-        if stem in prefixed_files:
-            # already compliant (ACRO + topic_name) → do not remap
-            _, new_value = remap_fqin_to_ros_convention(ros)
-            entry["ros_filename"] = new_value + ext
-        else:
-            # standard remap 
-            _, new_value = remap_filename_to_ros_convention(ros)
-            entry["ros_filename"] = new_value + ext
-
+    from .manifest import ManifestTable
+    table = ManifestTable.from_rows(json_data)
+    table.remap_to_ros_convention(load_prefixed_files_from_manifest(manifest_path))
+    for entry, ros in zip(json_data, table.column("ros_filename")):
+        if "ros_filename" in entry:
+            entry["ros_filename"] = ros
     return json_data
 
 
 def process_json_file(input_file: str, output_file: str, manifest_path: str):
-    # Load JSON from a file
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    # Apply the transformation
-    updated = apply_remap_on_json_using_manifest(data, manifest_path)   #apply_remap_on_json(data)
-    
-    # Write the updated JSON to a new file
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(updated, f, indent=2, ensure_ascii=False)
+    from .manifest import ManifestTable
+    table = ManifestTable.load(input_file)
+    table.remap_to_ros_convention(load_prefixed_files_from_manifest(manifest_path))
+    table.write_json(output_file)
     
 
 def json_to_csv(
@@ -383,81 +431,26 @@ def find_and_prefix_ros_filename_duplicates(
     manifest_path: str,
     msg_output: str,
     save: bool = False,
-) -> Tuple[Dict[str, List[str]], List[Tuple[str, str]]]:
-    
-    def _strip_ext(name: str) -> Tuple[str, str]:
-        m = re.match(r"^(.*?)(\.(msg|srv))$", name, flags=re.IGNORECASE)
-        return (m.group(1), m.group(2)) if m else (name, "")
-
-
-    path = Path(manifest_path)
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # 1) group (ros_filename, proto_file) by topic_name
-    by_topic: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
-    for rec in data:
-        topic = rec.get("topic_name", "")
-        ros = rec.get("ros_filename", "")
-        proto_file = rec.get("proto_file", "")
-        if topic and ros:
-            by_topic[topic].append((ros, proto_file))
-
-    # 2) keep only those with duplicates AND at least one name compliant with  "ACRO(proto) + topic"
-    def _has_at_least_one_acro_name(records: List[Tuple[str, str]], topic: str) -> bool:
-        for ros, proto in records:
-            stem, _ = _strip_ext(ros)
-            acro = hint_to_acronym(proto)
-            if stem == f"{acro}{topic}":
-                return True
-        return False
-    
-    duplicates: Dict[str, List[str]] = {
-        topic: [ros for (ros, _) in records]
-        for topic, records in by_topic.items()
-        if len({ros for (ros, _) in records}) > 1
-           and _has_at_least_one_acro_name(records, topic)
-    }
-
-    # 3) apply the FQIN prefix only for topics with duplicates
-    changes: List[Tuple[str, str]] = []
-    if duplicates:
-        for rec in data:
-            topic = rec.get("topic_name", "")
-            proto_file = rec.get("proto_file", "")
-            if topic not in duplicates:
-                continue  # do not touch topics without duplicates
-
-            ros = rec.get("ros_filename", "")
-            if not ros:
-                continue
-            base, ext = _strip_ext(ros)
-
-            # condition: base == topic_name
-            if base == topic:
-                new_ros = f"{hint_to_acronym(proto_file)}{base}{ext or '.msg'}"
-                if new_ros != ros:
-                    rec["ros_filename"] = new_ros
-                    changes.append((ros, new_ros,proto_file))
-                    
-                    
-                    if save and changes:
-                        output_msg = os.path.join(msg_output, f"{ros}")
-                        new_output_msg = os.path.join(msg_output, f"{new_ros}")
-                        
-                        if Path(new_output_msg).exists():
-                            print(f"warning: target already exists, To skip rename: {ros} -> {new_ros}")
-
-                            
-                        if Path(output_msg).exists():
-                            Path(output_msg).rename(new_output_msg)
-                            print(f"file ros renamed from  {ros} --> {new_ros}")
-                    
-
-    # 4) save if requested
+    tree: OutputTree = None,
+) -> List[Tuple[str, str, str]]:
+    """
+    Prefix with the FQIN acronym the ros_filename of the topics generated under several names
+    (ManifestTable.prefix_duplicates on the manifest file).
+    With save, the manifest is rewritten and the .msg files renamed in `tree`
+    (without one, the msg_output folder is loaded and committed).
+    """
+    from .manifest import ManifestTable
+    own_tree = tree is None and save
+    if own_tree:
+        tree = OutputTree([msg_output])
+
+    table = ManifestTable.load(manifest_path)
+    changes = table.prefix_duplicates(msg_output, tree if save else None)
     if save and changes:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        table.write_json(manifest_path)
+    if own_tree:
+        tree.commit()
+    return changes
             
             
 def occupied(
@@ -0,0 +1,193 @@
+# ros_interface_generator/watch.py
+"""
+Watch mode: regenerate the interfaces whenever a .proto or .sdvsidl input changes.
+
+The input trees are watched with inotify when the optional `inotify_simple`
+package is installed (Linux), otherwise by polling their (mtime, size)
+snapshot. A burst of changes (editor save, git checkout) is debounced: the
+regeneration starts once the inputs have been quiet for `debounce` seconds.
+
+Between regenerations the process keeps its proto catalog: .proto files
+edited in place are indexed again on their own (ProtoCatalog.refreshed) and
+so are the enums they define; adding or removing a .proto file rebuilds the
+catalog, from the parse cache for the unchanged files. The sdvsidl
+extractions are reused while the catalog content is unchanged. Each
+regeneration runs in incremental mode: only the interfaces whose field lines
+or enums changed are rendered again (the ones recorded as using the changed
+files, see `affected_outputs`) and only the outputs whose content changed
+are rewritten.
+"""
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sources import is_archive_path, split_archive_path, forget_archives, resolve_root
+from .proto_parser import PROTO_CATALOGS
+from .enum_table import ENUM_TABLES
+from .parse_cache import ParseCache
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:     # optional: polling fallback
+    INotify = None
+
+WATCHED_SUFFIXES = (".proto", ".sdvsidl")
+
+
+def snapshot(roots: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """{path: (mtime_ns, size)} of the watched files under `roots`; an archive counts as one file."""
+    state = {}
+    for root in roots:
+        if is_archive_path(root):
+            archive = split_archive_path(root)[0]
+            try:
+                st = os.stat(archive)
+            except OSError:
+                continue
+            state[archive] = (st.st_mtime_ns, st.st_size)
+            continue
+        if os.path.isfile(root):
+            st = os.stat(root)
+            state[root] = (st.st_mtime_ns, st.st_size)
+            continue
+        for dirpath, _, files in os.walk(root):
+            for file in files:
+                if file.endswith(WATCHED_SUFFIXES):
+                    path = os.path.join(dirpath, file)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue    # removed while walking
+                    state[path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def changed_paths(old: Dict[str, Tuple[int, int]], new: Dict[str, Tuple[int, int]]) -> List[str]:
+    """Paths added, removed or modified between two snapshots."""
+    return sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+
+
+class InputWatcher:
+    """Blocks until the watched inputs change and returns the changed paths, bursts debounced."""
+
+    def __init__(self, roots: List[str], interval: float = 0.5, debounce: float = 0.3, use_inotify: bool = True):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.interval = interval
+        self.debounce = debounce
+        self.state = snapshot(self.roots)
+        self.inotify = INotify() if use_inotify and INotify is not None else None
+        self._watched: Dict[str, int] = {}     # directory -> inotify watch descriptor
+        if self.inotify is not None:
+            self._add_watches()
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self.inotify is not None else "polling"
+
+    def _watch_dirs(self) -> List[str]:
+        dirs = []
+        for root in self.roots:
+            if is_archive_path(root) or os.path.isfile(root):
+                dirs.append(os.path.dirname(split_archive_path(root)[0] if is_archive_path(root) else root))
+            else:
+                dirs.extend(dirpath for dirpath, _, _ in os.walk(root))
+        return dirs
+
+    def _add_watches(self):
+        mask = (inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.MODIFY | inotify_flags.CLOSE_WRITE |
+                inotify_flags.MOVED_FROM | inotify_flags.MOVED_TO | inotify_flags.DELETE_SELF)
+        for directory in self._watch_dirs():
+            if directory not in self._watched:
+                try:
+                    self._watched[directory] = self.inotify.add_watch(directory, mask)
+                except OSError:
+                    continue
+
+    def _wait_for_activity(self, timeout: Optional[float]) -> bool:
+        """True if something happened in the watched trees within `timeout` seconds (None: forever)."""
+        if self.inotify is not None:
+            events = self.inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+            removed = {event.wd for event in events if event.mask & inotify_flags.IGNORED}
+            if removed:
+                # the kernel drops the watch of a deleted folder; watch it again if it comes back
+                self._watched = {d: wd for d, wd in self._watched.items() if wd not in removed}
+            return bool(events)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+            if snapshot(self.roots) != self.state:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def wait(self) -> List[str]:
+        """Changed input paths, once the inputs have settled."""
+        while True:
+            self._wait_for_activity(None)
+            # debounce: wait for `debounce` quiet seconds
+            while True:
+                if self.inotify is not None:
+                    if not self._wait_for_activity(self.debounce):
+                        break
+                else:
+                    before = snapshot(self.roots)
+                    time.sleep(self.debounce)
+                    if snapshot(self.roots) == before:
+                        break
+            new_state = snapshot(self.roots)
+            changes = changed_paths(self.state, new_state)
+            self.state = new_state
+            if self.inotify is not None:
+                self._add_watches()     # folders created by the burst
+            if changes:
+                return changes
+
+
+def forget_inputs(proto_dir: str, changes: List[str], cache: Optional[ParseCache] = None) -> Optional[str]:
+    """
+    Update the in-memory state derived from changed inputs before the next run.
+    Returns None if the proto catalog is unaffected, else how it was updated:
+    "refreshed" (the changed .proto files indexed again) or "rebuilt" (dropped,
+    built again by the next run).
+    """
+    forget_archives()
+    proto_root = os.path.abspath(split_archive_path(proto_dir)[0] if is_archive_path(proto_dir) else proto_dir)
+    protos = [path for path in changes if _is_within(path, proto_root)]
+    if not protos:
+        return None
+    catalog = PROTO_CATALOGS.get(proto_dir)
+    refreshed = catalog.refreshed(protos, cache) if catalog is not None else None
+    # enum tables are keyed by the resolved root (an archive's top-level folder)
+    root = catalog.proto_dir if catalog is not None else resolve_root(proto_dir)
+    if refreshed is None:
+        PROTO_CATALOGS.pop(proto_dir, None)
+        ENUM_TABLES.pop(root, None)
+        return "rebuilt"
+    PROTO_CATALOGS[proto_dir] = refreshed
+    table = ENUM_TABLES.get(root)
+    if table is not None and table.catalog is catalog:
+        ENUM_TABLES[root] = table.refreshed(refreshed)
+    else:
+        ENUM_TABLES.pop(root, None)
+    return "refreshed"
+
+
+def affected_outputs(graph: Dict[str, dict], proto_dir: str, changes: List[str]) -> List[str]:
+    """
+    Outputs of a dependency graph (incremental.build_dependency_graph) recorded as
+    derived from a message or enum of the changed .proto files of `proto_dir`.
+    """
+    root = os.path.abspath(resolve_root(proto_dir))
+    files = {os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+             for path in changes if path.endswith(".proto") and _is_within(path, root)}
+    return sorted(
+        key for key, record in graph.items()
+        if any(input_key.split(":", 1)[-1].split("#", 1)[0] in files
+               for input_key in record["inputs"] if input_key.startswith(("message:", "enum:")))
+    )
+
+
+def _is_within(path: str, root: str) -> bool:
+    """True if `path` is `root` or inside it (path components compared, "protos2" is not in "protos")."""
+    path = os.path.abspath(path)
+    return os.path.commonpath([path, root]) == root